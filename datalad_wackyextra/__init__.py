@@ -23,11 +23,25 @@ command_suite = (
             # optional name of the command in the Python API
             'wacky_translate'
         ),
+        (
+            'datalad_wackyextra.extract',
+            'Extract',
+            'wacky-extract',
+            'wacky_extract'
+        ),
     ]
 )
 
-from datalad import setup_package
-from datalad import teardown_package
+
+def __getattr__(name):
+    # DataLad's test fixtures, imported on demand so that importing the
+    # package (e.g. for wackyextra-translate) does not import DataLad
+    if name in ("setup_package", "teardown_package"):
+        import datalad
+        return getattr(datalad, name)
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
+
 
 from . import _version
 __version__ = _version.get_versions()['version']
@@ -0,0 +1,208 @@
+"""Reading and writing in background threads, overlapping with translation"""
+
+from contextlib import contextmanager
+import io
+import queue
+import threading
+
+CHUNK_SIZE = 1 << 20
+
+# seconds between checks whether the other side went away
+_POLL_INTERVAL = 0.1
+
+_END = object()
+
+
+class _Failure:
+    """Exception raised in a background thread, passed on to the caller"""
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _put(chunks, item, stop):
+    """Put an item into a bounded queue, unless stopped; return success"""
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _read(source, chunks, stop, chunk_size):
+    try:
+        with source as lines:
+            chunk = []
+            size = 0
+            for line in lines:
+                chunk.append(line)
+                size += len(line)
+                if size >= chunk_size:
+                    if not _put(chunks, chunk, stop):
+                        return
+                    chunk = []
+                    size = 0
+            if chunk and not _put(chunks, chunk, stop):
+                return
+            _put(chunks, _END, stop)
+    except BaseException as e:
+        _put(chunks, _Failure(e), stop)
+
+
+def _iter_chunks(chunks):
+    while True:
+        chunk = chunks.get()
+        if chunk is _END:
+            return
+        if isinstance(chunk, _Failure):
+            raise chunk.error
+        yield from chunk
+
+
+@contextmanager
+def prefetch(source, depth=8, chunk_size=CHUNK_SIZE):
+    """Read lines ahead in a background thread
+
+    The source is entered, iterated and closed in the background thread.
+    If the context is left because of an error, the thread is not waited
+    for: it may be blocked reading (e.g. from stdin, which can take
+    forever), and closing the source from another thread would block as
+    well. It stops, closing the source, once that read returns; being a
+    daemon thread, it does not keep the process alive.
+
+    Parameters
+    ----------
+    source: context manager
+      Yields the lines (bytes) to read, e.g. an open file.
+    depth: int
+      Maximum number of chunks read ahead; 0 reads in the calling
+      thread, as lines are requested.
+    chunk_size: int
+      Approximate size of chunks, in bytes.
+
+    Yields
+    ------
+    iterator of bytes
+      The lines. Errors from reading are raised when the line which
+      could not be read is requested.
+    """
+    if depth <= 0:
+        with source as lines:
+            yield iter(lines)
+        return
+    chunks = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read,
+        args=(source, chunks, stop, chunk_size),
+        name="wackyextra-reader",
+        daemon=True,
+    )
+    reader.start()
+    try:
+        yield _iter_chunks(chunks)
+    except BaseException:
+        stop.set()
+        raise
+    stop.set()
+    reader.join()
+
+
+class BackgroundWriter(io.BufferedIOBase):
+    """Binary file writing to another file in a background thread
+
+    Written data are collected into chunks of about ``chunk_size``
+    bytes, which are passed to the background thread through a queue of
+    at most ``depth`` chunks. Flushing passes on what has been written
+    so far, and flushes the underlying file once it is written there.
+    An error from writing (e.g. BrokenPipeError) is raised by all later
+    calls of write, flush and close. Closing waits until everything has
+    been written; the underlying file is not closed.
+    """
+
+    def __init__(self, raw, depth=8, chunk_size=CHUNK_SIZE):
+        super().__init__()
+        self.raw = raw
+        self._chunks = queue.Queue(maxsize=depth)
+        self._chunk_size = chunk_size
+        self._buffer = []
+        self._size = 0
+        self._error = None
+        self._finished = False
+        self._writer = threading.Thread(
+            target=self._write_chunks, name="wackyextra-writer", daemon=True)
+        self._writer.start()
+
+    def _write_chunks(self):
+        while True:
+            item = self._chunks.get()
+            if item is _END:
+                return
+            if self._error is not None:
+                continue  # keep draining, so that the caller never blocks
+            data, flush = item
+            try:
+                self.raw.write(data)
+                if flush:
+                    self.raw.flush()
+            except BaseException as e:
+                self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def _send(self, flush=False):
+        if self._buffer or flush:
+            self._chunks.put((b"".join(self._buffer), flush))
+            self._buffer = []
+            self._size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        if self.closed:
+            raise ValueError("write to closed file")
+        self._check()
+        self._buffer.append(bytes(b))
+        self._size += len(b)
+        if self._size >= self._chunk_size:
+            self._send()
+        return len(b)
+
+    def flush(self):
+        if self._finished:
+            return
+        self._check()
+        self._send(flush=True)
+
+    def close(self):
+        if self._finished:
+            return
+        try:
+            self._send(flush=True)
+            self._chunks.put(_END)
+            self._writer.join()
+        finally:
+            self._finished = True
+            super().close()
+        self._check()
+
+
+@contextmanager
+def write_behind(fout, depth=8, chunk_size=CHUNK_SIZE):
+    """Write to a binary file in a background thread
+
+    Yields a :class:`BackgroundWriter` writing to ``fout``, or ``fout``
+    itself if ``depth`` is 0. Leaving the context waits until all data
+    has been written.
+    """
+    if depth <= 0:
+        yield fout
+        return
+    with BackgroundWriter(fout, depth, chunk_size) as writer:
+        yield writer
@@ -0,0 +1,178 @@
+"""Standalone ``wackyextra-translate`` command
+
+Same translation as ``datalad wacky-translate``, without DataLad: only
+the translation core (:mod:`.translation`) and the translators needed
+for the input are imported, so that the command starts quickly and
+can run where DataLad is not installed (as long as the input has no
+citation records, whose translators need datalad-catalog). Options
+match those of ``datalad wacky-translate``; running a server and
+benchmarking engines are only available there.
+"""
+
+import argparse
+import logging
+import sys
+
+from .lineindex import parse_line_range
+from .sharding import parse_shard
+from .streams import STDIO
+from .translation import RecordSelector, translate_file
+from .translators.engines import (
+    ENGINES, EngineSelection, parse_field_engine
+)
+
+lgr = logging.getLogger('datalad.wackyextra.cli')
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="wackyextra-translate",
+        description="Translate metadata records into catalog format",
+    )
+    parser.add_argument(
+        "-i", "--infile", required=True,
+        help="""input file with json lines; files ending with .gz, .xz or
+        .zst are decompressed on the fly. Use '-' to read from stdin""",
+    )
+    parser.add_argument(
+        "-o", "--outfile", default=STDIO,
+        help="""output file; will be opened in append mode. Output is
+        compressed if the file name ends with .gz, .xz or .zst. Default:
+        stdout""",
+    )
+    parser.add_argument(
+        "--compression-level", type=int,
+        help="compression level for compressed output",
+    )
+    parser.add_argument(
+        "--include-extractor", action="append", metavar="NAME",
+        help="only translate records produced by the given extractor",
+    )
+    parser.add_argument(
+        "--exclude-extractor", action="append", metavar="NAME",
+        help="do not translate records produced by the given extractor",
+    )
+    parser.add_argument(
+        "--dataset-id", action="append", metavar="ID",
+        help="""only translate records of the given dataset, looked up in
+        an index of the (uncompressed) input file""",
+    )
+    parser.add_argument(
+        "--line-range", metavar="START:END", type=parse_line_range,
+        help="only translate records from the given lines of the input file",
+    )
+    parser.add_argument(
+        "--line-index", metavar="PATH",
+        help="""index used by --dataset-id and --line-range. Default:
+        INFILE.index.sqlite""",
+    )
+    parser.add_argument(
+        "--shard", metavar="i/N", type=parse_shard,
+        help="only translate records from shard i (counting from 0) out of N",
+    )
+    parser.add_argument(
+        "--latest-only", action="store_true",
+        help="""only translate the latest record of each dataset and
+        extractor; the input is read twice, so it cannot be stdin""",
+    )
+    parser.add_argument(
+        "--version-order", metavar="PATH",
+        help="""file listing dataset versions from oldest to newest, used by
+        --latest-only instead of extraction time""",
+    )
+    parser.add_argument(
+        "--dedup-publications", action="store_true",
+        help="translate each cited publication once and reuse it",
+    )
+    parser.add_argument(
+        "--publication-index", metavar="PATH",
+        help="""SQLite database in which deduplicated publications are
+        stored. Implies --dedup-publications""",
+    )
+    parser.add_argument(
+        "--cache-translations", action="store_true",
+        help="reuse translations of records with identical extracted metadata",
+    )
+    parser.add_argument(
+        "--translation-cache", metavar="PATH",
+        help="""SQLite database in which reusable translations are stored.
+        Implies --cache-translations""",
+    )
+    parser.add_argument(
+        "--merge", action="store_true",
+        help="merge translated records describing the same dataset",
+    )
+    parser.add_argument(
+        "--merge-buffer", type=int, default=100000,
+        help="maximum number of translated records kept in memory while merging",
+    )
+    parser.add_argument(
+        "--jq-batch-size", type=int, default=1000,
+        help="number of records whose jq programs are run together",
+    )
+    parser.add_argument(
+        "--engine", choices=ENGINES, default="jq",
+        help="implementation used by jq-based translators",
+    )
+    parser.add_argument(
+        "--field-engine", action="append", metavar="EXTRACTOR.FIELD=ENGINE",
+        type=parse_field_engine,
+        help="implementation used for a single field of a jq-based translator",
+    )
+    parser.add_argument(
+        "-J", "--jobs", type=int, default=1,
+        help="""number of worker processes translating records, in batches
+        sized by the input so that large records do not hold up others;
+        not compatible with --merge, --publication-index and
+        --translation-cache""",
+    )
+    parser.add_argument(
+        "--io-queue-depth", type=int, default=8,
+        help="""number of chunks of input read ahead, and of output not yet
+        written, by background threads; 0 disables them""",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+    try:
+        engines = EngineSelection(args.engine, dict(args.field_engine or []))
+        worker_stats = translate_file(
+            args.infile,
+            args.outfile,
+            compression_level=args.compression_level,
+            selector=RecordSelector(
+                args.include_extractor, args.exclude_extractor),
+            dataset_ids=args.dataset_id,
+            line_range=args.line_range,
+            line_index=args.line_index,
+            shard=args.shard,
+            latest_only=args.latest_only,
+            version_order=args.version_order,
+            dedup_publications=args.dedup_publications,
+            publication_index=args.publication_index,
+            cache_translations=args.cache_translations,
+            translation_cache=args.translation_cache,
+            merge=args.merge,
+            merge_buffer=args.merge_buffer,
+            batch_size=args.jq_batch_size,
+            engines=engines,
+            io_queue_depth=args.io_queue_depth,
+            jobs=args.jobs,
+        )
+    except (OSError, ValueError) as e:
+        lgr.debug("Translation failed", exc_info=True)
+        sys.exit("wackyextra-translate: error: {}".format(e))
+    for stats in worker_stats or []:
+        print(
+            "worker {worker}: {records} records ({bytes} bytes) in {batches} "
+            "batches, busy {busy_time:.2f}s ({utilisation:.0%})".format(
+                **stats),
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""JSON encoding of translated records, reusing encoded shared objects
+
+Output is identical to that of the default ``jsonlines.Writer`` encoder.
+"""
+
+import json
+from json.encoder import encode_basestring
+
+try:
+    from json.encoder import c_make_encoder
+except ImportError:  # pragma: no cover
+    c_make_encoder = None
+
+
+def _make_encode():
+    """Return a function encoding an object as str
+
+    Same as the encoder used by ``jsonlines.Writer``, but the C encoder
+    is created once, rather than for every encoded object, which matters
+    when many small objects are encoded.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    if c_make_encoder is None:
+        return encoder.encode
+    iterencode = c_make_encoder(
+        None, encoder.default, encode_basestring, None,
+        encoder.key_separator, encoder.item_separator,
+        False, False, True,
+    )
+    return lambda obj: "".join(iterencode(obj, 0))
+
+
+class FragmentEncoder:
+    """Encode records as utf-8 JSON, caching fragments of shared objects
+
+    Only dicts directly contained in a record, or in a list contained in
+    a record, are cached. Objects which are not records (dicts) are
+    encoded in full.
+
+    Parameters
+    ----------
+    max_fragments: int
+      Maximum number of cached fragments. Objects are cached when they
+      are encountered for the second time. Cached objects are kept
+      alive by the cache (so that their identity cannot be reused);
+      when it is full, the cache is emptied.
+    """
+
+    def __init__(self, max_fragments=65536):
+        self._encode = _make_encode()
+        self._max_fragments = max_fragments
+        # id(obj) -> (obj, encoded obj)
+        self._fragments = {}
+        # id(obj) -> encoded obj, for objects seen once; only objects
+        # seen again are cached
+        self._seen = {}
+        # key -> encoded '"key": '
+        self._keys = {}
+
+    def _encode_dict(self, obj):
+        entry = self._fragments.get(id(obj))
+        if entry is not None:
+            return entry[1]
+        fragment = self._encode(obj).encode("utf-8")
+        if self._seen.get(id(obj)) != fragment:
+            # first encounter, or the id of a freed object reused by a
+            # different one; most likely not shared, do not keep it alive
+            if len(self._seen) >= self._max_fragments:
+                self._seen.clear()
+            self._seen[id(obj)] = fragment
+            return fragment
+        if len(self._fragments) >= self._max_fragments:
+            self._fragments.clear()
+        self._fragments[id(obj)] = (obj, fragment)
+        return fragment
+
+    def _encode_key(self, key):
+        if type(key) is not str:
+            # json converts keys to strings, leave that to it
+            raise TypeError("non-string key")
+        encoded = encode_basestring(key).encode("utf-8") + b": "
+        self._keys[key] = encoded
+        return encoded
+
+    def encode(self, record):
+        """Return the JSON encoding of a record, as bytes"""
+        if type(record) is not dict:
+            return self._encode(record).encode("utf-8")
+        keys = self._keys
+        encode_dict = self._encode_dict
+        parts = []
+        try:
+            for key, value in record.items():
+                key = keys.get(key) or self._encode_key(key)
+                if type(value) is dict:
+                    parts.append(key + encode_dict(value))
+                elif type(value) is list and value and type(value[0]) is dict:
+                    parts.append(key + b"[" + b", ".join([
+                        encode_dict(x) if type(x) is dict
+                        else self._encode(x).encode("utf-8")
+                        for x in value
+                    ]) + b"]")
+                else:
+                    parts.append(key + self._encode(value).encode("utf-8"))
+        except TypeError:
+            return self._encode(record).encode("utf-8")
+        return b"{" + b", ".join(parts) + b"}"
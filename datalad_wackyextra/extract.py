@@ -0,0 +1,299 @@
+"""Concurrent extraction of metadata from many datasets
+
+Running the wacky extractors with ``meta-extract`` dataset by dataset is
+bound by the latency of the subprocesses involved (``git ls-files``,
+``git rev-parse``, ``datalad get``), each of which is waited for before
+the next one starts. Here, extraction from all datasets of a
+superdataset runs in an asyncio event loop: git calls needed to
+describe a dataset run as asyncio subprocesses, and extractors (which
+use the blocking DataLad API) run in worker threads. A semaphore bounds
+the number of datasets and extractors processed at the same time.
+Metadata records are written as soon as they are ready, in completion
+order.
+"""
+
+__docformat__ = 'restructuredtext'
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import logging
+import subprocess
+import time
+
+import jsonlines
+
+from datalad.interface.base import Interface
+from datalad.interface.base import build_doc
+from datalad.support.param import Parameter
+from datalad.support.constraints import EnsureInt, EnsureNone, EnsureStr
+from datalad.distribution.dataset import (
+    Dataset, EnsureDataset, datasetmethod, require_dataset
+)
+from datalad.interface.utils import eval_results, generic_result_renderer
+from datalad.interface.results import get_status_dict
+
+from .extractors.cff import CffExtractor
+from .extractors.citations import (
+    CrossrefExtractor, NbibExtractor, RisExtractor
+)
+from .streams import STDIO, open_output
+
+lgr = logging.getLogger('datalad.wackyextra.extract')
+
+EXTRACTORS = {
+    "we_cff": CffExtractor,
+    "we_ris": RisExtractor,
+    "we_nbib": NbibExtractor,
+    "we_crossref": CrossrefExtractor,
+}
+
+
+async def _git(path, *args):
+    """Run a git command in path, return its stripped output
+
+    Raises CalledProcessError if git exits with non-zero status.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "git", "-C", str(path), *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, ["git", *args], stdout, stderr)
+    return stdout.decode().strip()
+
+
+async def _git_config(path, *args):
+    """Return a git config value, or None if it is not set"""
+    try:
+        return await _git(path, "config", *args)
+    except subprocess.CalledProcessError:
+        return None
+
+
+async def find_datasets(path):
+    """Return paths of a dataset and all its installed subdatasets"""
+    output = await _git(
+        path, "submodule", "--quiet", "foreach", "--recursive",
+        'echo "$toplevel/$sm_path"',
+    )
+    return [str(path)] + output.splitlines()
+
+
+async def get_dataset_info(path):
+    """Return a dict with id, version (HEAD) and agent of a dataset"""
+    dataset_id, version, agent_name, agent_email = await asyncio.gather(
+        _git_config(path, "-f", ".datalad/config", "datalad.dataset.id"),
+        _git(path, "rev-parse", "HEAD"),
+        _git_config(path, "user.name"),
+        _git_config(path, "user.email"),
+    )
+    return {
+        "dataset_id": dataset_id,
+        "dataset_version": version,
+        "agent_name": agent_name,
+        "agent_email": agent_email,
+    }
+
+
+def _run_extractor(path, extractor_name, version, parameter):
+    """Run an extractor (blocking), return its ExtractorResult or None
+
+    None is returned if the required content could not be obtained.
+    """
+    extractor = EXTRACTORS[extractor_name](Dataset(path), version, parameter)
+    if not extractor.get_required_content():
+        return None
+    return extractor.extract(None)
+
+
+async def _extract(path, extractor_names, parameter, semaphore, executor):
+    """Return results (status dicts) for all extractors run on a dataset"""
+    async with semaphore:
+        try:
+            info = await get_dataset_info(path)
+        except subprocess.CalledProcessError as e:
+            return [dict(path=path, status="error",
+                         message=e.stderr.decode().strip())]
+    if info["dataset_id"] is None:
+        return [dict(path=path, status="impossible",
+                     message="not a DataLad dataset")]
+
+    async def run(extractor_name):
+        res = dict(path=path, extractor_name=extractor_name)
+        async with semaphore:
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    executor,
+                    partial(_run_extractor, path, extractor_name,
+                            info["dataset_version"], parameter),
+                )
+            except Exception as e:
+                lgr.debug("%s failed on %s", extractor_name, path,
+                          exc_info=True)
+                return dict(res, status="error", message=str(e))
+        if result is None:
+            return dict(res, status="impossible",
+                        message="required content not available")
+        if not result.extraction_success:
+            return dict(res, status="error", message="extraction failed")
+        res["status"] = "ok"
+        res["metadata_record"] = {
+            "type": "dataset",
+            "dataset_id": info["dataset_id"],
+            "dataset_version": info["dataset_version"],
+            "extractor_name": extractor_name,
+            "extractor_version": result.extractor_version,
+            "extraction_parameter": result.extraction_parameter,
+            "extraction_time": time.time(),
+            "agent_name": info["agent_name"],
+            "agent_email": info["agent_email"],
+            "extracted_metadata": result.immediate_data,
+        }
+        return res
+
+    return await asyncio.gather(*(run(name) for name in extractor_names))
+
+
+async def extract_datasets(paths, extractor_names, parameter=None, jobs=8):
+    """Run extractors on datasets concurrently, yield results as completed
+
+    Parameters
+    ----------
+    paths: list of str
+      Dataset paths.
+    extractor_names: list of str
+      Names of (wacky) extractors to run on each dataset.
+    parameter: dict, optional
+      Extraction parameter passed to all extractors.
+    jobs: int
+      Maximum number of git calls or extractors running at a time.
+
+    Yields
+    ------
+    dict
+      Result with path, extractor_name (unless the dataset could not be
+      described), status, message (unless ok), and metadata_record
+      (if ok).
+    """
+    semaphore = asyncio.Semaphore(jobs)
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    tasks = [
+        asyncio.ensure_future(_extract(
+            path, extractor_names, parameter or {}, semaphore, executor))
+        for path in paths
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            for res in await task:
+                yield res
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=True)
+
+
+def _iterate(async_iterator):
+    """Iterate over an async iterator from synchronous code"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
+        loop.close()
+
+
+@build_doc
+class Extract(Interface):
+    """Extract metadata from a dataset and all its subdatasets concurrently
+
+    Runs wacky extractors on the dataset and all its installed
+    subdatasets, and writes metadata records (in the same form as
+    ``datalad meta-extract``) to a json lines file, as soon as each one
+    is ready. Several datasets are processed at the same time, so that
+    time spent waiting for git and DataLad subprocesses overlaps.
+    """
+
+    # output goes to stdout if requested, so it needs to stay clean
+    result_renderer = "tailored"
+
+    _params_ = dict(
+        dataset=Parameter(
+            args=("-d", "--dataset"),
+            doc="""superdataset from which (together with all installed
+            subdatasets) metadata is extracted""",
+            constraints=EnsureDataset() | EnsureNone(),
+        ),
+        outfile=Parameter(
+            args=("-o", "--outfile"),
+            doc="""Output file; will be opened in append mode. Output is
+            compressed if the file name ends with .gz, .xz or .zst. Use '-'
+            to write to stdout, which is the default""",
+        ),
+        extractor=Parameter(
+            args=("-e", "--extractor"),
+            action="append",
+            metavar="NAME",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Extractor to run; one of {}. Can be given multiple times.
+            By default, all of them are run""".format(
+                ", ".join(EXTRACTORS)),
+        ),
+        jobs=Parameter(
+            args=("-J", "--jobs"),
+            constraints=EnsureInt(),
+            doc="""Maximum number of git calls and extractors running at
+            the same time""",
+        ),
+        recursive=Parameter(
+            args=("--no-recursive",),
+            dest="recursive",
+            action="store_false",
+            doc="""Only extract from the given dataset, not its
+            subdatasets""",
+        ),
+    )
+
+    @staticmethod
+    @datasetmethod(name="wacky_extract")
+    @eval_results
+    def __call__(dataset=None, outfile=STDIO, extractor=None, jobs=8,
+                 recursive=True):
+        ds = require_dataset(dataset, purpose="extract metadata")
+        extractor_names = extractor or list(EXTRACTORS)
+        unknown = [e for e in extractor_names if e not in EXTRACTORS]
+        if unknown:
+            raise ValueError("Unknown extractor(s): {}".format(
+                ", ".join(unknown)))
+
+        if recursive:
+            paths = asyncio.run(find_datasets(ds.path))
+        else:
+            paths = [ds.path]
+
+        with open_output(outfile) as fout, \
+                jsonlines.Writer(fout, flush=outfile == STDIO) as writer:
+            for res in _iterate(
+                    extract_datasets(paths, extractor_names, jobs=jobs)):
+                record = res.pop("metadata_record", None)
+                if record is not None:
+                    writer.write(record)
+                yield get_status_dict(
+                    action="wacky_extract",
+                    ds=ds,
+                    **res,
+                )
+
+    @staticmethod
+    def custom_result_renderer(res, **kwargs):
+        if kwargs.get("outfile") == STDIO:
+            # stdout carries metadata records, do not mix in anything else
+            return
+        generic_result_renderer(res)
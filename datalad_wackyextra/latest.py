@@ -0,0 +1,133 @@
+"""Selecting only the latest record of each dataset and extractor
+
+Dumps often contain metadata of the whole version history of datasets,
+while a catalog only shows the latest version. Rather than translating
+all versions, the input is read twice: a first pass peeks at a few
+top-level fields of each line (see :mod:`.peek`) and keeps, for each
+dataset id and extractor, the position of the latest record; a second
+pass reads only these lines. Uncompressed files are read at the kept
+offsets directly; compressed ones are decompressed again, skipping
+other lines.
+
+Records are compared by their dataset version's position in a given
+version order, if any, and otherwise (or among versions which are not
+listed) by extraction time.
+"""
+
+from array import array
+from contextlib import contextmanager
+import json
+import math
+
+from .peek import peek
+from .streams import STDIO, get_compression, open_input
+
+KEYS = (
+    "dataset_id", "dataset_version", "extractor_name", "extraction_time",
+    "type",
+)
+
+
+def read_version_order(path):
+    """Read dataset versions, one per line, from oldest to newest
+
+    For example, the output of ``git rev-list --reverse HEAD`` (of one
+    or more datasets). Returns a dict of version -> position.
+    """
+    with open(path) as f:
+        versions = (line.strip() for line in f)
+        return {v: i for i, v in enumerate(v for v in versions if v)}
+
+
+def _get_rank(fields, version_order):
+    """Return a sortable rank of a record, higher is newer"""
+    position = -1
+    if version_order is not None:
+        position = version_order.get(fields.get("dataset_version"), -1)
+    extraction_time = fields.get("extraction_time")
+    if not isinstance(extraction_time, (int, float)):
+        extraction_time = -math.inf
+    return position, extraction_time
+
+
+def scan_latest(lines, selector=None, version_order=None):
+    """Find the latest line for each dataset id and extractor
+
+    Parameters
+    ----------
+    lines: iterable of bytes
+      Json lines.
+    selector: callable, optional
+      Called with a dict of (some of) ``KEYS``; records for which it
+      returns False are not considered.
+    version_order: dict, optional
+      Dataset version -> position, see :func:`read_version_order`.
+
+    Returns
+    -------
+    array, array
+      Line numbers and byte offsets of the selected lines, in file
+      order. Lines which are not valid json are selected too, so that
+      decoding errors are reported.
+    """
+    latest = {}  # (dataset id, extractor name) -> (rank, number, offset)
+    invalid = []
+    offset = 0
+    for number, line in enumerate(lines):
+        if line.strip():
+            fields = peek(line, KEYS)
+            if fields is not None and len(fields) < len(KEYS):
+                # some keys are missing, or after extracted_metadata
+                record = json.loads(line)
+                fields = {k: record[k] for k in KEYS if k in record}
+            if fields is None:
+                invalid.append((number, offset))
+            elif selector is None or selector(fields):
+                key = (fields.get("dataset_id"), fields.get("extractor_name"))
+                rank = _get_rank(fields, version_order)
+                current = latest.get(key)
+                if current is None or rank >= current[0]:
+                    latest[key] = (rank, number, offset)
+        offset += len(line)
+    selected = sorted(
+        invalid + [(number, offset) for _, number, offset in latest.values()])
+    return (
+        array("q", (number for number, _ in selected)),
+        array("q", (offset for _, offset in selected)),
+    )
+
+
+@contextmanager
+def open_latest(path, selector=None, version_order=None):
+    """Open a json lines file, yielding only the latest lines
+
+    See :func:`scan_latest`. The file is read twice, so it cannot be
+    stdin.
+    """
+    if str(path) == STDIO:
+        raise ValueError(
+            "Selecting the latest records requires an input file, not stdin")
+    with open_input(path) as fin:
+        numbers, offsets = scan_latest(fin, selector, version_order)
+    with open_input(path) as fin:
+        if get_compression(path) is None:
+            yield _read_at(fin, offsets)
+        else:
+            yield _read_numbers(fin, numbers)
+
+
+def _read_at(fin, offsets):
+    for offset in offsets:
+        fin.seek(offset)
+        yield fin.readline()
+
+
+def _read_numbers(fin, numbers):
+    numbers = iter(numbers)
+    wanted = next(numbers, None)
+    for number, line in enumerate(fin):
+        if wanted is None:
+            break
+        if number == wanted:
+            yield line
+            wanted = next(numbers, None)
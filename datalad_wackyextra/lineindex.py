@@ -0,0 +1,171 @@
+"""Random access to records of a large (uncompressed) json lines file
+
+Line offsets and dataset ids are kept in an SQLite index, built on first
+use and rebuilt when the file changes.
+"""
+
+from array import array
+from contextlib import contextmanager
+import mmap
+import os
+import sqlite3
+
+from .peek import peek
+from .streams import STDIO, get_compression
+
+INDEX_SUFFIX = ".index.sqlite"
+
+
+def parse_line_range(spec):
+    """Parse a line range ``START:END`` into a tuple (ints or None)
+
+    As in Python slices, lines are counted from 0, END is not included,
+    and either can be omitted. Raises ValueError if the range is malformed.
+    """
+    try:
+        start, end = (int(x) if x.strip() else None for x in spec.split(":"))
+    except ValueError:
+        raise ValueError(
+            "Line range must be given as START:END, e.g. 100:200, "
+            "got {!r}".format(spec)
+        )
+    if (start is not None and start < 0) or (end is not None and end < 0):
+        raise ValueError("Line numbers must not be negative, got {!r}".format(
+            spec))
+    return start, end
+
+
+class LineIndex:
+    """Memory-mapped json lines file with a persistent line index
+
+    Parameters
+    ----------
+    path: str or Path
+      Uncompressed json lines file.
+    index_path: str or Path, optional
+      Index database; defaults to the file path with ``.index.sqlite``
+      appended.
+    """
+
+    def __init__(self, path, index_path=None):
+        if str(path) == STDIO or get_compression(path) is not None:
+            raise ValueError(
+                "Selecting records requires an uncompressed input file, "
+                "got {!r}".format(str(path))
+            )
+        self.path = str(path)
+        self.index_path = str(index_path or self.path + INDEX_SUFFIX)
+        self._file = open(self.path, "rb")
+        stat = os.fstat(self._file.fileno())
+        # empty files cannot be mapped
+        self._map = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ
+        ) if stat.st_size else b""
+        self._db = sqlite3.connect(self.index_path)
+        self._ensure_index(stat.st_size, stat.st_mtime_ns)
+
+    def _ensure_index(self, size, mtime_ns):
+        db = self._db
+        db.execute("CREATE TABLE IF NOT EXISTS meta (size INT, mtime_ns INT)")
+        if db.execute("SELECT size, mtime_ns FROM meta").fetchone() == \
+                (size, mtime_ns):
+            return
+        db.execute("DROP TABLE IF EXISTS lines")
+        db.execute(
+            "CREATE TABLE lines "
+            "(line INTEGER PRIMARY KEY, offset INT, dataset_id TEXT)"
+        )
+        db.executemany("INSERT INTO lines VALUES (?, ?, ?)", self._scan())
+        db.execute("CREATE INDEX lines_dataset_id ON lines (dataset_id)")
+        db.execute("DELETE FROM meta")
+        db.execute("INSERT INTO meta VALUES (?, ?)", (size, mtime_ns))
+        db.commit()
+
+    def _scan(self):
+        """Yield (line number, offset, dataset id) for each line"""
+        data = self._map
+        offset = 0
+        number = 0
+        while offset < len(data):
+            end = data.find(b"\n", offset)
+            if end < 0:
+                end = len(data)
+            line = data[offset:end]
+            if line.strip():
+                fields = peek(line, ("dataset_id",))
+                # invalid lines are indexed too, decoding will report them
+                yield number, offset, fields.get("dataset_id") if fields else None
+            offset = end + 1
+            number += 1
+
+    def _read_line(self, offset):
+        end = self._map.find(b"\n", offset)
+        return self._map[offset:end if end >= 0 else len(self._map)]
+
+    def select(self, dataset_ids=None, line_range=None):
+        """Return an iterator of lines (bytes) matching a selection
+
+        Lines are in file order. The index is queried right away, so
+        the lines can be read in another thread (e.g. by
+        :func:`.background.prefetch`); SQLite connections can only be
+        used in the thread which opened them.
+
+        Parameters
+        ----------
+        dataset_ids: list of str, optional
+          Select lines with any of these dataset ids.
+        line_range: tuple, optional
+          (start, end) line numbers, either can be None; if given
+          together with dataset ids, both need to match.
+        """
+        conditions = []
+        args = []
+        if dataset_ids:
+            # there can be more ids than query parameters allowed by SQLite
+            self._db.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS selected_ids "
+                "(dataset_id TEXT PRIMARY KEY)")
+            self._db.execute("DELETE FROM selected_ids")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO selected_ids VALUES (?)",
+                ((i,) for i in dataset_ids))
+            conditions.append(
+                "dataset_id IN (SELECT dataset_id FROM selected_ids)")
+        if line_range is not None:
+            start, end = line_range
+            if start is not None:
+                conditions.append("line >= ?")
+                args.append(start)
+            if end is not None:
+                conditions.append("line < ?")
+                args.append(end)
+        query = "SELECT offset FROM lines"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY line"
+        offsets = array(
+            "q", (offset for (offset,) in self._db.execute(query, args)))
+        return map(self._read_line, offsets)
+
+    def close(self):
+        self._db.close()
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+@contextmanager
+def open_selection(path, dataset_ids=None, line_range=None, index_path=None):
+    """Open a json lines file, yielding only the selected lines
+
+    See :meth:`LineIndex.select`, and :class:`LineIndex` for
+    ``index_path``.
+    """
+    with LineIndex(path, index_path) as index:
+        yield index.select(dataset_ids, line_range)
@@ -0,0 +1,189 @@
+"""Merging of translated records which describe the same dataset version
+
+Each translator produces one catalog record per metadata record, so a
+dataset described by several extractors ends up with several records.
+The functions here combine them into a single record per
+``(dataset_id, dataset_version)``, mimicking the merge performed by
+datalad-catalog when records are added one by one: for each key the
+first non-empty value is kept, lists are extended with new items, and
+contributing extractors are recorded in ``metadata_sources``.
+
+Grouping happens in memory; when the number of buffered records exceeds
+a limit, they are written to a sorted temporary file ("run"), and the
+runs are merged at the end (external sort).
+"""
+
+import heapq
+import json
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+# keys which identify a record and are not subject to merging
+ENVELOPE_KEYS = ("type", "dataset_id", "dataset_version")
+
+
+def get_group_key(record):
+    """Return the key by which records are grouped for merging"""
+    return (record["dataset_id"], record["dataset_version"])
+
+
+def get_sources(record):
+    """Return a list of catalog source dicts describing the record origin
+
+    Records can declare their origin either with catalog-style
+    ``metadata_sources`` or with older-style ``extractors_used``; the
+    latter is converted into the former.
+    """
+    metadata_sources = record.get("metadata_sources")
+    if metadata_sources is not None:
+        return metadata_sources.get("sources", [])
+    return [
+        {
+            "source_name": e["extractor_name"],
+            "source_version": e["extractor_version"],
+            "source_parameter": e["extraction_parameter"],
+            "source_time": e["extraction_time"],
+            "agent_email": e["agent_email"],
+            "agent_name": e["agent_name"],
+        }
+        for e in record.get("extractors_used", [])
+    ]
+
+
+def _item_key(item):
+    """Return a hashable representation of a list item"""
+    if isinstance(item, (dict, list)):
+        return json.dumps(item, sort_keys=True)
+    return item
+
+
+def merge_group(records):
+    """Merge records describing the same dataset version into one
+
+    Returns a single record with combined ``metadata_sources``. Empty
+    values are ignored; for other values, the first one encountered
+    wins, except for lists, which are extended with items not yet
+    present.
+    """
+    merged = {}
+    sources = []
+    key_source_map = {}
+    seen_items = {}  # list-valued key -> set of item keys
+
+    for record in records:
+        record_sources = get_sources(record)
+        source_names = [s["source_name"] for s in record_sources]
+        for source in record_sources:
+            if not any(
+                s["source_name"] == source["source_name"]
+                and s["source_version"] == source["source_version"]
+                for s in sources
+            ):
+                sources.append(source)
+
+        for key, value in record.items():
+            if key in ("metadata_sources", "extractors_used"):
+                continue
+            if key in ENVELOPE_KEYS:
+                merged.setdefault(key, value)
+                continue
+            if not value:
+                continue
+
+            existing = merged.get(key)
+            if not existing:
+                if isinstance(value, list):
+                    merged[key] = list(value)
+                    seen_items[key] = {_item_key(x) for x in value}
+                else:
+                    merged[key] = value
+                key_source_map[key] = list(source_names)
+            elif isinstance(existing, list) and isinstance(value, list):
+                seen = seen_items[key]
+                added = False
+                for item in value:
+                    item_key = _item_key(item)
+                    if item_key not in seen:
+                        seen.add(item_key)
+                        existing.append(item)
+                        added = True
+                if added:
+                    key_source_map[key].extend(
+                        n for n in source_names if n not in key_source_map[key]
+                    )
+
+    # name is required by the catalog schema, even if empty
+    merged.setdefault("name", "")
+    merged["metadata_sources"] = {
+        "key_source_map": key_source_map,
+        "sources": sources,
+    }
+    return merged
+
+
+def _spill(groups, tmpdir=None):
+    """Write buffered groups to a temporary file, sorted by group key"""
+    run = tempfile.TemporaryFile(mode="w+", encoding="utf-8", dir=tmpdir)
+    for key in sorted(groups):
+        for record in groups[key]:
+            run.write(json.dumps([key, record]))
+            run.write("\n")
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    for line in run:
+        key, record = json.loads(line)
+        yield tuple(key), record
+
+
+def merge_records(records, max_records=100000, tmpdir=None):
+    """Group records by dataset id and version and merge each group
+
+    Parameters
+    ----------
+    records: iterable of dict
+      Translated (catalog) records.
+    max_records: int
+      Maximum number of records buffered in memory. When exceeded,
+      buffered records are spilled to a sorted temporary file.
+    tmpdir: str, optional
+      Directory for temporary files.
+
+    Yields
+    ------
+    dict
+      Merged records; in order of first appearance if everything fit
+      in memory, otherwise sorted by dataset id and version.
+    """
+    groups = {}
+    n_buffered = 0
+    runs = []
+
+    try:
+        for record in records:
+            groups.setdefault(get_group_key(record), []).append(record)
+            n_buffered += 1
+            if n_buffered >= max_records:
+                runs.append(_spill(groups, tmpdir))
+                groups = {}
+                n_buffered = 0
+
+        if not runs:
+            for group in groups.values():
+                yield merge_group(group)
+            return
+
+        in_memory = (
+            (key, record) for key in sorted(groups) for record in groups[key]
+        )
+        streams = [_read_run(run) for run in runs] + [in_memory]
+        for _, items in groupby(
+            heapq.merge(*streams, key=itemgetter(0)), key=itemgetter(0)
+        ):
+            yield merge_group(record for _, record in items)
+    finally:
+        for run in runs:
+            run.close()
@@ -0,0 +1,243 @@
+"""Translation in worker processes, in batches sized by the records
+
+Batches are collected as they finish, and written in input order.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+import os
+import time
+
+from .encoder import FragmentEncoder
+from .peek import filter_lines
+
+MIN_BATCH_SIZE = 64 * 1024
+MAX_BATCH_SIZE = 16 * 1024 * 1024
+TARGET_BATCH_TIME = 0.2
+# translated batches waiting to be written, in bytes, before no more are sent
+MAX_BUFFERED = 256 * 1024 * 1024
+
+# per-process state of workers, set up by _init_worker
+_worker = None
+
+
+class _Worker:
+    __slots__ = (
+        "selector", "index", "cache", "batch_size", "engines", "encode")
+
+
+def _init_worker(selector, dedup_publications, cache_translations,
+                 batch_size, engines):
+    global _worker
+    # imported here, as the translation module uses this one
+    from .translation import open_publication_index, open_translation_cache
+    _worker = _Worker()
+    _worker.selector = selector
+    _worker.index = open_publication_index(None, dedup_publications)
+    _worker.cache = open_translation_cache(None, cache_translations)
+    _worker.batch_size = batch_size
+    _worker.engines = engines
+    _worker.encode = FragmentEncoder().encode
+
+
+def _translate_batch(lines):
+    """Translate a batch of json lines in a worker
+
+    Returns the translated records as json lines, and the worker's
+    process id and time spent.
+    """
+    from jsonlines import InvalidLineError
+    from .translation import translate_lines
+    start = time.perf_counter()
+    encode = _worker.encode
+    try:
+        translated = b"".join(
+            encode(record) + b"\n"
+            for record in translate_lines(
+                lines, _worker.selector, _worker.index, _worker.batch_size,
+                _worker.cache, _worker.engines, shared=True)
+        )
+    except InvalidLineError as e:
+        # jsonlines errors cannot be passed back to the main process
+        raise ValueError(str(e)) from None
+    return translated, os.getpid(), time.perf_counter() - start
+
+
+class BatchScheduler:
+    """Cut json lines into batches of adaptive size, collect worker stats
+
+    Parameters
+    ----------
+    target_time: float
+      Seconds a batch should take to translate.
+    min_size, max_size: int
+      Bounds of the target batch size, in bytes.
+    """
+
+    def __init__(self, target_time=TARGET_BATCH_TIME,
+                 min_size=MIN_BATCH_SIZE, max_size=MAX_BATCH_SIZE):
+        self.target_time = target_time
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_size = min_size
+        self.workers = {}  # process id -> stats
+        self._bytes = 0
+        self._busy = 0.0
+
+    def batches(self, lines):
+        """Yield lists of lines, of about the current target size each"""
+        batch = []
+        size = 0
+        for line in lines:
+            if len(line) >= self.target_size:
+                # a large record on its own, not holding back the others
+                if batch:
+                    yield batch
+                    batch = []
+                    size = 0
+                yield [line]
+                continue
+            batch.append(line)
+            size += len(line)
+            if size >= self.target_size:
+                yield batch
+                batch = []
+                size = 0
+        if batch:
+            yield batch
+
+    def record(self, pid, lines, seconds):
+        """Account for a batch translated by a worker
+
+        Updates the target size from the throughput seen so far.
+        """
+        size = sum(map(len, lines))
+        stats = self.workers.get(pid)
+        if stats is None:
+            stats = self.workers[pid] = {
+                "worker": len(self.workers),
+                "batches": 0,
+                "records": 0,
+                "bytes": 0,
+                "busy_time": 0.0,
+            }
+        stats["batches"] += 1
+        stats["records"] += len(lines)
+        stats["bytes"] += size
+        stats["busy_time"] += seconds
+        self._bytes += size
+        self._busy += seconds
+        if self._busy > 0:
+            rate = self._bytes / self._busy
+            self.target_size = int(min(
+                self.max_size,
+                max(self.min_size, rate * self.target_time)))
+
+    def get_stats(self, wall_time):
+        """Return stats of each worker, with utilisation over wall_time"""
+        return [
+            dict(stats, utilisation=stats["busy_time"] / wall_time
+                 if wall_time else 0.0)
+            for stats in sorted(
+                self.workers.values(), key=lambda s: s["worker"])
+        ]
+
+
+def translate_parallel(lines, fout, jobs, selector, dedup_publications=False,
+                       cache_translations=False, batch_size=1000,
+                       engines=None, flush=False, scheduler=None):
+    """Translate json lines in worker processes, writing json lines
+
+    Parameters
+    ----------
+    lines: iterable of bytes
+      Json lines with metadata records.
+    fout: binary file
+      Translated records are written here, in input order.
+    jobs: int
+      Number of worker processes.
+    selector: RecordSelector
+      Records to translate.
+    dedup_publications, cache_translations: bool
+      Use an in-memory publication index or translation cache in each
+      worker.
+    batch_size, engines:
+      See :func:`.translation.translate_records`.
+    flush: bool
+      Flush fout after each batch.
+    scheduler: BatchScheduler, optional
+      Decides batch sizes, and collects stats.
+
+    Returns
+    -------
+    list of dict
+      Stats of each worker: batches, records and bytes translated, time
+      spent translating (busy_time) and its share of the wall time
+      (utilisation).
+    """
+    if scheduler is None:
+        scheduler = BatchScheduler()
+    start = time.perf_counter()
+    # workers are started fresh: forking a process with running threads
+    # (e.g. reading input in the background) is unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+            jobs,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(selector, dedup_publications, cache_translations,
+                      batch_size, engines),
+    ) as executor:
+        _run_batches(
+            executor,
+            scheduler.batches(filter_lines(lines, selector.keys, selector)),
+            _translate_batch, scheduler, fout, 2 * jobs, flush)
+    return scheduler.get_stats(time.perf_counter() - start)
+
+
+def _run_batches(executor, batches, translate, scheduler, fout, max_running,
+                 flush=False, max_buffered=MAX_BUFFERED):
+    """Translate batches with an executor, writing results in input order
+
+    At most ``max_running`` batches are submitted but not finished, and
+    no more are submitted while finished batches waiting for an earlier
+    one hold ``max_buffered`` bytes or more.
+    """
+    batches = iter(batches)
+    running = {}  # future -> (position, batch)
+    finished = {}  # position -> translated json lines
+    buffered = 0
+    submitted = 0
+    written = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(running) < max_running \
+                    and buffered < max_buffered:
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                    break
+                running[executor.submit(translate, batch)] = (
+                    submitted, batch)
+                submitted += 1
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                position, batch = running.pop(future)
+                translated, worker, seconds = future.result()
+                scheduler.record(worker, batch, seconds)
+                finished[position] = translated
+                buffered += len(translated)
+            while written in finished:
+                translated = finished.pop(written)
+                buffered -= len(translated)
+                fout.write(translated)
+                if flush:
+                    fout.flush()
+                written += 1
+    except BaseException:
+        for future in running:
+            future.cancel()
+        raise
@@ -0,0 +1,151 @@
+"""Cheap access to top-level fields of raw (undecoded) json lines
+
+Metadata records can be large, mostly because of ``extracted_metadata``,
+while decisions about what to do with a record (which shard it belongs
+to, whether it can be translated) only need a few small top-level
+fields, such as ``dataset_id`` or ``extractor_name``. Metalad writes
+these before ``extracted_metadata``.
+
+:func:`peek` first tries to decode everything before the top-level
+``extracted_metadata`` key as a json object on its own. If that is not
+possible (different key order), it walks the top-level object key by
+key and stops as soon as all requested keys were seen, starting with a
+short prefix of the line and looking at a longer one only if that was
+not enough. Either way, the rest of the line is never decoded.
+:func:`filter_lines` builds on it to select lines based on their
+top-level fields.
+"""
+
+import json
+from json.decoder import scanstring
+import re
+
+_scan_once = json.JSONDecoder().scan_once
+_WS = re.compile(r"[ \t\n\r]*")
+
+# size of the first chunk (in bytes) looked at, grows 4x on each attempt
+PREFIX_SIZE = 2048
+
+_LARGE_KEY = b'"extracted_metadata"'
+
+
+def _decode_head(line):
+    """Decode all top-level fields preceding extracted_metadata
+
+    Returns None if extracted_metadata is not found as a top-level key.
+    """
+    cut = line.find(_LARGE_KEY)
+    if cut < 0:
+        return None
+    head = line[:cut].rstrip()
+    if head.endswith(b","):
+        head = head[:-1]
+    try:
+        # only valid if the cut happened at top-level, outside of strings
+        fields = json.loads(head + b"}")
+    except ValueError:
+        return None
+    return fields if isinstance(fields, dict) else None
+
+
+def _scan_top_level(s, keys):
+    """Return values of requested keys from a json object string
+
+    Raises ValueError or StopIteration if ``s`` is not (the beginning of)
+    a json object, or if it ends before all keys were found.
+    """
+    found = {}
+    idx = _WS.match(s, 0).end()
+    if s[idx:idx + 1] != "{":
+        raise ValueError("not a json object")
+    idx = _WS.match(s, idx + 1).end()
+    if s[idx:idx + 1] == "}":
+        return found
+    while True:
+        if s[idx:idx + 1] != '"':
+            raise ValueError("expected a key")
+        key, idx = scanstring(s, idx + 1)
+        idx = _WS.match(s, idx).end()
+        if s[idx:idx + 1] != ":":
+            raise ValueError("expected a colon")
+        value, idx = _scan_once(s, _WS.match(s, idx + 1).end())
+        idx = _WS.match(s, idx).end()
+        # a value is only complete if followed by a delimiter
+        delimiter = s[idx:idx + 1]
+        if delimiter not in (",", "}"):
+            raise ValueError("expected a delimiter")
+        if key in keys:
+            found[key] = value
+            if len(found) == len(keys):
+                return found
+        if delimiter == "}":
+            return found
+        idx = _WS.match(s, idx + 1).end()
+
+
+def peek(line, keys):
+    """Get values of top-level keys from a json line without decoding it all
+
+    Parameters
+    ----------
+    line: bytes
+      A single line, containing a json object.
+    keys: collection of str
+      Top-level keys to look up.
+
+    Returns
+    -------
+    dict or None
+      Values of the requested keys which are present in the object, or
+      None if the line could not be scanned (e.g. is not valid json); the
+      caller should then fall back to regular decoding.
+    """
+    if isinstance(line, bytes):
+        head = _decode_head(line)
+        if head is not None and all(k in head for k in keys):
+            return {k: head[k] for k in keys}
+
+    size = PREFIX_SIZE
+    while True:
+        complete = size >= len(line)
+        if complete:
+            s = line.decode("utf-8") if isinstance(line, bytes) else line
+        else:
+            # a multi-byte character may be cut at the end, drop it
+            s = line[:size].decode("utf-8", "ignore") \
+                if isinstance(line, bytes) else line[:size]
+        try:
+            return _scan_top_level(s, keys)
+        except (ValueError, StopIteration):
+            if complete:
+                return None
+        size *= 4
+
+
+def filter_lines(lines, keys, predicate):
+    """Yield lines whose top-level fields satisfy a predicate
+
+    Parameters
+    ----------
+    lines: iterable of bytes
+      Json lines.
+    keys: collection of str
+      Top-level keys passed to the predicate.
+    predicate: callable
+      Called with a dict of values of ``keys`` (missing keys are left
+      out); lines for which it returns False are dropped.
+
+    Lines which are not valid json are passed through, so that decoding
+    errors are reported by the reader. If some keys are not among the
+    leading fields, the line is decoded in full to look for them.
+    """
+    for line in lines:
+        fields = peek(line, keys)
+        if fields is None:
+            yield line
+            continue
+        if len(fields) < len(keys):
+            record = json.loads(line)
+            fields = {k: record[k] for k in keys if k in record}
+        if predicate(fields):
+            yield line
@@ -0,0 +1,196 @@
+"""Translation server, keeping translators warm between requests
+
+Starting ``datalad wacky-translate`` for a handful of records costs far
+more than translating them: DataLad and the extension are imported,
+translators set up and jq programs compiled anew each time.
+``datalad wacky-translate --serve SOCKET`` instead starts a server
+listening on a local Unix socket, which does all of that once, and then
+translates records sent to it by clients.
+
+The protocol is plain json lines: a client connects, sends metadata
+records (one per line), and closes its side of the connection for
+writing; the server sends back translated records as they are ready, and
+closes the connection. If translation fails, the last line sent is an
+object with a single ``__error__`` key, holding the error message.
+Clients are served one at a time, so translators and caches are never
+used by several threads. Only the user running the server can connect
+to the socket.
+
+A client using only the standard library is available as::
+
+    python -m datalad_wackyextra.server SOCKET [INFILE [OUTFILE]]
+
+which reads records from INFILE (default: stdin) and writes translated
+records to OUTFILE (default: stdout).
+"""
+
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import stat
+import threading
+
+from .encoder import FragmentEncoder
+
+lgr = logging.getLogger('datalad.wackyextra.server')
+
+ERROR_KEY = "__error__"
+
+
+class TranslationError(Exception):
+    """Translation failed on the server"""
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # translated records are small, do not send each on its own
+    wbufsize = 65536
+
+    def handle(self):
+        encode = FragmentEncoder().encode
+        try:
+            for translated in self.server.translate(self.rfile):
+                self.wfile.write(encode(translated) + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            lgr.debug("Client went away")
+        except Exception as e:
+            lgr.warning("Translation failed: %s", e)
+            lgr.debug("Translation failed", exc_info=True)
+            self.wfile.write(
+                json.dumps({ERROR_KEY: str(e)}).encode("utf-8") + b"\n")
+
+
+class TranslationServer(socketserver.UnixStreamServer):
+    """Unix socket server translating json lines sent by clients
+
+    Parameters
+    ----------
+    socket_path: str
+      Path of the socket; a stale socket left there is replaced.
+    translate: callable
+      Called with an iterable of json lines (bytes) sent by a client,
+      returns an iterable of translated records.
+    """
+
+    def __init__(self, socket_path, translate):
+        self.translate = translate
+        _remove_stale_socket(socket_path)
+        super().__init__(str(socket_path), _Handler)
+
+    def server_bind(self):
+        super().server_bind()
+        # before listening, so that nobody else can connect in between
+        os.chmod(self.server_address, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path):
+    """Remove a socket file if no server is listening on it"""
+    try:
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            return  # not ours, let bind report it
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise OSError("A server is already listening on {}".format(socket_path))
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(socket_path, translate):
+    """Serve translation requests on a Unix socket, until interrupted
+
+    The server stops on SIGINT (Ctrl-C) or SIGTERM, removing the socket.
+    Signal handlers can only be set in the main thread; in other threads,
+    SIGTERM is left to its current handler. See
+    :class:`TranslationServer` for the parameters.
+    """
+    handle_sigterm = threading.current_thread() is threading.main_thread()
+    with TranslationServer(socket_path, translate) as server:
+        lgr.info("Serving translation requests on %s", socket_path)
+        if handle_sigterm:
+            previous = signal.signal(signal.SIGTERM, _interrupt)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            lgr.info("Stopping translation server")
+        finally:
+            if handle_sigterm:
+                signal.signal(signal.SIGTERM, previous)
+
+
+def translate_remote(socket_path, fin, fout):
+    """Translate records using a server
+
+    Parameters
+    ----------
+    socket_path: str
+      Socket on which the server listens.
+    fin: binary file
+      Json lines with metadata records, sent to the server.
+    fout: binary file
+      Translated records received from the server are written here.
+
+    Raises TranslationError if translation failed on the server; records
+    translated until then are written.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+
+        def send():
+            # the server answers while we are sending, so send from
+            # another thread to avoid both sides waiting on full buffers
+            try:
+                with sock.makefile("wb") as wfile:
+                    shutil.copyfileobj(fin, wfile)
+                sock.shutdown(socket.SHUT_WR)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the server stopped reading, the reply will tell why
+
+        sender = threading.Thread(target=send, daemon=True)
+        sender.start()
+        error_prefix = '{{"{}": '.format(ERROR_KEY).encode("utf-8")
+        with sock.makefile("rb") as rfile:
+            for line in rfile:
+                if line.startswith(error_prefix):
+                    raise TranslationError(json.loads(line)[ERROR_KEY])
+                fout.write(line)
+        sender.join()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if not 2 <= len(sys.argv) <= 4:
+        sys.exit(
+            "usage: python -m datalad_wackyextra.server "
+            "SOCKET [INFILE [OUTFILE]]"
+        )
+    from .streams import open_input, open_output
+
+    infile = sys.argv[2] if len(sys.argv) > 2 else "-"
+    outfile = sys.argv[3] if len(sys.argv) > 3 else "-"
+    try:
+        with open_input(infile) as fin, open_output(outfile) as fout:
+            translate_remote(sys.argv[1], fin, fout)
+    except BrokenPipeError:
+        # the reading end of the output pipe went away (e.g. `head`)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (OSError, TranslationError) as e:
+        sys.exit("Translation failed: {}".format(e))
@@ -0,0 +1,78 @@
+"""Splitting translation of a large input across several independent runs
+
+A shard is given as ``i/N``: the input is split into ``N`` shards,
+numbered from 0, and only records from shard ``i`` are selected. Records
+are assigned to shards by a hash of their ``dataset_id``, so all records
+of a dataset end up in the same shard (which keeps merging possible),
+and the assignment does not depend on the machine or Python process.
+
+Only the ``dataset_id`` is read from each line (see :mod:`.peek`),
+lines from other shards are never decoded.
+
+Outputs of all shards can be combined with :func:`concatenate_shards`,
+also available as::
+
+    python -m datalad_wackyextra.sharding OUTFILE SHARDFILE [SHARDFILE ...]
+"""
+
+import shutil
+import zlib
+
+from .peek import filter_lines
+from .streams import open_input, open_output
+
+
+def parse_shard(spec):
+    """Parse a shard specification ``i/N`` into a tuple of ints
+
+    Raises ValueError if the specification is malformed or out of range.
+    """
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(
+            "Shard must be given as i/N, e.g. 0/4, got {!r}".format(spec)
+        )
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(
+            "Shard index must be between 0 and {}, got {!r}".format(
+                count - 1, spec)
+        )
+    return index, count
+
+
+def get_shard(dataset_id, count):
+    """Return the shard (0 to count-1) to which a dataset belongs"""
+    return zlib.crc32(dataset_id.encode("utf-8")) % count
+
+
+def select_shard(lines, index, count):
+    """Yield only those lines which belong to the given shard"""
+    return filter_lines(
+        lines,
+        ("dataset_id",),
+        lambda fields: get_shard(fields.get("dataset_id") or "", count) == index,
+    )
+
+
+def concatenate_shards(shard_files, outfile, compression_level=None):
+    """Append contents of shard output files to a single output file
+
+    Compression of each file is determined by its suffix, so shards and
+    output need not be compressed the same way.
+    """
+    with open_output(outfile, compression_level) as fout:
+        for shard_file in shard_files:
+            with open_input(shard_file) as fin:
+                shutil.copyfileobj(fin, fout)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        sys.exit(
+            "usage: python -m datalad_wackyextra.sharding "
+            "OUTFILE SHARDFILE [SHARDFILE ...]"
+        )
+    concatenate_shards(sys.argv[2:], sys.argv[1])
@@ -0,0 +1,104 @@
+"""Opening of (optionally compressed) input and output files
+
+Compression is chosen by file name suffix: ``.gz`` (gzip), ``.xz``
+(xz / lzma) and ``.zst`` or ``.zstd`` (Zstandard, requires the
+``zstandard`` package). Anything else is treated as uncompressed.
+Files are opened in binary mode; data is (de)compressed while it is
+streamed, never in full.
+
+The special path ``-`` stands for standard input or output, which are
+never compressed, and are not closed together with the returned file
+object.
+"""
+
+import gzip
+import io
+import lzma
+from pathlib import Path
+import sys
+
+STDIO = "-"
+
+ZSTD_SUFFIXES = (".zst", ".zstd")
+
+
+def get_compression(path):
+    """Return compression name (gzip, xz, zstd) for path, or None"""
+    if str(path) == STDIO:
+        return None
+    suffix = Path(path).suffix.lower()
+    if suffix == ".gz":
+        return "gzip"
+    elif suffix == ".xz":
+        return "xz"
+    elif suffix in ZSTD_SUFFIXES:
+        return "zstd"
+    return None
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "Reading or writing .zst files requires the zstandard package "
+            "(pip install zstandard)"
+        ) from e
+    return zstandard
+
+
+def open_input(path):
+    """Open a file for reading, decompressing if needed
+
+    Returns a binary file object, which can be iterated over lines.
+    """
+    if str(path) == STDIO:
+        return open(sys.stdin.fileno(), "rb", closefd=False)
+    compression = get_compression(path)
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    elif compression == "xz":
+        return lzma.open(path, "rb")
+    elif compression == "zstd":
+        zstandard = _import_zstandard()
+        fh = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            fh, read_across_frames=True, closefd=True,
+        )
+        return io.BufferedReader(reader)
+    return open(path, "rb")
+
+
+def open_output(path, compression_level=None):
+    """Open a file for appending, compressing if needed
+
+    Appending to a compressed file adds a new gzip member, xz stream
+    or zstd frame, respectively; all of them are read back as one
+    contiguous stream.
+
+    Parameters
+    ----------
+    path: str or Path
+      Output file path; suffix determines compression.
+    compression_level: int, optional
+      Compression level, with the meaning and range of the respective
+      format (gzip: 1-9, xz: 0-9, zstd: 1-22). Library default if None.
+    """
+    if str(path) == STDIO:
+        # anything already written through sys.stdout must come first
+        sys.stdout.flush()
+        return open(sys.stdout.fileno(), "wb", closefd=False)
+    compression = get_compression(path)
+    if compression == "gzip":
+        level = 9 if compression_level is None else compression_level
+        return gzip.open(path, "ab", compresslevel=level)
+    elif compression == "xz":
+        return lzma.open(path, "ab", preset=compression_level)
+    elif compression == "zstd":
+        zstandard = _import_zstandard()
+        level = 3 if compression_level is None else compression_level
+        # threads=-1: use as many compression threads as there are cpus
+        compressor = zstandard.ZstdCompressor(level=level, threads=-1)
+        fh = open(path, "ab")
+        return compressor.stream_writer(fh, closefd=True)
+    return open(path, "ab")
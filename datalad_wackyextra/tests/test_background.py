@@ -0,0 +1,126 @@
+from contextlib import nullcontext
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from datalad_wackyextra.background import (
+    BackgroundWriter,
+    prefetch,
+    write_behind,
+)
+
+LINES = [b"line %d\n" % i for i in range(1000)]
+
+
+@pytest.mark.parametrize("depth", [0, 1, 8])
+def test_prefetch(depth):
+    with prefetch(nullcontext(LINES), depth, chunk_size=100) as lines:
+        assert list(lines) == LINES
+
+
+def test_prefetch_error():
+    def failing():
+        yield from LINES[:10]
+        raise OSError("read failed")
+
+    with prefetch(nullcontext(failing()), 2, chunk_size=10) as lines:
+        assert next(lines) == LINES[0]
+        with pytest.raises(OSError, match="read failed"):
+            list(lines)
+
+
+def test_prefetch_stops_reading():
+    read = []
+
+    def lines():
+        for line in LINES:
+            read.append(line)
+            yield line
+
+    with prefetch(nullcontext(lines()), 1, chunk_size=10) as prefetched:
+        next(prefetched)
+    # the reader stopped with a full queue, instead of reading everything
+    assert len(read) < len(LINES)
+
+
+def test_prefetch_abandons_blocked_reader():
+    rfd, wfd = os.pipe()
+    os.write(wfd, b"line\n")
+    fin = open(rfd, "rb")
+    start = time.monotonic()
+    with pytest.raises(RuntimeError):
+        with prefetch(fin, 1, chunk_size=1) as lines:
+            next(lines)
+            # the reader is now blocked, waiting for more input
+            raise RuntimeError("translation failed")
+    assert time.monotonic() - start < 5
+    # the reader stops, closing the source, once the read returns
+    os.close(wfd)
+    for thread in threading.enumerate():
+        if thread.name == "wackyextra-reader":
+            thread.join()
+    assert fin.closed
+
+
+@pytest.mark.parametrize("depth", [0, 1, 8])
+def test_write_behind(depth):
+    out = io.BytesIO()
+    with write_behind(out, depth, chunk_size=100) as fout:
+        for line in LINES:
+            fout.write(line)
+    assert out.getvalue() == b"".join(LINES)
+
+
+def test_background_writer_flush():
+    class Raw(io.BytesIO):
+        flushed = b""
+
+        def flush(self):
+            self.flushed = self.getvalue()
+
+    out = Raw()
+    with BackgroundWriter(out, 2) as fout:
+        fout.write(b"abc\n")
+        fout.flush()
+        fout.write(b"def\n")
+    assert out.flushed == b"abc\ndef\n"
+
+
+def test_background_writer_error():
+    class Broken(io.RawIOBase):
+        def writable(self):
+            return True
+
+        def write(self, b):
+            raise BrokenPipeError
+
+    with pytest.raises(BrokenPipeError):
+        with BackgroundWriter(Broken(), 1, chunk_size=10) as fout:
+            for line in LINES:
+                fout.write(line)
+
+
+def test_background_writer_error_persists():
+    class Broken(io.RawIOBase):
+        def writable(self):
+            return True
+
+        def write(self, b):
+            raise BrokenPipeError
+
+    fout = BackgroundWriter(Broken(), 1)
+    fout.write(LINES[0])
+    fout.flush()
+    while fout._error is None:
+        time.sleep(0.01)
+    # nothing written after the error goes unnoticed
+    for _ in range(2):
+        with pytest.raises(BrokenPipeError):
+            fout.write(LINES[1])
+        with pytest.raises(BrokenPipeError):
+            fout.flush()
+    with pytest.raises(BrokenPipeError):
+        fout.close()
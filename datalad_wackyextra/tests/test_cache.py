@@ -0,0 +1,56 @@
+import json
+
+from datalad_wackyextra.translation import translate_record
+from datalad_wackyextra.translators.cache import (
+    SQLiteTranslationCache, TranslationCache, get_content_key
+)
+
+
+def _record(version, title="Data", extractor_name="we_cff"):
+    return {
+        "type": "dataset",
+        "dataset_id": "ds",
+        "dataset_version": version,
+        "extractor_name": extractor_name,
+        "extractor_version": "0.0.1",
+        "extraction_parameter": {},
+        "extraction_time": float(len(version)),
+        "agent_name": "A",
+        "agent_email": "a@example.com",
+        "extracted_metadata": {
+            "title": title,
+            "license": "MIT",
+            "authors": [{"given-names": "Jane", "family-names": "Doe"}],
+        },
+    }
+
+
+def test_content_key():
+    assert get_content_key(_record("a")) == get_content_key(_record("b"))
+    assert get_content_key(_record("a")) != \
+        get_content_key(_record("a", "Other"))
+    assert get_content_key(_record("a"), "1.0") != \
+        get_content_key(_record("a"), "2.0")
+
+
+def test_translation_cache(tmp_path):
+    for make_cache in (TranslationCache,
+                       lambda: SQLiteTranslationCache(tmp_path / "t.db")):
+        # second time around, the database is reused
+        for _ in range(2):
+            cache = make_cache()
+            for version in ("a", "bb", "ccc"):
+                record = _record(version)
+                translated = translate_record(record, translation_cache=cache)
+                # same content (including key order) as without the cache
+                assert json.dumps(translated) == \
+                    json.dumps(translate_record(record))
+            assert translate_record(_record("a", "Other"), None, cache)[
+                "name"] == "Other"
+            cache.close()
+
+
+def test_not_cached():
+    cache = TranslationCache()
+    # we_ris translations are not cached
+    assert cache.get_key(_record("a", extractor_name="we_ris")) is None
@@ -0,0 +1,119 @@
+from datalad_wackyextra.translators.cff import CffTranslator
+
+
+def make_record(extracted_metadata):
+    return {
+        "type": "dataset",
+        "dataset_id": "0bd5fa8c-0000-0000-0000-000000000000",
+        "dataset_version": "abc",
+        "extractor_name": "we_cff",
+        "extractor_version": "0.0.1",
+        "extraction_parameter": {},
+        "extraction_time": 1.0,
+        "agent_name": "A",
+        "agent_email": "a@example.com",
+        "extracted_metadata": extracted_metadata,
+    }
+
+
+def test_translate():
+    record = make_record({
+        "title": "Data",
+        "doi": "10.1000/XYZ",
+        "license": "MIT",
+        "authors": [{
+            "given-names": "Jane",
+            "family-names": "Doe",
+            "name-particle": "van",
+            "orcid": "https://orcid.org/0000-0000-0000-0001",
+        }],
+    })
+    translated = CffTranslator().translate(record)
+    assert translated["doi"] == "https://doi.org/10.1000/xyz"
+    assert translated["authors"] == [{
+        "givenName": "Jane",
+        "familyName": "van Doe",
+        "identifiers": [{"type": "ORCID", "identifier": "0000-0000-0000-0001"}],
+    }]
+    assert "publications" not in translated
+    sources = translated["metadata_sources"]["sources"]
+    assert sources[0]["source_name"] == "we_cff"
+
+
+def test_references():
+    record = make_record({
+        "title": "Data",
+        "authors": [{"name": "Lab"}],
+        "references": [
+            {
+                "type": "article",
+                "title": "Paper",
+                "authors": [{"given-names": "J", "family-names": "Doe"}],
+                "identifiers": [{"type": "doi", "value": "doi:10.1000/P"}],
+                "year": 2020,
+                "journal": "Journal",
+            },
+            {
+                "type": "proceedings",
+                "title": "Talk",
+                "authors": [{"name": "Lab"}],
+                "date-published": "2021-05-01",
+                "conference": {"name": "Conf"},
+            },
+        ],
+    })
+    publications = CffTranslator().translate(record)["publications"]
+    assert publications == [
+        {
+            "type": "Journal Article",
+            "title": "Paper",
+            "doi": "https://doi.org/10.1000/p",
+            "datePublished": 2020,
+            "authors": [{"givenName": "J", "familyName": "Doe"}],
+            "publicationOutlet": "Journal",
+        },
+        {
+            "type": "Other (proceedings)",
+            "title": "Talk",
+            "doi": "",
+            "datePublished": "2021",
+            "authors": [{"name": "Lab"}],
+            "publicationOutlet": "Conf",
+        },
+    ]
+
+
+def test_translator_main():
+    from datalad_wackyextra.translators.cff_translator import CFFTranslatorMain
+
+    record = make_record({
+        "title": "Data",
+        "doi": "10.1000/XYZ",
+        "authors": [{"name": "Lab"}],
+    })
+    translator = CFFTranslatorMain(record)
+    assert translator.translate() == CffTranslator().translate(record)
+    assert translator.get_name() == "Data"
+    assert translator.get_doi() == "https://doi.org/10.1000/xyz"
+
+
+def test_metadata_sources():
+    from datalad_wackyextra.translators.cff_translator import CFFTranslator
+
+    record = make_record({"title": "Data", "authors": [{"name": "Lab"}]})
+    # provenance in the catalog schema, replacing extractors_used
+    expected = {
+        "key_source_map": {},
+        "sources": [{
+            "source_name": "we_cff",
+            "source_version": "0.0.1",
+            "source_parameter": {},
+            "source_time": 1.0,
+            "agent_email": "a@example.com",
+            "agent_name": "A",
+        }],
+    }
+    for translated in (CffTranslator().translate(record),
+                       CFFTranslator().translate(record)):
+        assert translated["metadata_sources"] == expected
+        assert "extractors_used" not in translated
@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+
+from datalad_wackyextra.cli import main
+from datalad_wackyextra.translation import translate_record
+
+
+def _record(i):
+    return {
+        "type": "dataset",
+        "dataset_id": "ds{}".format(i),
+        "dataset_version": "0" * 40,
+        "extractor_name": "datacite_gin",
+        "extractor_version": "0.1",
+        "extraction_parameter": {},
+        "extraction_time": 1670000000.0,
+        "agent_name": "Jane",
+        "agent_email": "jane@example.com",
+        "extracted_metadata": {
+            "title": "Dataset {}".format(i),
+            "description": "",
+            "authors": [{"firstName": "Jane", "lastName": "Doe"}],
+            "keywords": ["k"],
+            "license": {"name": "CC0", "url": "https://example.com"},
+            "funding": ["Agency"],
+        },
+    }
+
+
+def test_main(tmp_path):
+    records = [_record(i) for i in range(5)]
+    infile = tmp_path / "in.jsonl"
+    infile.write_text("".join(json.dumps(r) + "\n" for r in records))
+    outfile = tmp_path / "out.jsonl"
+    main(["-i", str(infile), "-o", str(outfile), "--shard", "0/1"])
+    translated = [json.loads(line) for line in outfile.read_text().splitlines()]
+    assert translated == [translate_record(r) for r in records]
+
+
+def test_no_datalad_import():
+    # the point of the standalone command
+    subprocess.run(
+        [sys.executable, "-c",
+         "import sys, datalad_wackyextra.cli; "
+         "assert 'datalad' not in sys.modules"],
+        check=True,
+    )
@@ -0,0 +1,25 @@
+import pytest
+
+from datalad_wackyextra.translators.doi import get_doi_url, normalise_doi
+
+
+@pytest.mark.parametrize("value", [
+    "10.1000/ABC",
+    "doi:10.1000/abc",
+    "DOI: 10.1000/abc",
+    "http://dx.doi.org/10.1000/abc",
+    "https://doi.org/10.1000%2Fabc",
+])
+def test_normalise_doi(value):
+    assert normalise_doi(value) == "10.1000/abc"
+    assert get_doi_url(value) == "https://doi.org/10.1000/abc"
+
+
+def test_not_a_doi():
+    assert normalise_doi("arXiv:2101.00001") is None
+    assert get_doi_url("https://example.com/paper") == "https://example.com/paper"
+    assert get_doi_url(None) is None
+
+
+def test_interned():
+    assert get_doi_url("10.1000/X") is get_doi_url("doi:10.1000/x")
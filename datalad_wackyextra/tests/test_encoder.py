@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from datalad_wackyextra.encoder import FragmentEncoder
+
+shared = {"name": "Zoë", "identifiers": [{"type": "ORCID", "identifier": "0"}]}
+
+
+@pytest.mark.parametrize("record", [
+    {"type": "dataset", "name": "", "authors": [shared, shared], "n": 1.5},
+    {"license": shared, "keywords": ["a", "ü"], "x": None, "y": [[shared]]},
+    {"mixed": [shared, 1, "s"], "empty": [], "nested": {"a": {"b": shared}}},
+    {1: "non-string key", "a": shared},
+    [shared, "not a record"],
+    "not a record",
+])
+def test_same_as_default(record):
+    encoder = FragmentEncoder(max_fragments=2)
+    expected = json.JSONEncoder(ensure_ascii=False).encode(record)
+    for _ in range(3):
+        assert encoder.encode(record) == expected.encode("utf-8")
+
+
+def test_unserialisable():
+    with pytest.raises(TypeError):
+        FragmentEncoder().encode({"a": object()})
@@ -0,0 +1,197 @@
+"""Native implementations of jq-based translators, on realistic records"""
+
+import pytest
+
+from datalad_wackyextra.translation import (
+    get_batch_translator,
+    translate_records,
+)
+from datalad_wackyextra.translators.engines import EngineSelection
+from datalad_wackyextra.translators.jqbatch import benchmark
+
+VERSION = "0" * 39 + "1"
+
+
+def _record(extractor_name, extracted_metadata, record_type="dataset"):
+    return {
+        "type": record_type,
+        "dataset_id": "5df8eb3a-95c5-11ea-b4b9-a0369f287950",
+        "dataset_version": VERSION,
+        "extractor_name": extractor_name,
+        "extractor_version": "0.0.1",
+        "extraction_parameter": {},
+        "extraction_time": 1670000000.0,
+        "agent_name": "Jane",
+        "agent_email": "jane@example.com",
+        "extracted_metadata": extracted_metadata,
+    }
+
+
+CORE = [
+    _record("metalad_core", {
+        "@context": {"@vocab": "http://schema.org/"},
+        "@graph": [
+            {"@id": "a1", "@type": "agent", "name": "Jane Doe",
+             "email": "jane@example.com"},
+            {"@id": "a2", "@type": "agent", "name": "John Roe",
+             "email": "john@example.com"},
+            {
+                "@id": VERSION,
+                "@type": "Dataset",
+                "identifier": "datalad:5df8eb3a-95c5-11ea-b4b9-a0369f287950",
+                "version": VERSION,
+                "dateCreated": "2020-05-14T12:00:00+02:00",
+                "dateModified": "2022-11-02T09:30:00+01:00",
+                "distribution": [
+                    {"url": "https://github.com/example/ds"},
+                    {"url": "https://gin.g-node.org/example/ds"},
+                    {"name": "origin"},
+                ],
+                "hasPart": [
+                    {
+                        "@id": "datalad:" + "a" * 40,
+                        "@type": "Dataset",
+                        "identifier": "datalad:sub-{}".format(i),
+                        "name": "sub{}".format(i),
+                    }
+                    for i in range(50)
+                ],
+            },
+        ],
+    }),
+    # no agents, no distributions, no subdatasets
+    _record("metalad_core", {"@graph": [
+        {"@id": VERSION, "@type": "Dataset", "version": VERSION},
+    ]}),
+    # unexpected shapes
+    _record("metalad_core", {"@graph": [
+        {"@id": VERSION, "@type": "Dataset", "distribution": {"url": "x"},
+         "hasPart": "none"},
+        {"@type": "agent"},
+    ]}),
+]
+
+MINIMETA = [
+    _record("metalad_studyminimeta", {
+        "@context": {"@vocab": "http://schema.org/"},
+        "@graph": [
+            {"@id": "#study", "@type": "CreativeWork", "name": "Study",
+             "abstract": "A study", "accountablePerson": "a@example.com",
+             "keywords": ["fmri", "memory"]},
+            {
+                "@id": VERSION,
+                "@type": "Dataset",
+                "name": "Study data",
+                "description": "Raw and derived data",
+                "url": "https://example.com/study",
+                "keywords": ["k1", "k2"],
+                "author": [
+                    {"@id": "https://schema.datalad.org/person#a@example.com"},
+                    {"@id": "https://schema.datalad.org/person#b@example.com"},
+                ],
+                "funder": [
+                    {"@id": "#dfg", "@type": "Organization", "name": "DFG"},
+                    {"@id": "#erc", "@type": "Organization", "name": "ERC"},
+                ],
+                "hasPart": [
+                    {"@id": "datalad:" + "b" * 40,
+                     "identifier": "datalad:sub", "name": "child"},
+                ],
+            },
+            {"@id": "#personList", "@list": [
+                {"@id": "https://schema.datalad.org/person#a@example.com",
+                 "@type": "Person", "email": "a@example.com",
+                 "name": "Ann Smith", "givenName": "Ann",
+                 "familyName": "Smith", "honorificSuffix": "PhD",
+                 "sameAs": "https://orcid.org/0000-0001-2345-6789"},
+                {"@id": "https://schema.datalad.org/person#b@example.com",
+                 "@type": "Person", "email": "b@example.com",
+                 "name": "Bo Li"},
+            ]},
+            {"@id": "#publicationList", "@list": [
+                {"@id": "#p1", "@type": "ScholarlyArticle",
+                 "headline": "Findings", "datePublished": "2021",
+                 "sameAs": "https://doi.org/10.1000/xyz",
+                 "publication": {"@id": "#j", "@type": "Periodical",
+                                 "name": "Journal"},
+                 "author": [{"@id":
+                             "https://schema.datalad.org/person#a@example.com"}]},
+                {"@id": "#p2", "@type": "ScholarlyArticle",
+                 "headline": "Preprint", "author": []},
+            ]},
+        ],
+    }),
+    # study and dataset only
+    _record("metalad_studyminimeta", {"@graph": [
+        {"@id": "#study", "@type": "CreativeWork", "name": "Study"},
+        {"@id": VERSION, "@type": "Dataset", "name": "Data"},
+    ]}),
+    _record("metalad_studyminimeta", {"@graph": []}),
+]
+
+DATACITE = [
+    _record("datacite_gin", {
+        "title": "Recordings",
+        "description": "Electrophysiology recordings",
+        "license": {"name": "CC-BY-4.0",
+                    "url": "https://creativecommons.org/licenses/by/4.0"},
+        "authors": [
+            {"firstname": "Ann", "lastname": "Smith",
+             "id": "ORCID:0000-0001-2345-6789",
+             "affiliation": "University"},
+            {"firstname": "Bo", "lastname": "Li"},
+        ],
+        "keywords": ["neuroscience", "ephys"],
+        "funding": ["DFG, 12345", "ERC, 67890"],
+        "references": [
+            {"citation": "Smith et al. (2020) Findings", "id": "doi:10.1000/XYZ",
+             "reftype": "IsSupplementTo"},
+            {"citation": "Li (2019) Methods", "id": "arxiv:1234.5678",
+             "reftype": "IsReferencedBy"},
+            {"citation": "Li (2018) Poster", "reftype": "IsCitedBy"},
+        ],
+        "resourcetype": "Dataset",
+    }),
+    _record("datacite_gin", {"title": "Minimal"}),
+    _record("datacite_gin", {"title": "Odd", "license": None,
+                             "funding": "DFG", "references": {}}),
+]
+
+RECORDS = {
+    "metalad_core": CORE,
+    "metalad_studyminimeta": MINIMETA,
+    "datacite_gin": DATACITE,
+}
+
+
+@pytest.mark.parametrize("extractor_name", sorted(RECORDS))
+def test_native_fields_match_jq(extractor_name):
+    reports = benchmark(
+        get_batch_translator(extractor_name), RECORDS[extractor_name])
+    assert {r["field"]: r["mismatches"] for r in reports} == \
+        {r["field"]: 0 for r in reports}
+
+
+@pytest.mark.parametrize("extractor_name", sorted(RECORDS))
+def test_native_translation_matches_jq(extractor_name):
+    # records whose fields fail with both engines cannot be translated
+    records = RECORDS[extractor_name][:2]
+    expected = list(translate_records(records))
+    assert list(translate_records(
+        records, engines=EngineSelection("native"))) == expected
+    assert list(translate_records(
+        records, batch_size=1, engines=EngineSelection("native"))) == expected
+
+
+@pytest.mark.parametrize("engine", ["jq", "native"])
+def test_publications_without_id(engine):
+    records = [MINIMETA[0], DATACITE[0]]
+    dois = [
+        [p["doi"] for p in translated["publications"]]
+        for translated in translate_records(
+            records, engines=EngineSelection(engine))
+    ]
+    assert dois == [
+        ["https://doi.org/10.1000/xyz", ""],
+        ["https://doi.org/10.1000/xyz", "arxiv:1234.5678", ""],
+    ]
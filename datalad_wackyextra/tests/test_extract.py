@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from datalad.api import Dataset
+
+from datalad_wackyextra.extract import (
+    _iterate,
+    extract_datasets,
+    find_datasets,
+)
+
+CFF = """\
+cff-version: 1.2.0
+title: {}
+authors:
+  - name: Lab
+date-released: 2021-01-01
+"""
+
+
+def test_extract(tmp_path):
+    superds = Dataset(tmp_path / "super").create(annex=False, result_renderer="disabled")
+    for name in ("sub1", "sub2"):
+        sub = superds.create(name, annex=False, result_renderer="disabled")
+        (sub.pathobj / "CITATION.cff").write_text(CFF.format(name))
+        sub.save(result_renderer="disabled")
+    superds.save(result_renderer="disabled")
+
+    paths = asyncio.run(find_datasets(superds.path))
+    assert sorted(paths) == sorted(
+        [superds.path, str(superds.pathobj / "sub1"),
+         str(superds.pathobj / "sub2")])
+
+    results = list(_iterate(extract_datasets(paths, ["we_cff"], jobs=2)))
+    assert len(results) == 3
+    records = {
+        r["path"]: r["metadata_record"] for r in results if r["status"] == "ok"
+    }
+    # the superdataset has no CITATION.cff
+    assert set(records) == {str(superds.pathobj / "sub1"),
+                            str(superds.pathobj / "sub2")}
+    record = records[str(superds.pathobj / "sub1")]
+    assert record["dataset_id"] == Dataset(superds.pathobj / "sub1").id
+    assert record["extractor_name"] == "we_cff"
+    assert record["extracted_metadata"]["title"] == "sub1"
+    assert record["extracted_metadata"]["date-released"] == "2021-01-01"
+    json.dumps(record)
+
+
+def test_extract_to_stdout(tmp_path, capfd):
+    ds = Dataset(tmp_path / "ds").create(annex=False, result_renderer="disabled")
+    (ds.pathobj / "CITATION.cff").write_text(CFF.format("ds"))
+    ds.save(result_renderer="disabled")
+    capfd.readouterr()
+    # without an output file, records go to stdout
+    ds.wacky_extract(extractor=["we_cff"], result_renderer="disabled")
+    lines = capfd.readouterr().out.splitlines()
+    assert [json.loads(line)["dataset_id"] for line in lines] == [ds.id]
@@ -0,0 +1,104 @@
+import pytest
+
+from datalad_wackyextra.translators.context import RecordContext
+from datalad_wackyextra.translators.engines import (
+    EngineSelection, parse_field_engine
+)
+from datalad_wackyextra.translators.jqbatch import (
+    JqTranslator, benchmark, run_programs
+)
+
+
+class Translator(JqTranslator):
+    extractor_name = "test"
+    jq_programs = {
+        "first": ".items[]",
+        "count": ".items | length",
+    }
+
+    @staticmethod
+    def native_first(metadata):
+        items = metadata["items"]
+        if not isinstance(items, list):
+            raise ValueError("Cannot iterate")
+        if not items:
+            raise StopIteration
+        return items[0]
+
+    @staticmethod
+    def native_count(metadata):
+        return len(metadata["items"])
+
+    def translate_context(self, ctx):
+        return {
+            "first": self.field_or_none(ctx, "first"),
+            "count": self.field(ctx, "count"),
+        }
+
+
+def make_record(items):
+    return {"extracted_metadata": {"items": items}}
+
+
+def test_run_programs():
+    results = run_programs(
+        {"first": ".[]", "fail": ".x"}, [[1, 2], [], {"x": 3}])
+    assert [r["first"] for r in results] == [[1], [], [3]]
+    assert results[2]["fail"] == [3]
+    # .x fails on an array, the error is reported for that input only
+    assert isinstance(results[0]["fail"], dict)
+    assert run_programs({"a": "."}, []) == []
+
+
+def test_translate_many():
+    records = [make_record([1, 2]), make_record([]), make_record(["x"])]
+    expected = [Translator().translate(r) for r in records]
+    assert Translator().translate_many(records) == expected
+    assert expected[1] == {"first": None, "count": 0}
+
+
+def test_errors_per_record():
+    records = [make_record([1]), make_record(5)]
+    # .items[] fails on a number, in both modes
+    with pytest.raises(ValueError):
+        Translator().translate(records[1])
+    translator = Translator()
+    contexts = [
+        RecordContext(r, jq_results=res)
+        for r, res in zip(records, run_programs(
+            Translator.jq_programs,
+            [Translator.get_jq_input(r) for r in records]))
+    ]
+    assert translator.translate_context(contexts[0]) == {
+        "first": 1, "count": 1}
+    with pytest.raises(ValueError):
+        translator.translate_context(contexts[1])
+
+
+def test_engines():
+    records = [make_record([1, 2]), make_record([]), make_record(["x"])]
+    expected = [Translator().translate(r) for r in records]
+    native = EngineSelection("native")
+    assert [Translator().translate(r, native) for r in records] == expected
+    assert Translator.get_jq_fields(native) == []
+    assert Translator().translate_many(records, native) == expected
+    # a single field back on jq
+    mixed = EngineSelection(
+        "native", dict([parse_field_engine("test.count=jq")]))
+    assert Translator.get_jq_fields(mixed) == ["count"]
+    assert Translator().translate_many(records, mixed) == expected
+    # the selection is not kept by the (shared) translator
+    assert Translator.get_jq_fields() == ["first", "count"]
+
+    with pytest.raises(ValueError):
+        EngineSelection("python")
+    with pytest.raises(ValueError):
+        parse_field_engine("count=jq")
+
+
+def test_benchmark():
+    records = [make_record([1, 2]), make_record([]), make_record(5)]
+    reports = benchmark(Translator(), records)
+    assert [r["field"] for r in reports] == ["first", "count"]
+    # length of a number is its absolute value in jq, not an error
+    assert [r["mismatches"] for r in reports] == [0, 1]
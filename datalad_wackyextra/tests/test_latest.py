@@ -0,0 +1,71 @@
+import gzip
+import json
+
+import pytest
+
+from datalad_wackyextra.latest import open_latest, scan_latest
+
+
+def record(n, dataset_id, extractor_name, extraction_time, version=None):
+    return {
+        "type": "dataset",
+        "dataset_id": dataset_id,
+        "dataset_version": version or "v{}".format(n),
+        "extractor_name": extractor_name,
+        "extraction_time": extraction_time,
+        "extracted_metadata": {"n": n},
+    }
+
+
+RECORDS = [
+    record(0, "ds1", "metalad_core", 10.0),
+    record(1, "ds1", "we_cff", 5.0),
+    record(2, "ds2", "metalad_core", 3.0),
+    record(3, "ds1", "metalad_core", 30.0),
+    record(4, "ds1", "metalad_core", 20.0),
+    record(5, "ds1", "we_cff", 6.0),
+]
+
+
+def write_records(path, records, opener=open):
+    with opener(path, "wt") as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+
+
+def numbers(lines):
+    return [json.loads(line)["extracted_metadata"]["n"] for line in lines]
+
+
+@pytest.mark.parametrize("name", ["dump.jsonl", "dump.jsonl.gz"])
+def test_open_latest(tmp_path, name):
+    path = tmp_path / name
+    write_records(path, RECORDS, gzip.open if name.endswith(".gz") else open)
+    with open_latest(path) as lines:
+        assert numbers(lines) == [2, 3, 5]
+
+    # a version order takes precedence over extraction time
+    order = {"v0": 0, "v4": 1}
+    with open_latest(path, version_order=order) as lines:
+        assert numbers(lines) == [2, 4, 5]
+
+    # records which are not selected do not compete
+    def no_cff(fields):
+        return fields["extractor_name"] != "we_cff"
+
+    with open_latest(path, selector=no_cff) as lines:
+        assert numbers(lines) == [2, 3]
+
+
+def test_scan_latest_keeps_invalid_lines():
+    lines = [json.dumps(r).encode() + b"\n" for r in RECORDS[:2]]
+    lines.insert(1, b"{not json\n")
+    numbers, offsets = scan_latest(lines)
+    assert list(numbers) == [0, 1, 2]
+    assert list(offsets) == [0, len(lines[0]), len(lines[0]) + len(lines[1])]
+
+
+def test_stdin_not_supported():
+    with pytest.raises(ValueError):
+        with open_latest("-"):
+            pass
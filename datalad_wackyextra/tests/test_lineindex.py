@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+
+from datalad_wackyextra.lineindex import (
+    INDEX_SUFFIX,
+    LineIndex,
+    parse_line_range,
+)
+from datalad_wackyextra.translation import translate_file
+
+
+def write_lines(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"dataset_id": "ds{}".format(i % 3), "n": i}))
+            f.write("\n")
+
+
+def numbers(lines):
+    return [json.loads(line)["n"] for line in lines]
+
+
+def test_parse_line_range():
+    assert parse_line_range("10:20") == (10, 20)
+    assert parse_line_range(":20") == (None, 20)
+    assert parse_line_range("10:") == (10, None)
+    for spec in ("10", "a:b", "-1:5", "1:2:3"):
+        with pytest.raises(ValueError):
+            parse_line_range(spec)
+
+
+def test_select(tmp_path):
+    path = tmp_path / "dump.jsonl"
+    write_lines(path, 10)
+    with LineIndex(path) as index:
+        assert numbers(index.select(["ds1"])) == [1, 4, 7]
+        assert numbers(index.select(line_range=(8, None))) == [8, 9]
+        assert numbers(index.select(["ds0", "ds2"], (2, 6))) == [2, 3, 5]
+        assert numbers(index.select()) == list(range(10))
+    assert (tmp_path / ("dump.jsonl" + INDEX_SUFFIX)).exists()
+
+    # index is rebuilt when the file changes
+    write_lines(path, 4)
+    os.utime(path, ns=(0, 0))
+    with LineIndex(path) as index:
+        assert numbers(index.select(["ds1"])) == [1]
+
+
+def test_select_many_ids(tmp_path):
+    path = tmp_path / "dump.jsonl"
+    write_lines(path, 10)
+    # more ids than SQLite allows as query parameters
+    ids = ["ds1"] + ["x{}".format(i) for i in range(300000)]
+    with LineIndex(path) as index:
+        assert numbers(index.select(ids)) == [1, 4, 7]
+        assert numbers(index.select(["ds2"])) == [2, 5, 8]
+
+
+def test_index_path(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    path = data / "dump.jsonl"
+    write_lines(path, 10)
+    index_path = tmp_path / "dump.index"
+    # the input may be on read-only storage
+    data.chmod(0o555)
+    try:
+        with LineIndex(path, index_path) as index:
+            assert numbers(index.select(["ds1"])) == [1, 4, 7]
+    finally:
+        data.chmod(0o755)
+    assert index_path.exists()
+    assert not (data / ("dump.jsonl" + INDEX_SUFFIX)).exists()
+
+
+def test_compressed_not_supported(tmp_path):
+    with pytest.raises(ValueError):
+        LineIndex(tmp_path / "dump.jsonl.gz")
+
+
+def test_translate_selection(tmp_path):
+    path = tmp_path / "dump.jsonl"
+    with open(path, "w") as f:
+        for i in range(10):
+            f.write(json.dumps({
+                "type": "dataset",
+                "dataset_id": "ds{}".format(i % 3),
+                "dataset_version": str(i),
+                "extractor_name": "datacite_gin",
+                "extractor_version": "0.1",
+                "extraction_parameter": {},
+                "extraction_time": 1670000000.0,
+                "agent_name": "Jane",
+                "agent_email": "jane@example.com",
+                "extracted_metadata": {"title": "Dataset {}".format(i)},
+            }))
+            f.write("\n")
+    # selected lines are read in a background thread, by default
+    outfile = tmp_path / "out.jsonl"
+    translate_file(path, outfile, dataset_ids=["ds1"], line_range=(0, 5),
+                   line_index=tmp_path / "dump.index")
+    with open(outfile) as f:
+        assert [json.loads(line)["dataset_version"] for line in f] == \
+            ["1", "4"]
+    assert not (tmp_path / ("dump.jsonl" + INDEX_SUFFIX)).exists()
@@ -0,0 +1,67 @@
+from datalad_wackyextra.merge import merge_records
+
+
+def _record(dataset_id, source_name, **kwargs):
+    record = {
+        "type": "dataset",
+        "dataset_id": dataset_id,
+        "dataset_version": "0" * 40,
+        "name": "",
+        "metadata_sources": {
+            "key_source_map": {},
+            "sources": [{"source_name": source_name, "source_version": "1"}],
+        },
+    }
+    record.update(kwargs)
+    return record
+
+
+def _records():
+    return [
+        _record("a", "we_cff", name="Title", keywords=["x", "y"]),
+        _record("b", "we_cff", name="Other"),
+        _record("a", "we_ris", keywords=["y", "z"], description="text"),
+        _record("a", "we_nbib", name="Ignored"),
+    ]
+
+
+def _check(merged):
+    assert [m["dataset_id"] for m in merged] == ["a", "b"]
+    a = merged[0]
+    assert a["name"] == "Title"
+    assert a["keywords"] == ["x", "y", "z"]
+    assert a["description"] == "text"
+    sources = a["metadata_sources"]
+    assert [s["source_name"] for s in sources["sources"]] == [
+        "we_cff", "we_ris", "we_nbib"]
+    assert sources["key_source_map"]["keywords"] == ["we_cff", "we_ris"]
+    assert sources["key_source_map"]["name"] == ["we_cff"]
+
+
+def test_merge_in_memory():
+    _check(list(merge_records(_records())))
+
+
+def test_merge_spilled():
+    _check(list(merge_records(_records(), max_records=1)))
+
+
+def test_merge_extractors_used():
+    record = {
+        "type": "dataset",
+        "dataset_id": "a",
+        "dataset_version": "v",
+        "url": ["https://example.com"],
+        "extractors_used": [{
+            "extractor_name": "metalad_core",
+            "extractor_version": "1",
+            "extraction_parameter": {},
+            "extraction_time": 0,
+            "agent_name": "N",
+            "agent_email": "e",
+        }],
+    }
+    merged, = merge_records([record])
+    assert "extractors_used" not in merged
+    assert merged["name"] == ""
+    assert merged["metadata_sources"]["sources"][0]["source_name"] == "metalad_core"
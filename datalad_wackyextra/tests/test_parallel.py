@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import threading
+
+import pytest
+
+from datalad_wackyextra.parallel import BatchScheduler, _run_batches
+from datalad_wackyextra.translation import translate_file
+
+
+def _record(i, size=1):
+    return {
+        "type": "dataset",
+        "dataset_id": "ds{}".format(i),
+        "dataset_version": "0" * 40,
+        "extractor_name": "datacite_gin",
+        "extractor_version": "0.1",
+        "extraction_parameter": {},
+        "extraction_time": 1670000000.0,
+        "agent_name": "Jane",
+        "agent_email": "jane@example.com",
+        "extracted_metadata": {
+            "title": "Dataset {}".format(i),
+            "description": "x" * size,
+            "authors": [{"firstName": "Jane", "lastName": "Doe"}],
+            "keywords": ["k"],
+            "funding": ["Agency"],
+        },
+    }
+
+
+def test_batches():
+    scheduler = BatchScheduler(min_size=10)
+    lines = [b"aaaa", b"bbbb", b"cc", b"d" * 20, b"ee", b"ff"]
+    assert list(scheduler.batches(lines)) == [
+        [b"aaaa", b"bbbb", b"cc"], [b"d" * 20], [b"ee", b"ff"]]
+
+
+def test_adaptive_size():
+    scheduler = BatchScheduler(target_time=0.5, min_size=10, max_size=1000)
+    scheduler.record(1, [b"x" * 100], 0.1)
+    assert scheduler.target_size == 500
+    scheduler.record(2, [b"x" * 1000], 0.01)
+    assert scheduler.target_size == 1000
+    stats = scheduler.get_stats(1.0)
+    assert [s["worker"] for s in stats] == [0, 1]
+    assert stats[0]["records"] == 1
+    assert stats[0]["utilisation"] == pytest.approx(0.1)
+
+
+def test_giant_record_does_not_starve_workers():
+    batches = [[b"giant"]] + [[b"small %d" % i] for i in range(100)]
+    small_done = threading.Event()
+    translated = []
+
+    def translate(batch):
+        if batch == [b"giant"]:
+            # finishes only once all other batches are translated
+            assert small_done.wait(10), "other workers were held back"
+        else:
+            translated.append(batch)
+            if len(translated) == len(batches) - 1:
+                small_done.set()
+        return b"".join(batch) + b"\n", threading.get_ident(), 0.01
+
+    out = io.BytesIO()
+    with ThreadPoolExecutor(2) as executor:
+        _run_batches(
+            executor, batches, translate, BatchScheduler(), out, 4,
+            max_buffered=1 << 20)
+    # output keeps the input order
+    assert out.getvalue().splitlines() == [b[0] for b in batches]
+
+
+def test_translate_parallel(tmp_path):
+    infile = tmp_path / "in.jsonl"
+    sizes = [1] * 50 + [100000] + [1] * 50
+    with open(infile, "w") as f:
+        for i, size in enumerate(sizes):
+            f.write(json.dumps(_record(i, size)) + "\n")
+            f.write(json.dumps(dict(
+                _record(i), extractor_name="metalad_core", type="file")) + "\n")
+    translate_file(infile, tmp_path / "serial.jsonl")
+    stats = translate_file(infile, tmp_path / "parallel.jsonl", jobs=2)
+    assert (tmp_path / "parallel.jsonl").read_bytes() == \
+        (tmp_path / "serial.jsonl").read_bytes()
+    assert sum(s["records"] for s in stats) == len(sizes)
+
+    with pytest.raises(ValueError):
+        translate_file(infile, tmp_path / "merged.jsonl", merge=True, jobs=2)
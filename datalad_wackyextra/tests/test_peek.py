@@ -0,0 +1,52 @@
+import json
+
+from datalad_wackyextra import peek as peek_module
+from datalad_wackyextra.peek import filter_lines
+from datalad_wackyextra.translation import RecordSelector
+
+
+def _line(extractor_name, record_type="dataset", extracted_metadata="{}"):
+    # extracted_metadata is inserted as is, and need not be valid json
+    return (
+        '{{"type": "{}", "dataset_id": "a", "extractor_name": "{}", '
+        '"extracted_metadata": {}}}\n'.format(
+            record_type, extractor_name, extracted_metadata)
+    ).encode("utf-8")
+
+
+def test_filter_lines_before_decoding():
+    selector = RecordSelector()
+    # dropped lines are never decoded in full, or this would fail
+    broken = '{"broken": '
+    kept = [_line("datacite_gin"), _line("metalad_core")]
+    lines = [
+        kept[0],
+        _line("unknown", extracted_metadata=broken),
+        _line("metalad_core", "file", extracted_metadata=broken),
+        kept[1],
+    ]
+    assert list(filter_lines(lines, selector.keys, selector)) == kept
+
+
+def test_filter_lines_missing_keys(monkeypatch):
+    decoded = []
+    json_loads = json.loads
+
+    def loads(s):
+        decoded.append(s)
+        return json_loads(s)
+
+    monkeypatch.setattr(peek_module.json, "loads", loads)
+    selector = RecordSelector()
+    # extractor_name after extracted_metadata is found by scanning the
+    # line, a missing type only by decoding it in full
+    late = json.dumps({
+        "type": "dataset", "extracted_metadata": {},
+        "extractor_name": "metalad_core"}).encode("utf-8") + b"\n"
+    untyped = json.dumps({
+        "extractor_name": "metalad_core",
+        "extracted_metadata": {}}).encode("utf-8") + b"\n"
+    assert list(filter_lines([late, untyped], selector.keys, selector)) == \
+        [late]
+    # whole lines end with a newline, heads decoded by peek do not
+    assert [s for s in decoded if s.endswith(b"\n")] == [untyped]
@@ -0,0 +1,29 @@
+from datalad_wackyextra.translators.provenance import (
+    get_extractors_used,
+    get_metadata_source,
+)
+
+
+def make_record(dataset_id, parameter):
+    return {
+        "dataset_id": dataset_id,
+        "extractor_name": "we_cff",
+        "extractor_version": "0.0.1",
+        "extraction_parameter": parameter,
+        "extraction_time": 1.0,
+        "agent_name": "A",
+        "agent_email": "a@example.com",
+    }
+
+
+def test_shared_per_run():
+    a = make_record("a", {"x": 1, "y": [2]})
+    b = make_record("b", {"y": [2], "x": 1})
+    c = make_record("c", {"x": 2})
+    assert get_metadata_source(a) is get_metadata_source(b)
+    assert get_metadata_source(a) is not get_metadata_source(c)
+    assert get_extractors_used(a) is get_extractors_used(b)
+    source = get_metadata_source(c)["sources"][0]
+    assert source["source_name"] == "we_cff"
+    assert source["source_parameter"] == {"x": 2}
+    assert get_extractors_used(c)[0]["extraction_parameter"] == {"x": 2}
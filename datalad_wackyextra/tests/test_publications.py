@@ -0,0 +1,76 @@
+from datalad_wackyextra.translation import translate_record
+from datalad_wackyextra.translators.citations import RisTranslator
+from datalad_wackyextra.translators.publications import (
+    PublicationIndex,
+    SQLitePublicationIndex,
+    get_publication_key,
+)
+
+
+def _record(refs):
+    return {
+        "type": "dataset",
+        "dataset_id": "a",
+        "dataset_version": "v",
+        "extractor_name": "we_ris",
+        "extractor_version": "0.10.0",
+        "extraction_parameter": {},
+        "extraction_time": 0,
+        "agent_name": "N",
+        "agent_email": "e",
+        "extracted_metadata": {"refs": refs},
+    }
+
+
+REFS = [
+    {"type_of_reference": "JOUR", "title": "A", "doi": "10.1/ABC",
+     "authors": ["X"]},
+    {"type_of_reference": "JOUR", "title": "No DOI", "year": "2020",
+     "authors": ["Y"]},
+]
+
+
+def test_publication_key():
+    assert get_publication_key(doi="doi:10.1/ABC") == "10.1/abc"
+    assert get_publication_key(title="A  Title", year=2020) == \
+        get_publication_key(title="a title", year="2020")
+    assert get_publication_key() is None
+
+
+def test_citations_reuse_publications(tmp_path):
+    for index in (PublicationIndex(),
+                  SQLitePublicationIndex(tmp_path / "pubs.db")):
+        translator = RisTranslator()
+        first = translator.translate(
+            _record(REFS), index, shared=True)["publications"]
+        second = translator.translate(
+            _record(REFS), index, shared=True)["publications"]
+        assert first == translator.translate(_record(REFS))["publications"]
+        assert all(a is b for a, b in zip(first, second))
+        index.close()
+
+
+def test_rich_publication_survives_stub(tmp_path):
+    stub = {
+        "type": "dataset",
+        "dataset_id": "b",
+        "dataset_version": "v",
+        "extractor_name": "datacite_gin",
+        "extractor_version": "0.1",
+        "extraction_parameter": {},
+        "extraction_time": 0,
+        "agent_name": "N",
+        "agent_email": "e",
+        "extracted_metadata": {"title": "T", "references": [
+            {"citation": "A", "id": "doi:10.1/abc"}]},
+    }
+    rich = translate_record(_record(REFS[:1]))["publications"][0]
+    for index in (PublicationIndex(),
+                  SQLitePublicationIndex(tmp_path / "pubs.db")):
+        translated = [
+            translate_record(record, index)["publications"][0]
+            for record in (stub, _record(REFS[:1]), stub)
+        ]
+        assert translated[0] != rich
+        assert translated[1] == translated[2] == rich
+        index.close()
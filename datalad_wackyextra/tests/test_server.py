@@ -0,0 +1,82 @@
+from io import BytesIO
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+from datalad_wackyextra.server import (
+    TranslationError, TranslationServer, serve, translate_remote
+)
+
+
+def translate(lines):
+    for line in lines:
+        record = json.loads(line)
+        if "fail" in record:
+            raise ValueError("cannot translate")
+        yield {"name": record["name"].upper()}
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = tmp_path / "translate.sock"
+    server = TranslationServer(socket_path, translate)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    thread.join()
+    server.server_close()
+    assert not socket_path.exists()
+
+
+def test_translate_remote(server):
+    records = b"".join(
+        json.dumps({"name": "ds{}".format(i)}).encode() + b"\n"
+        for i in range(10000)
+    )
+    # several requests to the same server
+    for _ in range(2):
+        out = BytesIO()
+        translate_remote(server, BytesIO(records), out)
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 10000
+        assert json.loads(lines[-1]) == {"name": "DS9999"}
+
+
+def test_translate_remote_error(server):
+    out = BytesIO()
+    with pytest.raises(TranslationError, match="cannot translate"):
+        translate_remote(
+            server, BytesIO(b'{"name": "a"}\n{"fail": 1}\n'), out)
+    # records translated before the failure are kept
+    assert out.getvalue() == b'{"name": "A"}\n'
+
+
+def test_server_running(server):
+    with pytest.raises(OSError, match="already listening"):
+        TranslationServer(server, translate)
+
+
+def test_socket_private(server):
+    assert stat.S_IMODE(os.stat(server).st_mode) == 0o600
+
+
+def test_serve_in_thread(tmp_path, monkeypatch):
+    # stop right away; only the main thread can set signal handlers
+    monkeypatch.setattr(
+        TranslationServer, "serve_forever", lambda self: None)
+    errors = []
+
+    def run():
+        try:
+            serve(tmp_path / "translate.sock", translate)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert errors == []
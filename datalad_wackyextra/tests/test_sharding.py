@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from datalad_wackyextra import peek as peek_module
+from datalad_wackyextra.peek import peek
+from datalad_wackyextra.sharding import parse_shard, select_shard
+
+
+LINE = json.dumps({
+    "type": "dataset",
+    "dataset_id": "żółw",
+    "extraction_parameter": {"dataset_id": "nested"},
+    "extractor_name": "we_cff",
+    "extracted_metadata": {"dataset_id": "nested", "title": "x" * 10000},
+}, ensure_ascii=False).encode("utf-8")
+
+
+@pytest.mark.parametrize("prefix_size", [1, 7, 2048])
+def test_peek(monkeypatch, prefix_size):
+    monkeypatch.setattr(peek_module, "PREFIX_SIZE", prefix_size)
+    assert peek(LINE, ("dataset_id", "extractor_name")) == {
+        "dataset_id": "żółw", "extractor_name": "we_cff"}
+    assert peek(LINE, ("missing",)) == {}
+    assert peek(b"not json\n", ("dataset_id",)) is None
+    # key order other than the one used by metalad
+    line = b'{"extracted_metadata": {"type": "x"}, "type": "dataset"}'
+    assert peek(line, ("type",)) == {"type": "dataset"}
+
+
+def test_parse_shard():
+    assert parse_shard("1/4") == (1, 4)
+    for spec in ("4/4", "-1/2", "1", "a/b", "0/0"):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_select_shard():
+    lines = [
+        json.dumps({"dataset_id": "ds{}".format(i % 10), "n": i}).encode()
+        for i in range(100)
+    ]
+    selected = [list(select_shard(lines, i, 3)) for i in range(3)]
+    assert sorted(sum(selected, [])) == sorted(lines)
+    # all records of a dataset are in the same shard
+    for shard in selected:
+        ids = {json.loads(line)["dataset_id"] for line in shard}
+        for other in selected:
+            if other is not shard:
+                assert ids.isdisjoint(
+                    json.loads(line)["dataset_id"] for line in other)
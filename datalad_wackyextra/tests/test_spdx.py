@@ -0,0 +1,33 @@
+import pytest
+
+from datalad_wackyextra.translators.spdx import get_license, normalise_expression
+
+
+@pytest.mark.parametrize("expression, normalised", [
+    ("mit", "MIT"),
+    ("MIT License", "MIT"),
+    ("GPL-2.0+", "GPL-2.0-or-later"),
+    ("mit or apache-2.0", "MIT OR Apache-2.0"),
+    ("(MIT OR BSD-3-Clause) AND GPL-2.0 with classpath-exception-2.0",
+     "(MIT OR BSD-3-Clause) AND GPL-2.0-only WITH Classpath-exception-2.0"),
+    ("LicenseRef-custom", "LicenseRef-custom"),
+])
+def test_normalise_expression(expression, normalised):
+    assert normalise_expression(expression) == normalised
+
+
+@pytest.mark.parametrize("expression", ["MIT OR", "(MIT", "AND MIT"])
+def test_normalise_invalid(expression):
+    with pytest.raises(ValueError):
+        normalise_expression(expression)
+
+
+def test_get_license():
+    assert get_license("cc-by-4.0") == {
+        "name": "Creative Commons Attribution 4.0 International",
+        "url": "https://spdx.org/licenses/CC-BY-4.0.html",
+    }
+    assert get_license("MIT", "https://example.com/license") == {
+        "name": "MIT License", "url": "https://example.com/license"}
+    assert get_license("MIT OR Apache-2.0") == {
+        "name": "MIT OR Apache-2.0", "url": ""}
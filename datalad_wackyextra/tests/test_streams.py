@@ -0,0 +1,15 @@
+import pytest
+
+from datalad_wackyextra.streams import open_input, open_output
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz", ".xz", ".zst"])
+def test_roundtrip_append(tmp_path, suffix):
+    if suffix == ".zst":
+        pytest.importorskip("zstandard")
+    path = tmp_path / ("out.jsonl" + suffix)
+    for line in (b'{"a": 1}\n', b'{"b": 2}\n'):
+        with open_output(path, compression_level=1) as f:
+            f.write(line)
+    with open_input(path) as f:
+        assert list(f) == [b'{"a": 1}\n', b'{"b": 2}\n']
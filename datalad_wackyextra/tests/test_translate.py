@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+
+from datalad_wackyextra.tests.test_cli import _record
+from datalad_wackyextra.translation import translate_record
+
+# `datalad wacky-translate -i - -o -`, with the datalad of this python
+COMMAND = [
+    sys.executable, "-c", "from datalad.cli.main import main; main()",
+    "wacky-translate", "-i", "-", "-o", "-",
+]
+
+
+def _write_records(path, count):
+    records = [_record(i) for i in range(count)]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+    return records
+
+
+def test_translate_pipe(tmp_path):
+    infile = tmp_path / "in.jsonl"
+    records = _write_records(infile, 5)
+    with open(infile, "rb") as fin:
+        result = subprocess.run(
+            COMMAND, stdin=fin, capture_output=True, check=True)
+    translated = [json.loads(line) for line in result.stdout.splitlines()]
+    assert translated == [translate_record(r) for r in records]
+
+
+def test_translate_pipe_closed_early(tmp_path):
+    # far more output than a pipe holds, so that writing fails once the
+    # reading end is closed (like `| head -n 1`)
+    infile = tmp_path / "in.jsonl"
+    _write_records(infile, 5000)
+    with open(infile, "rb") as fin:
+        process = subprocess.Popen(
+            COMMAND, stdin=fin, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        first = json.loads(process.stdout.readline())
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        assert process.wait() == 0
+    assert first["dataset_id"] == "ds0"
+    assert b"Traceback" not in stderr
+    assert b"Broken pipe" not in stderr
+
+
+def test_translate_to_stdout(tmp_path, capfd):
+    from datalad.api import wacky_translate
+    infile = tmp_path / "in.jsonl"
+    records = _write_records(infile, 3)
+    capfd.readouterr()
+    # without an output file, records go to stdout, and nothing else
+    wacky_translate(infile=str(infile), result_renderer="tailored")
+    translated = [json.loads(line) for line in
+                  capfd.readouterr().out.splitlines()]
+    assert translated == [translate_record(r) for r in records]
@@ -0,0 +1,101 @@
+import json
+
+from datalad_wackyextra.translation import (
+    RecordSelector, iter_translate, translate_record
+)
+
+
+def _record(i, extractor_name="datacite_gin", record_type="dataset"):
+    return {
+        "type": record_type,
+        "dataset_id": "ds{}".format(i),
+        "dataset_version": "0" * 40,
+        "extractor_name": extractor_name,
+        "extractor_version": "0.1",
+        "extraction_parameter": {},
+        "extraction_time": 1670000000.0,
+        "agent_name": "Jane",
+        "agent_email": "jane@example.com",
+        "extracted_metadata": {
+            "title": "Dataset {}".format(i),
+            "description": "",
+            "authors": [{"firstName": "Jane", "lastName": "Doe"}],
+            "keywords": ["k"],
+            "funding": ["Agency"],
+        },
+    }
+
+
+def _records():
+    return [
+        _record(0),
+        _record(1, "unknown"),
+        _record(2),
+        _record(3, "metalad_core", "file"),
+        _record(4),
+    ]
+
+
+def test_iter_translate_records():
+    expected = [translate_record(r) for r in _records() if r["dataset_id"]
+                in ("ds0", "ds2", "ds4")]
+    assert list(iter_translate(_records())) == expected
+    assert list(iter_translate(iter(_records()), batch_size=1)) == expected
+    assert list(iter_translate(
+        _records(), selector=RecordSelector(exclude=["datacite_gin"]))) == []
+
+
+def test_iter_translate_path(tmp_path):
+    infile = tmp_path / "in.jsonl"
+    infile.write_text("".join(json.dumps(r) + "\n" for r in _records()))
+    assert list(iter_translate(infile)) == list(iter_translate(_records()))
+    merged = iter_translate(str(infile), merge=True)
+    assert [r["dataset_id"] for r in merged] == ["ds0", "ds2", "ds4"]
+
+
+def test_iter_translate_lazy():
+    def records():
+        yield _record(0)
+        raise AssertionError("read too far")
+
+    translated = iter_translate(records(), batch_size=1)
+    assert next(translated)["dataset_id"] == "ds0"
+
+
+def test_translate_datacite_license():
+    record = _record(0)
+    assert "license" not in translate_record(record)
+
+    record["extracted_metadata"]["license"] = {
+        "name": "cc-by-4.0",
+        "url": "https://creativecommons.org/licenses/by/4.0/",
+    }
+    assert translate_record(record)["license"] == {
+        "name": "Creative Commons Attribution 4.0 International",
+        "url": "https://creativecommons.org/licenses/by/4.0/",
+    }
+
+    record["extracted_metadata"]["license"] = {
+        "url": "https://example.com/license"}
+    assert translate_record(record)["license"] == {
+        "url": "https://example.com/license"}
+
+    record["extracted_metadata"]["license"] = {"name": "CC0-1.0"}
+    assert translate_record(record)["license"] == {
+        "name": "Creative Commons Zero v1.0 Universal",
+        "url": "https://spdx.org/licenses/CC0-1.0.html",
+    }
+
+
+def test_translated_records_can_be_modified():
+    record = _record(0)
+    record["extracted_metadata"]["license"] = {"name": "MIT"}
+    first, second = iter_translate([record, _record(1)])
+    first["authors"][0]["name"] = "changed"
+    first["license"]["name"] = "changed"
+    first["extractors_used"][0]["agent_name"] = "changed"
+    assert translate_record(record) == dict(
+        second, dataset_id="ds0", name="Dataset 0", license={
+            "name": "MIT License",
+            "url": "https://spdx.org/licenses/MIT.html",
+        })
@@ -5,15 +5,92 @@ import jsonlines
 from datalad.interface.base import Interface
 from datalad.interface.base import build_doc
 from datalad.support.param import Parameter
+from datalad.support.constraints import (
+    EnsureChoice, EnsureInt, EnsureNone, EnsureStr
+)
 from datalad.distribution.dataset import datasetmethod
-from datalad.interface.utils import eval_results
+from datalad.interface.utils import eval_results, generic_result_renderer
 from datalad.interface.results import get_status_dict
 
-from .translators.citations import RisTranslator, NbibTranslator
-from .translators.cff import CffTranslator
-from .translators.core import MetaladCoreTranslator
-from .translators.minimeta import MinimetaTranslator
-from .translators.datacite import DataciteTranslator
+from .lineindex import open_selection, parse_line_range
+from .peek import filter_lines
+from .server import serve as serve_translation
+from .sharding import parse_shard, select_shard
+from .streams import STDIO, open_input
+from .translation import (
+    RecordSelector,
+    benchmark_engines,
+    open_publication_index,
+    open_translation_cache,
+    translate_file,
+    translate_lines,
+)
+# translation core, available here for backwards compatibility
+from .translation import (  # noqa: F401
+    TRANSLATORS,
+    can_translate,
+    translate_record,
+    translate_records,
+)
+from .translators.engines import (
+    ENGINES, EngineSelection, parse_field_engine
+)
+
+
+def _serve(socket_path, selector, publication_index, dedup_publications,
+           translation_cache, cache_translations, batch_size, engines):
+    """Run a translation server, yield a status dict once it stops"""
+    # shared by all requests, so publications are deduplicated (and
+    # translations reused) across them
+    index = open_publication_index(publication_index, dedup_publications)
+    cache = open_translation_cache(translation_cache, cache_translations)
+    try:
+        serve_translation(
+            socket_path,
+            lambda lines: translate_lines(
+                lines, selector, index, batch_size, cache, engines,
+                shared=True),
+        )
+    finally:
+        for closeable in (index, cache):
+            if closeable is not None:
+                closeable.close()
+    yield get_status_dict(
+        action="serve",
+        path=socket_path,
+        status="ok",
+    )
+
+
+def _benchmark_results(source, selector, shard, sample_size):
+    """Yield status dicts for benchmark_engines run on an input"""
+    with source as fin:
+        lines = filter_lines(fin, selector.keys, selector)
+        if shard is not None:
+            lines = select_shard(lines, *shard)
+        records = (j for j in jsonlines.Reader(lines) if selector(j))
+        for report in benchmark_engines(records, sample_size):
+            jq_time = min(report["jq_time"], report["jq_batch_time"])
+            message = (
+                "%s.%s on %d records: jq %.3fs (batch %.3fs), native "
+                "%.3fs (%.1fx)",
+                report["extractor_name"], report["field"], report["records"],
+                report["jq_time"], report["jq_batch_time"],
+                report["native_time"],
+                jq_time / report["native_time"] if report["native_time"]
+                else float("inf"),
+            )
+            if report["mismatches"]:
+                message = (
+                    message[0] + "; results differ for %d records",
+                    *message[1:], report["mismatches"])
+            yield get_status_dict(
+                action="benchmark_engines",
+                status="error" if report["mismatches"] else "ok",
+                message=message,
+                **report,
+            )
+
 
 @build_doc
 class Translate(Interface):
@@ -21,49 +98,324 @@ class Translate(Interface):
 
     Translate metadata records produced (or recognised) by this
     extension to match datalad-catalog schema
+
+    Records are read, translated and written one by one, so that the
+    command can be used as a pipeline stage, e.g. between
+    ``datalad meta-dump`` and ``datalad catalog-add``, by passing ``-``
+    as input and output file.
     """
 
+    # output goes to stdout if requested, so it needs to stay clean
+    result_renderer = "tailored"
+
     _params_ = dict(
         infile=Parameter(
             args=("-i", "--infile"),
-            doc="""Input file with json lines (jsonl)""",
+            doc="""Input file with json lines (jsonl); files ending with
+            .gz, .xz or .zst are decompressed on the fly. Use '-' to read
+            from stdin""",
         ),
         outfile=Parameter(
             args=("-o", "--outfile"),
-            doc="""Output file; will be opened in append mode""",
+            doc="""Output file; will be opened in append mode. Output is
+            compressed if the file name ends with .gz, .xz or .zst. Use '-'
+            to write to stdout, which is the default; each record is then
+            flushed as soon as it is translated""",
+        ),
+        compression_level=Parameter(
+            args=("--compression-level",),
+            constraints=EnsureInt() | EnsureNone(),
+            doc="""Compression level for compressed output, with the range
+            of the respective format (gzip: 1-9, xz: 0-9, zstd: 1-22).
+            If not given, the format default is used""",
+        ),
+        include_extractor=Parameter(
+            args=("--include-extractor",),
+            action="append",
+            metavar="NAME",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Only translate records produced by the given extractor.
+            Can be given multiple times""",
+        ),
+        exclude_extractor=Parameter(
+            args=("--exclude-extractor",),
+            action="append",
+            metavar="NAME",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Do not translate records produced by the given
+            extractor. Can be given multiple times""",
+        ),
+        dataset_id=Parameter(
+            args=("--dataset-id",),
+            action="append",
+            metavar="ID",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Only translate records of the given dataset. Can be given
+            multiple times. Records are looked up in an index of the input
+            file, which is built on first use and stored next to it (as
+            INFILE.index.sqlite), so that they are read directly instead
+            of scanning the whole file. Requires an uncompressed input
+            file""",
+        ),
+        line_range=Parameter(
+            args=("--line-range",),
+            metavar="START:END",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Only translate records from the given lines of the input
+            file, counted from 0, with END not included (as in Python
+            slices; either can be omitted). Uses the same index as
+            --dataset-id; if both are given, records need to match both""",
+        ),
+        line_index=Parameter(
+            args=("--line-index",),
+            metavar="PATH",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Index used by --dataset-id and --line-range, instead of
+            INFILE.index.sqlite, e.g. when the input file is on read-only
+            storage""",
+        ),
+        shard=Parameter(
+            args=("--shard",),
+            metavar="i/N",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Only translate records from shard i (counting from 0) out
+            of N. Records are assigned to shards based on their dataset id,
+            so that each dataset ends up in exactly one shard. Intended for
+            splitting work across several independent runs; outputs can
+            be joined with ``python -m datalad_wackyextra.sharding``""",
+        ),
+        latest_only=Parameter(
+            args=("--latest-only",),
+            action="store_true",
+            doc="""Only translate the latest record of each dataset and
+            extractor, e.g. when the input holds metadata of many versions
+            of each dataset. Records are compared by --version-order, if
+            given, otherwise by extraction time. The input file is read
+            twice, once to find the latest records and once to translate
+            them, so it cannot be stdin. Cannot be combined with
+            --dataset-id or --line-range""",
+        ),
+        version_order=Parameter(
+            args=("--version-order",),
+            metavar="PATH",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""File listing dataset versions, one per line, from oldest
+            to newest (e.g. the output of ``git rev-list --reverse HEAD``),
+            used by --latest-only. Listed versions are newer than those
+            not listed; otherwise extraction time decides""",
+        ),
+        dedup_publications=Parameter(
+            args=("--dedup-publications",),
+            action="store_true",
+            doc="""Keep one translated publication per DOI (or title and
+            year, if there is no DOI) and reuse it for all records citing
+            it, instead of translating it again""",
+        ),
+        publication_index=Parameter(
+            args=("--publication-index",),
+            metavar="PATH",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""SQLite database in which deduplicated publications are
+            stored (created if needed), instead of memory. Can be reused
+            across runs. Implies --dedup-publications""",
+        ),
+        cache_translations=Parameter(
+            args=("--cache-translations",),
+            action="store_true",
+            doc="""Reuse translations of records whose extracted metadata
+            is identical (e.g. of several versions of a dataset), building
+            only dataset id, version and provenance anew. Applies to
+            we_cff, metalad_studyminimeta and datacite_gin records""",
+        ),
+        translation_cache=Parameter(
+            args=("--translation-cache",),
+            metavar="PATH",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""SQLite database in which reusable translations are
+            stored (created if needed), instead of memory. Can be reused
+            across runs; translations made by other versions of this
+            extension are not reused. Implies --cache-translations""",
+        ),
+        merge=Parameter(
+            args=("--merge",),
+            action="store_true",
+            doc="""Merge translated records describing the same dataset
+            (same dataset id and version) into a single record, combining
+            their metadata sources""",
+        ),
+        jq_batch_size=Parameter(
+            args=("--jq-batch-size",),
+            constraints=EnsureInt(),
+            doc="""Number of consecutive records of a jq-based translator
+            (metalad_core, metalad_studyminimeta, datacite_gin) whose jq
+            programs are run together, as a single stream; 1 runs them
+            for each record separately""",
+        ),
+        engine=Parameter(
+            args=("--engine",),
+            constraints=EnsureChoice(*ENGINES),
+            doc="""Implementation used by jq-based translators
+            (metalad_core, metalad_studyminimeta, datacite_gin): jq
+            programs, as in the datalad-catalog workflow, or equivalent
+            native Python code""",
+        ),
+        field_engine=Parameter(
+            args=("--field-engine",),
+            action="append",
+            metavar="EXTRACTOR.FIELD=ENGINE",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Implementation used for a single field of a jq-based
+            translator, overriding --engine, e.g.
+            metalad_core.authors=native. Can be given multiple times""",
+        ),
+        benchmark_engines=Parameter(
+            args=("--benchmark-engines",),
+            action="store_true",
+            doc="""Instead of translating, time the jq and native
+            implementations of each field of the jq-based translators on
+            sample records from the input file, and check that they give
+            the same results. One result is reported per field""",
+        ),
+        serve=Parameter(
+            args=("--serve",),
+            metavar="SOCKET",
+            constraints=EnsureStr() | EnsureNone(),
+            doc="""Instead of translating the input file, keep running and
+            translate records sent over a Unix socket created at the given
+            path, so that DataLad and translators are set up only once.
+            Records are sent, and translated records received, as json
+            lines, e.g. with ``python -m datalad_wackyextra.server SOCKET
+            INFILE OUTFILE``. Options affecting translation
+            (--include-extractor, --exclude-extractor, --dedup-publications,
+            --publication-index, --cache-translations, --translation-cache,
+            --jq-batch-size, --engine, --field-engine)
+            apply to all requests; --merge, --shard, --dataset-id,
+            --line-range and --latest-only are not supported.
+            Stop the server with Ctrl-C""",
+        ),
+        benchmark_sample=Parameter(
+            args=("--benchmark-sample",),
+            constraints=EnsureInt(),
+            doc="""Maximum number of records per extractor used by
+            --benchmark-engines""",
+        ),
+        merge_buffer=Parameter(
+            args=("--merge-buffer",),
+            constraints=EnsureInt(),
+            doc="""Maximum number of translated records kept in memory
+            while merging; above that, records are sorted on disk""",
+        ),
+        jobs=Parameter(
+            args=("-J", "--jobs"),
+            constraints=EnsureInt(),
+            doc="""Number of worker processes translating records. Input is
+            cut into batches of about equal translation time, based on
+            record sizes and the throughput seen so far, which idle
+            workers take in turn, so that very large records do not hold
+            up the others; output keeps the input order. Each worker
+            deduplicates publications and translations on its own; cannot
+            be combined with --merge, --publication-index or
+            --translation-cache. Utilisation of each worker is reported
+            at the end""",
+        ),
+        io_queue_depth=Parameter(
+            args=("--io-queue-depth",),
+            constraints=EnsureInt(),
+            doc="""Input is read ahead, and output written (and
+            compressed), by background threads, so that waiting for slow
+            (e.g. network) file systems overlaps with translation. This
+            sets how many chunks of about 1 MiB each of them may hold;
+            0 reads and writes in between translating""",
         ),
     )
 
     @staticmethod
     @datasetmethod(name="wacky_translate")
     @eval_results
-    def __call__(infile, outfile=None):
-        translated_entries = []
-        with jsonlines.open(infile, "r") as jf:
-            for j in jf:
-                # iterates over json objects (lines) in the file
-                if j["extractor_name"] == "we_ris":
-                    t = RisTranslator(j)
-                elif j["extractor_name"] == "we_nbib":
-                    t = NbibTranslator(j)
-                elif j["extractor_name"] == "we_cff":
-                    t = CffTranslator(j)
-                elif j["extractor_name"] == "metalad_core" and j["type"] == "dataset":
-                    t = MetaladCoreTranslator(j)
-                elif j["extractor_name"] == "metalad_studyminimeta":
-                    t = MinimetaTranslator(j)
-                elif j["extractor_name"] == "datacite_gin":
-                    t = DataciteTranslator(j)
-                else:
-                    # TODO: what to do (incomplete results)
-                    pass
-                translated_entries.append(t.translate())
-                
-        with jsonlines.open(outfile, "a") as jf:
-            jf.write_all(translated_entries)
+    def __call__(infile=None, outfile=STDIO, compression_level=None,
+                 include_extractor=None, exclude_extractor=None,
+                 dataset_id=None, line_range=None, line_index=None,
+                 shard=None, latest_only=False, version_order=None,
+                 dedup_publications=False, publication_index=None,
+                 cache_translations=False, translation_cache=None,
+                 merge=False, merge_buffer=100000, jq_batch_size=1000,
+                 engine="jq", field_engine=None, benchmark_engines=False,
+                 benchmark_sample=1000, serve=None, io_queue_depth=8, jobs=1):
+        engines = EngineSelection(
+            engine, dict(map(parse_field_engine, field_engine or [])))
+        shard = parse_shard(shard) if shard is not None else None
+        if line_range is not None:
+            line_range = parse_line_range(line_range)
+        selector = RecordSelector(include_extractor, exclude_extractor)
+        if serve is not None:
+            if merge or shard is not None or dataset_id or \
+                    line_range is not None or latest_only:
+                raise ValueError(
+                    "--merge, --shard, --dataset-id, --line-range and "
+                    "--latest-only cannot be used with --serve")
+            yield from _serve(serve, selector, publication_index,
+                              dedup_publications, translation_cache,
+                              cache_translations, jq_batch_size, engines)
+            return
+        if infile is None:
+            raise ValueError("An input file is required")
+        if benchmark_engines:
+            if dataset_id or line_range is not None:
+                source = open_selection(
+                    infile, dataset_id, line_range, line_index)
+            else:
+                source = open_input(infile)
+            yield from _benchmark_results(
+                source, selector, shard, benchmark_sample)
+            return
+        worker_stats = translate_file(
+            infile,
+            outfile,
+            compression_level=compression_level,
+            selector=selector,
+            dataset_ids=dataset_id,
+            line_range=line_range,
+            line_index=line_index,
+            shard=shard,
+            latest_only=latest_only,
+            version_order=version_order,
+            dedup_publications=dedup_publications,
+            publication_index=publication_index,
+            cache_translations=cache_translations,
+            translation_cache=translation_cache,
+            merge=merge,
+            merge_buffer=merge_buffer,
+            batch_size=jq_batch_size,
+            engines=engines,
+            io_queue_depth=io_queue_depth,
+            jobs=jobs,
+        )
+        for stats in worker_stats or []:
+            yield get_status_dict(
+                action="translate_worker",
+                status="ok",
+                message=(
+                    "worker %d: %d records (%d bytes) in %d batches, busy "
+                    "%.2fs (%.0f%%)",
+                    stats["worker"], stats["records"], stats["bytes"],
+                    stats["batches"], stats["busy_time"],
+                    100 * stats["utilisation"],
+                ),
+                **stats,
+            )
 
         # TODO yield proper result
         yield get_status_dict(
             action="translate",
             status="ok"
         )
+
+    @staticmethod
+    def custom_result_renderer(res, **kwargs):
+        if res.get("action") == "benchmark_engines":
+            generic_result_renderer(res)
+            return
+        if kwargs.get("outfile") == STDIO:
+            # stdout carries translated records, do not mix in anything else
+            return
+        generic_result_renderer(res)
@@ -0,0 +1,490 @@
+"""Translation of metadata records, independent of DataLad
+
+This is the core of ``datalad wacky-translate``, which only adds the
+DataLad command interface, and of the standalone ``wackyextra-translate``
+script (see :mod:`.cli`). Importing it does not import DataLad;
+translators are imported when the first record they translate is
+encountered, so that only the translators needed for the input are
+imported. Translators of citation metadata (``we_ris``, ``we_nbib``,
+``we_crossref``) are datalad-catalog translators, and import it.
+"""
+
+__docformat__ = 'restructuredtext'
+
+from contextlib import contextmanager
+from functools import lru_cache
+from importlib import import_module
+from itertools import groupby, islice
+import os
+import sys
+
+import jsonlines
+
+from .background import prefetch, write_behind
+from .encoder import FragmentEncoder
+from .latest import open_latest, read_version_order
+from .lineindex import open_selection
+from .merge import merge_records
+from .parallel import translate_parallel
+from .peek import filter_lines
+from .sharding import select_shard
+from .streams import STDIO, open_input, open_output
+from .translators.cache import SQLiteTranslationCache, TranslationCache
+from .translators.jqbatch import benchmark
+from .translators.publications import (
+    PublicationIndex, SQLitePublicationIndex
+)
+from .translators.sharing import unshare
+
+
+@lru_cache(maxsize=None)
+def _translator(module, name):
+    """Return the instance of a translator class, shared by all records
+
+    The class is imported from a module of the translators package on
+    first use. Translators are stateless, so one instance of each
+    translates all records.
+    """
+    return getattr(
+        import_module(".translators." + module, __package__), name)()
+
+
+# extractor name -> (record type or None for any, translation function);
+# translation functions take the record, an optional publication index and
+# an optional EngineSelection (used by jq-based translators)
+TRANSLATORS = {
+    "we_ris": (None, lambda j, pi, engines=None: _translator(
+        "citations", "RisTranslator").translate(j, pi, shared=True)),
+    "we_nbib": (None, lambda j, pi, engines=None: _translator(
+        "citations", "NbibTranslator").translate(j, pi, shared=True)),
+    "we_crossref": (None, lambda j, pi, engines=None: _translator(
+        "citations", "CrossrefTranslator").translate(j, pi, shared=True)),
+    "we_cff": (None, lambda j, pi, engines=None: _translator(
+        "cff", "CffTranslator").translate(j)),
+    "metalad_core": ("dataset", lambda j, pi, engines=None: _translator(
+        "core", "MetaladCoreTranslator").translate(j, engines)),
+    "metalad_studyminimeta": (None, lambda j, pi, engines=None: _translator(
+        "minimeta", "MinimetaTranslator").translate(j, engines)),
+    "datacite_gin": (None, lambda j, pi, engines=None: _translator(
+        "datacite", "DataciteTranslator").translate(j, engines)),
+}
+
+# extractor name -> (module, class) of a translator (a JqTranslator) which
+# can translate many records at once, running its jq programs in a single
+# batch
+BATCH_TRANSLATORS = {
+    "metalad_core": ("core", "MetaladCoreTranslator"),
+    "metalad_studyminimeta": ("minimeta", "MinimetaTranslator"),
+    "datacite_gin": ("datacite", "DataciteTranslator"),
+}
+
+
+def get_batch_translator(extractor_name):
+    """Return the batch translator (instance) for an extractor, or None"""
+    try:
+        return _translator(*BATCH_TRANSLATORS[extractor_name])
+    except KeyError:
+        return None
+
+
+def can_translate(extractor_name, record_type):
+    """Report whether a translator exists for the given kind of record"""
+    try:
+        supported_type, _ = TRANSLATORS[extractor_name]
+    except KeyError:
+        return False
+    return supported_type is None or supported_type == record_type
+
+
+def translate_record(j, publication_index=None, translation_cache=None,
+                     engines=None, shared=False):
+    """Translate a single metadata record
+
+    Returns the translated record, or None if no translator
+    is available for the given record. If a publication index is
+    given, publications are deduplicated with it. If a translation
+    cache is given, translations of records with the same content are
+    reused (see :mod:`.translators.cache`). ``engines`` is an
+    EngineSelection for jq-based translators (see
+    :mod:`.translators.engines`), jq for all fields by default. Unless
+    ``shared`` is true, the translated record shares no objects with
+    other records (see :mod:`.translators.sharing`).
+    """
+    if not can_translate(j["extractor_name"], j["type"]):
+        # TODO: what to do (incomplete results)
+        return None
+    key = translation_cache.get_key(j) if translation_cache is not None \
+        else None
+    if key is not None:
+        translated = translation_cache.lookup(key, j)
+        if translated is not None:
+            return _deduplicate(translated, publication_index, shared)
+    _, translate = TRANSLATORS[j["extractor_name"]]
+    translated = translate(j, publication_index, engines)
+    if key is not None:
+        translation_cache.store(key, translated)
+    return _deduplicate(translated, publication_index, shared)
+
+
+def _deduplicate(translated, publication_index, shared):
+    if publication_index is not None and translated.get("publications"):
+        translated["publications"] = publication_index.deduplicate(
+            translated["publications"])
+    return translated if shared else unshare(translated)
+
+
+def _translate_batch(translator, batch, translation_cache, engines):
+    """Translate a batch of records with a batch translator
+
+    Returns translated records, or None for records which cannot be
+    translated.
+    """
+    results = [None] * len(batch)
+    keys = [None] * len(batch)
+    pending = []  # positions of records to translate
+    for i, j in enumerate(batch):
+        if not can_translate(j["extractor_name"], j["type"]):
+            continue
+        if translation_cache is not None:
+            keys[i] = translation_cache.get_key(j)
+            if keys[i] is not None:
+                results[i] = translation_cache.lookup(keys[i], j)
+                if results[i] is not None:
+                    continue
+        pending.append(i)
+    translated = translator.translate_many(
+        [batch[i] for i in pending], engines)
+    for i, t in zip(pending, translated):
+        results[i] = t
+        if keys[i] is not None:
+            translation_cache.store(keys[i], t)
+    return results
+
+
+def translate_records(records, publication_index=None, batch_size=1000,
+                      translation_cache=None, engines=None, shared=False):
+    """Translate metadata records, in batches where possible
+
+    Consecutive records of an extractor listed in BATCH_TRANSLATORS are
+    translated in batches of up to batch_size records (see
+    :mod:`.translators.jqbatch`), others one by one. Yields translated
+    records (or None, see :func:`translate_record`, also for the other
+    parameters) in input order.
+    """
+    for extractor_name, group in groupby(
+            records, key=lambda j: j["extractor_name"]):
+        translator = get_batch_translator(extractor_name)
+        if translator is None or batch_size <= 1:
+            for j in group:
+                yield translate_record(
+                    j, publication_index, translation_cache, engines, shared)
+            continue
+        while True:
+            batch = list(islice(group, batch_size))
+            if not batch:
+                break
+            for translated in _translate_batch(
+                    translator, batch, translation_cache, engines):
+                yield _deduplicate(translated, publication_index, shared) \
+                    if translated is not None else None
+
+
+def benchmark_engines(records, sample_size=1000):
+    """Compare jq and native engines of jq-based translators
+
+    Up to sample_size translatable records of each extractor in
+    BATCH_TRANSLATORS are taken from records. Yields, for each
+    extractor found and each of its fields, a dict with extractor_name
+    and the report of :func:`.translators.jqbatch.benchmark`.
+    """
+    samples = {name: [] for name in BATCH_TRANSLATORS}
+    for j in records:
+        sample = samples.get(j["extractor_name"])
+        if sample is not None and len(sample) < sample_size and \
+                can_translate(j["extractor_name"], j["type"]):
+            sample.append(j)
+    for extractor_name, sample in samples.items():
+        if not sample:
+            continue
+        translator = get_batch_translator(extractor_name)
+        for report in benchmark(translator, sample):
+            yield dict(report, extractor_name=extractor_name,
+                       records=len(sample))
+
+
+def translate_lines(lines, selector, publication_index=None, batch_size=1000,
+                    translation_cache=None, engines=None, shared=False):
+    """Decode json lines and translate records chosen by a RecordSelector
+
+    Lines of records which are not selected are dropped before being
+    decoded. See :func:`translate_records` for the other parameters.
+    """
+    lines = filter_lines(lines, selector.keys, selector)
+    return translate_records(
+        (j for j in jsonlines.Reader(lines) if selector(j)),
+        publication_index,
+        batch_size,
+        translation_cache,
+        engines,
+        shared,
+    )
+
+
+class RecordSelector:
+    """Decide whether a record should be translated, based on its kind
+
+    Records are selected if a translator is available for them and if
+    their extractor is included (when inclusions are given) and not
+    excluded.
+    """
+    keys = ("extractor_name", "type")
+
+    def __init__(self, include=None, exclude=None):
+        self.include = set(include) if include else None
+        self.exclude = set(exclude) if exclude else set()
+
+    def __call__(self, fields):
+        """Check a dict with (at least) extractor name and record type"""
+        extractor_name = fields.get("extractor_name")
+        if self.include is not None and extractor_name not in self.include:
+            return False
+        if extractor_name in self.exclude:
+            return False
+        return can_translate(extractor_name, fields.get("type"))
+
+
+def open_publication_index(path=None, dedup_publications=False):
+    """Return the publication index to use for translation, or None
+
+    Parameters
+    ----------
+    path: str, optional
+      SQLite database storing the index.
+    dedup_publications: bool
+      Use an in-memory index, if no path is given.
+    """
+    if path is not None:
+        return SQLitePublicationIndex(path)
+    if dedup_publications:
+        return PublicationIndex()
+    return None
+
+
+def open_translation_cache(path=None, cache_translations=False):
+    """Return the translation cache to use, or None
+
+    Parameters
+    ----------
+    path: str, optional
+      SQLite database storing the cache.
+    cache_translations: bool
+      Use an in-memory cache, if no path is given.
+    """
+    if path is not None:
+        return SQLiteTranslationCache(path)
+    if cache_translations:
+        return TranslationCache()
+    return None
+
+
+@contextmanager
+def _open_indexes(dedup_publications, publication_index, cache_translations,
+                  translation_cache):
+    """Open publication index and translation cache, close them after use"""
+    index = open_publication_index(publication_index, dedup_publications)
+    try:
+        cache = open_translation_cache(translation_cache, cache_translations)
+        try:
+            yield index, cache
+        finally:
+            if cache is not None:
+                cache.close()
+    finally:
+        if index is not None:
+            index.close()
+
+
+def iter_translate(records, selector=None, dedup_publications=False,
+                   publication_index=None, cache_translations=False,
+                   translation_cache=None, merge=False, merge_buffer=100000,
+                   batch_size=1000, engines=None):
+    """Translate metadata records lazily, yielding translated records
+
+    Translation happens as translated records are requested, so the
+    output can be passed on directly (e.g. to datalad-catalog), without
+    writing it to a file.
+
+    Parameters
+    ----------
+    records: iterable of dict, or str or Path
+      Metadata records, or a json lines file with metadata records
+      (see :func:`.streams.open_input`).
+    selector: RecordSelector, optional
+      Records to translate; by default all which can be translated.
+      Other records are skipped.
+    dedup_publications, publication_index:
+      See :func:`open_publication_index`.
+    cache_translations, translation_cache:
+      See :func:`open_translation_cache`.
+    merge: bool
+      Merge records of the same dataset, see :mod:`.merge`.
+    merge_buffer: int
+      Maximum number of records merged in memory.
+    batch_size: int
+      See :func:`translate_records`; records are translated (and
+      records from the input consumed) a batch at a time.
+    engines: EngineSelection, optional
+      Engines used by jq-based translators (see
+      :mod:`.translators.engines`); jq for all fields by default.
+
+    Yields
+    ------
+    dict
+      Translated records.
+    """
+    if selector is None:
+        selector = RecordSelector()
+    with _open_indexes(dedup_publications, publication_index,
+                       cache_translations, translation_cache) as (index, cache):
+        if isinstance(records, (str, os.PathLike)):
+            with open_input(records) as fin:
+                yield from _maybe_merge(
+                    translate_lines(
+                        fin, selector, index, batch_size, cache, engines),
+                    merge, merge_buffer)
+        else:
+            yield from _maybe_merge(
+                translate_records(
+                    (j for j in records if selector(j)), index, batch_size,
+                    cache, engines),
+                merge, merge_buffer)
+
+
+def _maybe_merge(translated_entries, merge, merge_buffer):
+    if merge:
+        return merge_records(translated_entries, max_records=merge_buffer)
+    return translated_entries
+
+
+def translate_file(infile, outfile=STDIO, compression_level=None,
+                   selector=None, dataset_ids=None, line_range=None,
+                   line_index=None, shard=None, dedup_publications=False,
+                   publication_index=None, cache_translations=False,
+                   translation_cache=None, merge=False, merge_buffer=100000,
+                   batch_size=1000, latest_only=False, version_order=None,
+                   io_queue_depth=8, jobs=1, engines=None):
+    """Translate metadata records from a json lines file into another
+
+    Parameters
+    ----------
+    infile, outfile: str or Path
+      Input and output files, see :func:`.streams.open_input` and
+      :func:`.streams.open_output`; '-' for stdin/stdout.
+    compression_level: int, optional
+      Compression level for compressed output.
+    selector: RecordSelector, optional
+      Records to translate; by default all which can be translated.
+    dataset_ids: list of str, optional
+      Only translate records of these datasets (see :mod:`.lineindex`).
+    line_range: tuple, optional
+      Only translate records from these lines (see :mod:`.lineindex`).
+    line_index: str or Path, optional
+      Index used to select datasets or lines; next to the input file by
+      default.
+    shard: tuple, optional
+      Only translate records of shard (index, count), see
+      :mod:`.sharding`.
+    dedup_publications, publication_index:
+      See :func:`open_publication_index`.
+    cache_translations, translation_cache:
+      See :func:`open_translation_cache`.
+    merge: bool
+      Merge records of the same dataset, see :mod:`.merge`.
+    merge_buffer: int
+      Maximum number of records merged in memory.
+    batch_size: int
+      See :func:`translate_records`.
+    engines: EngineSelection, optional
+      Engines used by jq-based translators (see
+      :mod:`.translators.engines`); jq for all fields by default.
+    latest_only: bool
+      Only translate the latest record of each dataset and extractor
+      (see :mod:`.latest`). Cannot be combined with ``dataset_ids`` or
+      ``line_range``.
+    version_order: str or Path, optional
+      File listing dataset versions from oldest to newest, used to find
+      the latest records (see :func:`.latest.read_version_order`).
+    io_queue_depth: int
+      Number of chunks of input read ahead, and of output not yet
+      written, by background threads (see :mod:`.background`); 0 reads
+      and writes in the translating thread.
+    jobs: int
+      Number of worker processes translating records (see
+      :mod:`.parallel`); with more than one, publications and
+      translations are deduplicated in memory by each worker, and
+      ``merge``, ``publication_index`` and ``translation_cache`` are not
+      supported.
+
+    Returns
+    -------
+    list of dict or None
+      With several jobs, stats of each worker, see
+      :func:`.parallel.translate_parallel`.
+    """
+    if selector is None:
+        selector = RecordSelector()
+    parallel = jobs > 1
+    if parallel and (merge or publication_index is not None
+                     or translation_cache is not None):
+        raise ValueError(
+            "Merging, and publication indexes or translation caches stored "
+            "in files, cannot be used with several jobs")
+    if latest_only:
+        if dataset_ids or line_range is not None:
+            raise ValueError(
+                "Selecting the latest records cannot be combined with "
+                "selecting datasets or lines")
+        if version_order is not None:
+            version_order = read_version_order(version_order)
+        source = open_latest(infile, selector, version_order)
+    elif dataset_ids or line_range is not None:
+        source = open_selection(infile, dataset_ids, line_range, line_index)
+    else:
+        source = open_input(infile)
+    stats = None
+    try:
+        # with several jobs, workers deduplicate on their own
+        with _open_indexes(dedup_publications and not parallel,
+                           publication_index,
+                           cache_translations and not parallel,
+                           translation_cache) as \
+                (index, cache), \
+                prefetch(source, io_queue_depth) as lines, \
+                open_output(outfile, compression_level) as fout, \
+                write_behind(fout, io_queue_depth) as out, \
+                jsonlines.Writer(
+                    out,
+                    flush=str(outfile) == STDIO,
+                    dumps=FragmentEncoder().encode,
+                ) as writer:
+            if shard is not None:
+                lines = select_shard(lines, *shard)
+            if parallel:
+                stats = translate_parallel(
+                    lines, out, jobs, selector, dedup_publications,
+                    cache_translations, batch_size, engines,
+                    flush=str(outfile) == STDIO)
+            else:
+                writer.write_all(_maybe_merge(
+                    translate_lines(
+                        lines, selector, index, batch_size, cache, engines,
+                        shared=True),
+                    merge, merge_buffer))
+    except BrokenPipeError:
+        if str(outfile) != STDIO:
+            raise
+        # the reading end of the pipe went away (e.g. `head`), nobody
+        # is listening anymore; silence any further writes to stdout
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    return stats
@@ -0,0 +1,52 @@
+"""Author normalisation shared by translators
+
+Authors are the most repetitive part of metadata: the same people appear
+in many records, and large consortium papers list thousands of them.
+:func:`make_author` builds catalog author dicts from raw values and
+caches them, keyed by those values, so that each distinct author is
+built once and then shared (see :mod:`.sharing`).
+"""
+
+from functools import lru_cache
+
+_ORCID_HOST = "orcid.org/"
+
+
+@lru_cache(maxsize=65536)
+def get_orcid(value):
+    """Return a bare ORCID (0000-0000-0000-0000) from an id or url"""
+    value = value.strip()
+    pos = value.rfind(_ORCID_HOST)
+    if pos >= 0:
+        value = value[pos + len(_ORCID_HOST):]
+    return value.strip("/")
+
+
+@lru_cache(maxsize=65536)
+def make_author(name=None, given_name=None, family_name=None, email=None,
+                honorific_suffix=None, identifier=None):
+    """Return an author dict as expected by the catalog
+
+    Values which are None are left out.
+
+    Parameters
+    ----------
+    identifier: tuple, optional
+      Identifier type and value, e.g. ``("ORCID", "0000-0002-...")``.
+    """
+    author = {}
+    if name is not None:
+        author["name"] = name
+    if given_name is not None:
+        author["givenName"] = given_name
+    if family_name is not None:
+        author["familyName"] = family_name
+    if email is not None:
+        author["email"] = email
+    if honorific_suffix is not None:
+        author["honorificSuffix"] = honorific_suffix
+    if identifier is not None:
+        author["identifiers"] = [
+            {"type": identifier[0], "identifier": identifier[1]}
+        ]
+    return author
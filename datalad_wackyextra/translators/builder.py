@@ -0,0 +1,14 @@
+"""Helpers for building translated records
+
+The catalog schema does not allow null values, so translators leave out
+fields for which they have no value. Rather than building a record and
+then copying it without the None values (two dicts per record), records
+are built once and None values are removed in place.
+"""
+
+
+def drop_none(record):
+    """Remove keys with None values from a dict, in place, and return it"""
+    for key in [k for k, v in record.items() if v is None]:
+        del record[key]
+    return record
@@ -0,0 +1,147 @@
+"""Reuse of translations of identical extracted metadata
+
+Across versions of a dataset (and across its forks), the metadata
+extracted by some extractors is often identical, even though the
+dataset version differs. The translation of such a record consists of
+an envelope (record type, dataset id and version, and provenance of
+the extractor run) and a body which depends only on the extracted
+metadata. A translation cache keeps bodies, keyed by a hash of the
+canonical JSON of the extracted metadata, the extractor name and the
+version of this package (so that a new version does not reuse
+translations made by an old one). For a record with the same content,
+only the envelope is built anew.
+
+:class:`TranslationCache` keeps bodies in memory;
+:class:`SQLiteTranslationCache` stores them in an SQLite database, which
+can be shared between runs.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+
+from .. import __version__
+from .provenance import get_extractors_used, get_metadata_source
+
+# extractors whose translation depends only on the extracted metadata
+CACHED_EXTRACTORS = frozenset(
+    ("we_cff", "metalad_studyminimeta", "datacite_gin"))
+
+ENVELOPE_KEYS = ("type", "dataset_id", "dataset_version")
+
+# provenance keys, and how to build their values for a record
+PROVENANCE = {
+    "extractors_used": get_extractors_used,
+    "metadata_sources": get_metadata_source,
+}
+
+
+def get_content_key(record, version=__version__):
+    """Return the key under which the translation of a record is cached"""
+    canonical = json.dumps(
+        [version, record["extractor_name"], record["extracted_metadata"]],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """In-memory cache of translation bodies, keyed by content
+
+    Parameters
+    ----------
+    version: str
+      Version of the translators, part of the keys.
+    """
+
+    def __init__(self, version=__version__):
+        self.version = version
+        self._bodies = {}
+
+    def get(self, key):
+        """Return the body cached under key, or None"""
+        return self._bodies.get(key)
+
+    def put(self, key, body):
+        self._bodies[key] = body
+
+    def get_key(self, record):
+        """Return the cache key of a record, or None if not cacheable"""
+        if record["extractor_name"] not in CACHED_EXTRACTORS:
+            return None
+        return get_content_key(record, self.version)
+
+    def lookup(self, key, record):
+        """Return the cached translation of a record, or None
+
+        The envelope is built from the record, the body is shared with
+        other records of the same content.
+        """
+        body = self.get(key)
+        if body is None:
+            return None
+        translated = {k: record[k] for k in ENVELOPE_KEYS}
+        for k, v in body.items():
+            translated[k] = PROVENANCE[k](record) if k in PROVENANCE else v
+        return translated
+
+    def store(self, key, translated):
+        """Cache the body of a translated record"""
+        # provenance values are left out, keeping their place
+        self.put(key, {
+            k: None if k in PROVENANCE else v
+            for k, v in translated.items() if k not in ENVELOPE_KEYS
+        })
+
+    def close(self):
+        pass
+
+
+class SQLiteTranslationCache(TranslationCache):
+    """Translation cache stored in an SQLite database
+
+    Recently used bodies are additionally kept in memory.
+    """
+
+    def __init__(self, path, version=__version__, cache_size=10000):
+        super().__init__(version)
+        self._bodies = OrderedDict()
+        self._cache_size = cache_size
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translations "
+            "(key TEXT PRIMARY KEY, body TEXT)"
+        )
+
+    def _remember(self, key, body):
+        self._bodies[key] = body
+        if len(self._bodies) > self._cache_size:
+            self._bodies.popitem(last=False)
+
+    def get(self, key):
+        body = self._bodies.get(key)
+        if body is not None:
+            self._bodies.move_to_end(key)
+            return body
+        row = self._db.execute(
+            "SELECT body FROM translations WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        body = json.loads(row[0])
+        self._remember(key, body)
+        return body
+
+    def put(self, key, body):
+        self._db.execute(
+            "INSERT OR IGNORE INTO translations VALUES (?, ?)",
+            (key, json.dumps(body)),
+        )
+        self._remember(key, body)
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
@@ -1,139 +1,181 @@
-from collections import UserDict
+"""Translation of metadata extracted with we_cff to the catalog schema
 
-class NoNoneDict(UserDict):
-    """A dictionary which ignores setting when value is None
+:class:`CffTranslator` is the single CFF translation engine; it is used
+directly by ``wacky-translate``, and by the datalad-catalog translator
+registered in :mod:`.cff_translator`.
+"""
 
-    The underlying "regular" dict can be obtained as `.data` attribute.
-    """
-    def __setitem__(self, key, item):
-        if item is not None:
-            super().__setitem__(key, item)
+from . import spdx
+from .authors import get_orcid, make_author
+from .builder import drop_none
+from .doi import get_doi_url
+from .context import RecordContext
+from .provenance import get_metadata_source
 
 
 class CffTranslator:
-    def __init__(self, metadata_record):
-        self.metadata_record = metadata_record
-        self.extracted_metadata = self.metadata_record["extracted_metadata"]
-
-    def get_name(self):
-        return self.extracted_metadata.get("title", "")  # obligatory, must be string
+    """Translator for we_cff
 
-    def get_description(self):
-        return self.extracted_metadata.get("abstract")
+    Instances are stateless, one can translate any number of records.
+    """
 
-    def get_doi(self):
-        """Get a single DOI for the dataset
+    # CFF reference types, and their names as used by other translators
+    reference_type_map = {
+        "article": "Journal Article",
+        "book": "Book",
+        "chapter": "Book Section",
+        "conference-paper": "Conference Paper",
+        "data": "Dataset",
+        "generic": "Generic",
+        "report": "Report",
+        "software": "Computer program",
+        "software-code": "Computer program",
+        "thesis": "Thesis",
+    }
+
+    @staticmethod
+    def _get_doi(cff):
+        """Get a single DOI from a CFF file or reference
 
         Note: CFF allows one or several DOIs stored in "identifiers" array,
         or a top-level "doi" field as a shorthand when there is just one.
         """
         # first, try the top-level doi
-        if self.extracted_metadata.get("doi") is not None:
-            return "https://doi.org/" + self.extracted_metadata.get("doi")
-        
+        if cff.get("doi") is not None:
+            return get_doi_url(cff.get("doi"))
+
         # go through identifiers, stopping at the first doi
-        identifiers = self.extracted_metadata.get("identifiers")
+        identifiers = cff.get("identifiers")
         if identifiers is not None:
             for identifier in identifiers:
                 if identifier["type"] == "doi":
-                    return "https://doi.org/" + identifier["value"]
+                    return get_doi_url(identifier["value"])
 
         # finally, give up
         return None
 
-    def get_license(self):
-        """Get a license name and URL as expected by the catalog
-
-        Note: CFF allows a string or list of spdx.org identifiers,
-        and urls are expected only for non-standard licenses.
-
-        TODO: We could include the spdx data as a json file
-        for maximum correctness with names and urls.
-        """
-        cff_license = self.extracted_metadata.get("license")
-        cff_url = self.extracted_metadata.get("license-url")
-        if cff_license is None:
-            cat_license = None
-        elif isinstance(cff_license, str):
-            # single license
-            if cff_url is None:
-                # generate a spdx.org url
-                cff_url = "https://spdx.org/licenses/{}.html".format(cff_license)
-            cat_license = {
-                "name": cff_license,
-                "url": cff_url
-            }
-        elif isinstance(cff_license, list):
-            # multiple licenses
-            cat_license = {
-                "name": " OR ".join(cff_license),
-                "url": cff_url if cff_url is not None else "",
-            }
-        return cat_license
-
-    def get_authors(self):
+    @staticmethod
+    def _get_authors(cff_authors):
         cat_authors = []
-        for cff_author in self.extracted_metadata.get("authors"):
-            author = NoNoneDict()  # include only properties actually present
-            author["name"] = cff_author.get("name")  # in cff, defined for entity, not person
-            author["givenName"] = cff_author.get("given-names")
+        for cff_author in cff_authors:
             # particle & suffix are not in catalog schema, merge them into familyName
+            family_name = None
             if cff_author.get("family-names") is not None:
-                author["familyName"] = " ".join(
+                family_name = " ".join(
                     [
                         cff_author.get("name-particle", ""),
                         cff_author.get("family-names"),
                         cff_author.get("name-suffix", ""),
                     ]
                 ).strip()
-            author["email"] = cff_author.get("email")
-            if cff_author.get("orcid") is not None:
-                orcid = {"type": "ORCID", "identifier": cff_author.get("orcid")}
-                # may need to strip the https://orcid.org part
-                author["identifiers"] = [orcid]
-            cat_authors.append(author.data)
+            orcid = cff_author.get("orcid")
+            cat_authors.append(
+                make_author(  # include only properties actually present
+                    name=cff_author.get("name"),  # in cff, defined for entity, not person
+                    given_name=cff_author.get("given-names"),
+                    family_name=family_name,
+                    email=cff_author.get("email"),
+                    identifier=(
+                        ("ORCID", get_orcid(orcid)) if orcid is not None
+                        else None
+                    ),
+                )
+            )
         return cat_authors
 
-    def get_keywords(self):
-        return self.extracted_metadata.get("keywords")
+    def get_name(self, ctx):
+        return ctx.metadata.get("title", "")  # obligatory, must be string
 
-    def get_publications(self):
-        # TODO: get the content from the references field
-        pass
+    def get_description(self, ctx):
+        return ctx.metadata.get("abstract")
 
-    def get_extractors_used(self):
-        keys = [
-            "extractor_name", "extractor_version",
-            "extraction_parameter", "extraction_time",
-            "agent_name", "agent_email",
-        ]
-        return [{k: self.metadata_record[k] for k in keys}]
+    def get_doi(self, ctx):
+        return self._get_doi(ctx.metadata)
 
-    def translate(self):
-        
+    def get_license(self, ctx):
+        """Get a license name and URL as expected by the catalog
+
+        Note: CFF allows a string or list of spdx.org identifiers,
+        and urls are expected only for non-standard licenses. Several
+        licenses are combined into a single "OR" expression. Names
+        and urls of known licenses are taken from the SPDX license list.
+        """
+        cff_license = ctx.metadata.get("license")
+        cff_url = ctx.metadata.get("license-url")
+        if cff_license is None:
+            return None
+        if isinstance(cff_license, list):
+            # multiple licenses
+            cff_license = " OR ".join(cff_license)
+        return spdx.get_license(cff_license, cff_url)
+
+    def get_authors(self, ctx):
+        return self._get_authors(ctx.metadata.get("authors"))
+
+    def get_keywords(self, ctx):
+        return ctx.metadata.get("keywords")
+
+    def translate_reference(self, ref):
+        """Translate a CFF reference into a catalog publication"""
+        cff_type = ref.get("type", "generic")
+        date_published = ref.get("year")
+        if date_published is None and ref.get("date-published") is not None:
+            # yyyy-mm-dd, keep the year like other translators do
+            date_published = str(ref["date-published"])[:4]
+        outlet = ref.get("journal") or ref.get("collection-title")
+        if outlet is None:
+            for entity in ("conference", "publisher"):
+                if ref.get(entity) is not None:
+                    outlet = ref[entity].get("name")
+                    break
+        publication = {
+            "type": self.reference_type_map.get(
+                cff_type, "Other ({})".format(cff_type)),
+            "title": ref.get("title"),
+            "doi": self._get_doi(ref) or "",
+            "datePublished": date_published,
+            "authors": self._get_authors(ref.get("authors", [])),
+            "publicationOutlet": outlet,
+        }
+        return drop_none(publication)
+
+    def get_publications(self, ctx):
+        references = ctx.metadata.get("references")
+        if not references:
+            return None
+        return [self.translate_reference(ref) for ref in references]
+
+    def get_metadata_source(self, ctx):
+        return get_metadata_source(ctx.record)
+
+    def translate(self, metadata_record):
+        ctx = RecordContext(metadata_record)
         translated_record = {
-            "type": self.metadata_record["type"],
-            "dataset_id": self.metadata_record["dataset_id"],
-            "dataset_version": self.metadata_record["dataset_version"],
-            "name": self.get_name(),
-            "description": self.get_description(),
-            "doi": self.get_doi(),
-            "license": self.get_license(),
-            "authors": self.get_authors(),
-            "keywords": self.get_keywords(),
-            "extractors_used": self.get_extractors_used(),
+            "type": metadata_record["type"],
+            "dataset_id": metadata_record["dataset_id"],
+            "dataset_version": metadata_record["dataset_version"],
+            "name": self.get_name(ctx),
+            "description": self.get_description(ctx),
+            "doi": self.get_doi(ctx),
+            "license": self.get_license(ctx),
+            "authors": self.get_authors(ctx),
+            "keywords": self.get_keywords(ctx),
+            "publications": self.get_publications(ctx),
+            "metadata_sources": self.get_metadata_source(ctx),
         }
 
-        return {k: v for k, v in translated_record.items() if v is not None}
+        return drop_none(translated_record)
+
 
 if __name__ == "__main__":
     import json
     import sys
-    
+
     fname = sys.argv[1]
+    translator = CffTranslator()
     with open(fname) as jf:
         for line in jf:
             j = json.loads(line)
             if j["extractor_name"] == "we_cff":
-                t = CffTranslator(j).translate()
+                t = translator.translate(j)
                 print(json.dumps(t))
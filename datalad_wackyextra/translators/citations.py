@@ -1,19 +1,27 @@
 import json
 from packaging import version
 import re
-from urllib.parse import urlparse
 
 from datalad_catalog.translate import TranslatorBase
 
+from .authors import get_orcid, make_author
+from .builder import drop_none
+from .doi import get_doi_url
+from .provenance import get_extractors_used, get_metadata_source
+from .publications import get_publication_key
+from .sharing import unshare
+
 class CitationTranslator:
     """Base class for translators dealing with publications metadata
 
     Derived classes should implement the get_* methods to provide values
-    in accordance with the datalad-catalog schema.
-    """
+    in accordance with the datalad-catalog schema. Instances are
+    stateless, one can translate any number of records.
 
-    def __init__(self):
-        self.metadata_record = None
+    If a publication index is given to :meth:`translate`, references
+    which were already translated (here or in other records) are taken
+    from the index instead of being translated again.
+    """
 
     @staticmethod
     def _getOneOf(d, *args):
@@ -49,55 +57,55 @@ class CitationTranslator:
         return "1.0.0"
 
 
-    def get_extractors_used(self):
-        keys = [
-            "extractor_name", "extractor_version",
-            "extraction_parameter", "extraction_time",
-            "agent_name", "agent_email",
-        ]
-        return [{k: self.metadata_record[k] for k in keys}]
-
-    def get_metadata_source(self):
-        result = {
-            "key_source_map": {},
-            "sources": [
-                {
-                    "source_name": self.metadata_record["extractor_name"],
-                    "source_version": self.metadata_record["extractor_version"],
-                    "source_parameter": self.metadata_record["extraction_parameter"],
-                    "source_time": self.metadata_record["extraction_time"],
-                    "agent_email": self.metadata_record["agent_email"],
-                    "agent_name": self.metadata_record["agent_name"],
-                }
-            ],
+    def get_extractors_used(self, metadata):
+        return get_extractors_used(metadata)
+
+    def get_metadata_source(self, metadata):
+        return get_metadata_source(metadata)
+
+    def translate_ref(self, ref):
+        translated = {
+            "type": self.get_type(ref),
+            "title": self.get_title(ref),
+            "doi": self.get_doi(ref),
+            "datePublished": self.get_date_published(ref),
+            "authors": self.get_authors(ref),
+            "publicationOutlet": self.get_publication_outlet(ref),
         }
-        return result
-
-    def translate(self, metadata):
-        self.metadata_record = metadata
-        refs = self.metadata_record["extracted_metadata"]["refs"]
-        publications = []
-        for ref in refs:
-            translated = {
-                "type": self.get_type(ref),
-                "title": self.get_title(ref),
-                "doi": self.get_doi(ref),
-                "datePublished": self.get_date_published(ref),
-                "authors": self.get_authors(ref),
-                "publicationOutlet": self.get_publication_outlet(ref),
-            }
-            publications.append(
-                {k: v for k, v in translated.items() if v is not None}
+        return drop_none(translated)
+
+    def get_publication_key(self, ref):
+        """Return the key under which the reference is indexed"""
+        key = get_publication_key(doi=self.get_doi(ref))
+        if key is None:
+            key = get_publication_key(
+                title=self.get_title(ref), year=self.get_date_published(ref)
             )
+        return key
+
+    def translate(self, metadata, publication_index=None, shared=False):
+        """Translate a record, see :mod:`.sharing` for ``shared``"""
+        refs = metadata["extracted_metadata"]["refs"]
+        if publication_index is None:
+            publications = [self.translate_ref(ref) for ref in refs]
+        else:
+            publications = [
+                publication_index.get_or_translate(
+                    self.get_publication_key(ref),
+                    lambda ref=ref: self.translate_ref(ref),
+                    type(self).__name__,
+                )
+                for ref in refs
+            ]
         translated_record = {
-            "type": self.metadata_record["type"],
-            "dataset_id": self.metadata_record["dataset_id"],
-            "dataset_version": self.metadata_record["dataset_version"],
+            "type": metadata["type"],
+            "dataset_id": metadata["dataset_id"],
+            "dataset_version": metadata["dataset_version"],
             "name": "",
             "publications": publications,
-            "metadata_sources": self.get_metadata_source(),
+            "metadata_sources": self.get_metadata_source(metadata),
         }
-        return translated_record
+        return translated_record if shared else unshare(translated_record)
 
 
 class RisTranslator(CitationTranslator, TranslatorBase):
@@ -141,17 +149,17 @@ class RisTranslator(CitationTranslator, TranslatorBase):
 
     def get_doi(self, ref):
         doi = ref.get("doi")
-        if doi is None:
-            return ""
-        prefix = "" if doi.startswith("http") else "https://doi.org/"
-        return prefix + doi
+        return get_doi_url(doi) if doi is not None else ""
 
 
     def get_date_published(self, ref):
         return self._getOneOf(ref, "year", "publication_year")
 
     def get_authors(self, ref):
-        return [{"name": x} for x in self._getOneOf(ref, "authors", "first_authors")]
+        return [
+            make_author(name=x)
+            for x in self._getOneOf(ref, "authors", "first_authors")
+        ]
 
     def get_publication_outlet(self, ref):
         return self._getOneOf(ref, "journal_name", "secondary_title")
@@ -202,7 +210,7 @@ class NbibTranslator(CitationTranslator, TranslatorBase):
 
     def get_doi(self, ref):
         doi = ref.get("doi")
-        return "https://doi.org/" + doi if doi is not None else ""
+        return get_doi_url(doi) if doi is not None else ""
 
     def get_date_published(self, ref):
         dp = ref.get("publication_date")
@@ -214,17 +222,19 @@ class NbibTranslator(CitationTranslator, TranslatorBase):
     def get_authors(self, ref):
         authors = []
         for author in ref.get("authors"):
-            a = {"name": author.get("author")}
-            try:
-                names = {
-                    "givenName": author["first_name"],
-                    "familyName": author["last_name"],
-                }
-                a.update(names)
-            except KeyError:
-                pass
+            first_name = author.get("first_name")
+            last_name = author.get("last_name")
+            if first_name is None or last_name is None:
+                # given and family name only make sense together
+                first_name = last_name = None
             # todo: try to add orcid
-            authors.append(a)
+            authors.append(
+                make_author(
+                    name=author.get("author"),
+                    given_name=first_name,
+                    family_name=last_name,
+                )
+            )
         return authors
 
     def get_publication_outlet(self, ref):
@@ -277,7 +287,7 @@ class CrossrefTranslator(CitationTranslator, TranslatorBase):
 
     def get_doi(self, ref):
         doi = ref.get("DOI")
-        return "https://doi.org/" + doi if doi is not None else ""
+        return get_doi_url(doi) if doi is not None else ""
 
     def get_date_published(self, ref):
         published = self._getOneOf(ref, "published", "published-print", "published-online")
@@ -288,19 +298,20 @@ class CrossrefTranslator(CitationTranslator, TranslatorBase):
     def get_authors(self, ref):
         authors = []
         for author in ref.get("author"):
-            a = {
-                "givenName": author.get("given", ""),
-                "familyName": author.get("family", ""),
-                "name": " ".join([author.get(x, "") for x in ("given", "family")]),
-            }
-            if (orcid := author.get("ORCID")) is not None:
-                a["identifiers"] = [
-                    {
-                        "type": "ORCID",
-                        "identifier": urlparse(orcid).path.lstrip("/"),
-                    }
-                ]
-            authors.append(a)
+            given = author.get("given", "")
+            family = author.get("family", "")
+            orcid = author.get("ORCID")
+            authors.append(
+                make_author(
+                    name=" ".join([given, family]),
+                    given_name=given,
+                    family_name=family,
+                    identifier=(
+                        ("ORCID", get_orcid(orcid)) if orcid is not None
+                        else None
+                    ),
+                )
+            )
         return authors
 
     def get_publication_outlet(self, ref):
@@ -0,0 +1,49 @@
+"""Per-record state of translators
+
+Translators are stateless: a single, long-lived instance of each
+translates all records, with ``translate(record)``. Whatever a
+translator needs to keep while translating one record lives in a
+:class:`RecordContext`, a small object created for that record.
+Values derived from the record, which several fields need, are
+computed when the first of them is emitted, and kept in the context.
+"""
+
+from .engines import DEFAULT_ENGINES
+
+
+class RecordContext:
+    """State of the translation of a single metadata record
+
+    Parameters
+    ----------
+    record: dict
+      Metadata record being translated.
+    jq_results: dict, optional
+      Precomputed results of jq programs for the record, see
+      :mod:`.jqbatch`.
+    engines: EngineSelection, optional
+      Engines used for fields of jq-based translators, see
+      :mod:`.engines`; jq for all fields by default.
+    """
+
+    __slots__ = ("record", "metadata", "jq_results", "engines", "_values")
+
+    def __init__(self, record, jq_results=None, engines=None):
+        self.record = record
+        self.metadata = record["extracted_metadata"]
+        self.jq_results = jq_results
+        self.engines = DEFAULT_ENGINES if engines is None else engines
+        self._values = None
+
+    def get(self, name, compute):
+        """Return a value derived from the record, computing it once
+
+        ``compute`` is called with the context on first use.
+        """
+        if self._values is None:
+            self._values = {}
+        try:
+            return self._values[name]
+        except KeyError:
+            value = self._values[name] = compute(self)
+            return value
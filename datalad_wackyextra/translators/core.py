@@ -1,79 +1,114 @@
-import jq
+from .builder import drop_none
+from .engines import get, has, iterate, select_first, strip_prefix
+from .jqbatch import JqTranslator
+from .provenance import get_extractors_used
 
-class MetaladCoreTranslator:
+
+class MetaladCoreTranslator(JqTranslator):
     """Translator for metalad_core
 
     Uses jq programs written by jsheunis for datalad-catalog workflow
     to translate some fields, but wraps them in a more verbose python logic.
     """
-    def __init__(self, metadata_record):
-        self.metadata_record = metadata_record
-        self.extracted_metadata = self.metadata_record["extracted_metadata"]
-        self.graph = self.extracted_metadata["@graph"]
-
-    def get_name(self):
-        """Return an empty string as name
-
-        Name is not a property of a DataLad dataset, but it is required
-        by the catalog. We return an empty string to satisfy validation.
-        """
-        return ""
-
-    def get_url(self):
-        program = (
+    extractor_name = "metalad_core"
+    jq_programs = {
+        "url": (
             ".[]? | select(.[\"@type\"] == \"Dataset\") | "
             "[.distribution[]? | select(has(\"url\")) | .url]"
-        )
-        return jq.first(program, self.graph)
-
-    def get_authors(self):
-        program = (
+        ),
+        "authors": (
             "[.[]? | select(.[\"@type\"]==\"agent\")] | "
             "map(del(.[\"@id\"], .[\"@type\"]))"
-        )
-        return jq.first(program, self.graph)
-
-    def get_subdatasets(self):
-        program = (
+        ),
+        "subdatasets": (
             ".[]? | select(.[\"@type\"] == \"Dataset\") | "
             "[.hasPart[]? | "
             "{\"dataset_id\": (.[\"identifier\"] // \"\" | "
             "sub(\"^datalad:\"; \"\")), \"dataset_version\": (.[\"@id\"] | "
             "sub(\"^datalad:\"; \"\")), \"dataset_path\": .[\"name\"], "
             "\"dirs_from_path\": []}]"
-        )
-        result = jq.first(program, self.graph)
-        return result if len(result) > 0 else None
+        ),
+    }
+
+    @staticmethod
+    def get_jq_input(metadata_record):
+        return metadata_record["extracted_metadata"]["@graph"]
+
+    @staticmethod
+    def native_url(graph):
+        dataset = select_first(iterate(graph), "@type", "Dataset")
+        return [
+            get(d, "url") for d in iterate(get(dataset, "distribution"))
+            if has(d, "url")
+        ]
 
-    def get_extractors_used(self):
-        keys = [
-            "extractor_name", "extractor_version",
-            "extraction_parameter", "extraction_time",
-            "agent_name", "agent_email",
+    @staticmethod
+    def native_authors(graph):
+        return [
+            {k: v for k, v in item.items() if k not in ("@id", "@type")}
+            for item in iterate(graph) if get(item, "@type") == "agent"
         ]
-        return [{k: self.metadata_record[k] for k in keys}]
 
-    def translate(self):
+    @staticmethod
+    def native_subdatasets(graph):
+        dataset = select_first(iterate(graph), "@type", "Dataset")
+        subdatasets = []
+        for part in iterate(get(dataset, "hasPart")):
+            identifier = get(part, "identifier")
+            if identifier is None or identifier is False:  # jq's //
+                identifier = ""
+            subdatasets.append({
+                "dataset_id": strip_prefix(identifier, "datalad:"),
+                "dataset_version": strip_prefix(get(part, "@id"), "datalad:"),
+                "dataset_path": get(part, "name"),
+                "dirs_from_path": [],
+            })
+        return subdatasets
+
+    def get_name(self, ctx):
+        """Return an empty string as name
+
+        Name is not a property of a DataLad dataset, but it is required
+        by the catalog. We return an empty string to satisfy validation.
+        """
+        return ""
+
+    def get_url(self, ctx):
+        return self.field(ctx, "url")
+
+    def get_authors(self, ctx):
+        return self.field(ctx, "authors")
+
+    def get_subdatasets(self, ctx):
+        result = self.field(ctx, "subdatasets")
+        return result if len(result) > 0 else None
+
+    def get_extractors_used(self, ctx):
+        return get_extractors_used(ctx.record)
+
+    def translate_context(self, ctx):
+        record = ctx.record
         translated_record = {
-            "type": self.metadata_record["type"],
-            "dataset_id": self.metadata_record["dataset_id"],
-            "dataset_version": self.metadata_record["dataset_version"],
-            "name": self.get_name(),
-            "url": self.get_url(),
-            "authors": self.get_authors(),
-            "subdatasets": self.get_subdatasets(),
-            "extractors_used": self.get_extractors_used(),
+            "type": record["type"],
+            "dataset_id": record["dataset_id"],
+            "dataset_version": record["dataset_version"],
+            "name": self.get_name(ctx),
+            "url": self.get_url(ctx),
+            "authors": self.get_authors(ctx),
+            "subdatasets": self.get_subdatasets(ctx),
+            "extractors_used": self.get_extractors_used(ctx),
         }
-        return {k: v for k, v in translated_record.items() if v is not None}
+        return drop_none(translated_record)
 
 if __name__ == "__main__":
     import json
     import sys
     
     fname = sys.argv[1]
+    translator = MetaladCoreTranslator()
     with open(fname) as jf:
         for line in jf:
             j = json.loads(line)
             if j["extractor_name"] == "metalad_core":  # & type==dataset
-                t = MetaladCoreTranslator(j).translate()
+                t = translator.translate(j)
                 print(json.dumps(t))
@@ -1,89 +1,128 @@
-import jq
+from . import spdx
+from .authors import make_author
+from .builder import drop_none
+from .doi import get_doi_url
+from .engines import get, iterate
+from .jqbatch import JqTranslator
+from .provenance import get_extractors_used
 
-class DataciteTranslator:
+class DataciteTranslator(JqTranslator):
     """Translator for datacite_gin
 
     Uses jq programs written by jsheunis for datalad-catalog workflow
     to translate some fields. Will not include empty values in its output.
     """
+    extractor_name = "datacite_gin"
+    jq_programs = {
+        "license": ".license | { \"name\": .name, \"url\": .url}",
+        "funding": (
+            "[.funding[]? as $element | "
+            "{\"name\": $element, \"identifier\": \"\", \"description\": \"\"}]"
+        ),
+        "publications": (
+            "[.references[]? as $pubin | "
+            "{\"type\":\"\", "
+            "\"title\":$pubin[\"citation\"], "
+            "\"doi\":$pubin[\"id\"], "
+            "\"datePublished\":\"\", "
+            "\"publicationOutlet\":\"\", "
+            "\"authors\": []}]"
+        ),
+    }
+
+    @staticmethod
+    def native_license(metadata):
+        license = get(metadata, "license")
+        return {"name": get(license, "name"), "url": get(license, "url")}
 
-    def __init__(self, metadata_record):
-        self.metadata_record = metadata_record
-        self.extracted_metadata = self.metadata_record["extracted_metadata"]
+    @staticmethod
+    def native_funding(metadata):
+        return [
+            {"name": element, "identifier": "", "description": ""}
+            for element in iterate(get(metadata, "funding"))
+        ]
 
-    def get_name(self):
-        return self.extracted_metadata.get("title", "")
+    @staticmethod
+    def native_publications(metadata):
+        return [
+            {
+                "type": "",
+                "title": get(ref, "citation"),
+                "doi": get(ref, "id"),
+                "datePublished": "",
+                "publicationOutlet": "",
+                "authors": [],
+            }
+            for ref in iterate(get(metadata, "references"))
+        ]
 
-    def get_description(self):
-        return self.extracted_metadata.get("description")
+    def get_name(self, ctx):
+        return ctx.metadata.get("title", "")
 
-    def get_license(self):
-        program = ".license | { \"name\": .name, \"url\": .url}"
-        result = jq.first(program, self.extracted_metadata)
-        # todo check for license info missing
-        return result if len(result) > 0 else None
+    def get_description(self, ctx):
+        return ctx.metadata.get("description")
 
-    def get_authors(self):
-        program = (
-            "[.authors[]? | "
-            "{\"name\":\"\", \"givenName\":.firstname, \"familyName\":.lastname"
-            ", \"email\":\"\", \"honorificSuffix\":\"\"} "
-            "+ if has(\"id\") then {\"identifiers\":[ "
-            "{\"type\":(.id | tostring | split(\":\") | .[0]),"
-            " \"identifier\":(.id | tostring | split(\":\") | .[1])}]} "
-            "else null end]"
-        )
-        result = jq.first(program, self.extracted_metadata)
+    def get_license(self, ctx):
+        """Get license name and url, normalised with the SPDX license list"""
+        result = self.field(ctx, "license")
+        if not result["name"]:
+            # a license given by its url only, or not at all
+            return {"url": result["url"]} if result["url"] else None
+        # names given as spdx ids are replaced with full names
+        return spdx.get_license(result["name"], result["url"])
+
+    def get_authors(self, ctx):
+        result = []
+        for author in ctx.metadata.get("authors", []):
+            identifier = None
+            if "id" in author:
+                # ids are given as type:value, e.g. ORCID:0000-0002-...
+                parts = str(author["id"]).split(":")
+                identifier = (parts[0], parts[1] if len(parts) > 1 else None)
+            result.append(
+                make_author(
+                    name="",
+                    given_name=author.get("firstname"),
+                    family_name=author.get("lastname"),
+                    email="",
+                    honorific_suffix="",
+                    identifier=identifier,
+                )
+            )
         return result if len(result) > 0 else None
 
-    def get_keywords(self):
-        return self.extracted_metadata.get("keywords")
+    def get_keywords(self, ctx):
+        return ctx.metadata.get("keywords")
 
-    def get_funding(self):
-        program = (
-            "[.funding[]? as $element | "
-            "{\"name\": $element, \"identifier\": \"\", \"description\": \"\"}]"
-        )
-        result = jq.first(program, self.extracted_metadata)
-        return result
+    def get_funding(self, ctx):
+        return self.field(ctx, "funding")
 
-    def get_publications(self):
-        program = (
-            "[.references[]? as $pubin | "
-            "{\"type\":\"\", "
-            "\"title\":$pubin[\"citation\"], "
-            "\"doi\":"
-            "($pubin[\"id\"] | sub(\"(?i)doi:\"; \"https://doi.org/\")), "
-            "\"datePublished\":\"\", "
-            "\"publicationOutlet\":\"\", "
-            "\"authors\": []}]"
-        )
-        result = jq.first(program, self.extracted_metadata)
+    def get_publications(self, ctx):
+        result = self.field(ctx, "publications")
+        for publication in result:
+            publication["doi"] = get_doi_url(publication["doi"]) or ""
         return result
 
-    def get_extractors_used(self):
-        keys = [
-            "extractor_name", "extractor_version",
-            "extraction_parameter", "extraction_time",
-            "agent_name", "agent_email",
-        ]
-        return [{k: self.metadata_record[k] for k in keys}]
+    def get_extractors_used(self, ctx):
+        return get_extractors_used(ctx.record)
 
-    def translate(self):
+    def translate_context(self, ctx):
+        record = ctx.record
         translated_record = {
-            "type": self.metadata_record["type"],
-            "dataset_id": self.metadata_record["dataset_id"],
-            "dataset_version": self.metadata_record["dataset_version"],
-            "name": self.get_name(),
-            "description": self.get_description(),
-            "authors": self.get_authors(),
-            "keywords": self.get_keywords(),
-            "funding": self.get_funding(),
-            "publications": self.get_publications(),
-            "extractors_used": self.get_extractors_used(),
+            "type": record["type"],
+            "dataset_id": record["dataset_id"],
+            "dataset_version": record["dataset_version"],
+            "name": self.get_name(ctx),
+            "description": self.get_description(ctx),
+            "license": self.get_license(ctx),
+            "authors": self.get_authors(ctx),
+            "keywords": self.get_keywords(ctx),
+            "funding": self.get_funding(ctx),
+            "publications": self.get_publications(ctx),
+            "extractors_used": self.get_extractors_used(ctx),
         }
 
-        return {k: v for k, v in translated_record.items() if v is not None}
+        return drop_none(translated_record)
 
 
 if __name__ == "__main__":
@@ -91,9 +130,10 @@ if __name__ == "__main__":
     import sys
     
     fname = sys.argv[1]
+    translator = DataciteTranslator()
     with open(fname) as jf:
         for line in jf:
             j = json.loads(line)
             if j["extractor_name"] == "datacite_gin":
-                t = DataciteTranslator(j).translate()
+                t = translator.translate(j)
                 print(json.dumps(t))
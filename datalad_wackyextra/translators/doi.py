@@ -0,0 +1,54 @@
+"""DOI normalisation shared by all translators
+
+DOIs appear in many forms in metadata: bare (``10.1000/xyz``), with a
+``doi:`` prefix, as ``http(s)://(dx.)doi.org/`` urls, sometimes URL-encoded,
+and in varying case (DOIs are case-insensitive). The catalog expects
+``https://doi.org/`` urls, which are produced here in a single canonical
+(lower case) form.
+
+Results are cached, and the returned strings are interned, so that a DOI
+cited by many records is represented by a single string object.
+"""
+
+from functools import lru_cache
+import re
+import sys
+from urllib.parse import unquote
+
+DOI_URL = "https://doi.org/"
+
+_PREFIX = re.compile(
+    r"\s*(?:doi:\s*|info:doi/|(?:https?://)?(?:dx\.|www\.)?doi\.org/)?",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=65536)
+def normalise_doi(value):
+    """Return a bare, lower case DOI, or None if value is not a DOI
+
+    Example: ``doi:10.1000/ABC`` -> ``10.1000/abc``
+    """
+    if not value:
+        return None
+    if "%" in value:
+        value = unquote(value)
+    doi = value[_PREFIX.match(value).end():].strip().lower()
+    if not doi.startswith("10.") or "/" not in doi:
+        return None
+    return sys.intern(doi)
+
+
+@lru_cache(maxsize=65536)
+def get_doi_url(value):
+    """Return a https://doi.org/ url for a DOI given in any form
+
+    Values which are not recognised as DOIs (e.g. other identifiers or
+    urls) are returned unchanged. Returns None for None.
+    """
+    if value is None:
+        return None
+    doi = normalise_doi(value)
+    if doi is None:
+        return value
+    return sys.intern(DOI_URL + doi)
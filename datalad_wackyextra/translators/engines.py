@@ -0,0 +1,123 @@
+"""Choice between jq programs and native Python for translator fields
+
+Fields of jq-based translators (see :mod:`.jqbatch`) have two
+implementations: a jq program, mirroring the datalad-catalog workflow,
+and a native Python one, which gives the same result. Which one is used
+is given by an :class:`EngineSelection`, with a default for all fields
+which can be overridden for single fields, given as
+``<extractor name>.<field>`` (e.g. ``metalad_core.url``).
+
+Native implementations follow jq semantics, including for unexpected
+input: the helpers below behave like their jq counterparts (``.[]?``,
+``.[]``, ``.key``, ``has``, ``sub``), and raise ValueError where jq
+would fail.
+"""
+
+import json
+
+ENGINES = ("jq", "native")
+
+
+class EngineSelection:
+    """Engines selected for the fields of jq-based translators
+
+    Passed along with the records being translated (see
+    :class:`.context.RecordContext`), so that translations with
+    different selections can run in the same process.
+
+    Parameters
+    ----------
+    default: str
+      Engine used for fields without an engine of their own.
+    fields: dict, optional
+      ``<extractor name>.<field>`` -> engine.
+    """
+
+    __slots__ = ("default", "fields")
+
+    def __init__(self, default="jq", fields=None):
+        fields = dict(fields or {})
+        for engine in [default, *fields.values()]:
+            if engine not in ENGINES:
+                raise ValueError(
+                    "Unknown engine {!r}, expected one of {}".format(
+                        engine, ", ".join(ENGINES)))
+        self.default = default
+        self.fields = fields
+
+    def get(self, extractor_name, field):
+        """Return the engine selected for a field of a translator"""
+        return self.fields.get(
+            "{}.{}".format(extractor_name, field), self.default)
+
+
+# jq for all fields, as in the datalad-catalog workflow
+DEFAULT_ENGINES = EngineSelection()
+
+
+def parse_field_engine(spec):
+    """Parse ``<extractor name>.<field>=<engine>`` into a tuple"""
+    field, sep, engine = spec.partition("=")
+    if not sep or "." not in field:
+        raise ValueError(
+            "Field engine must be given as EXTRACTOR.FIELD=ENGINE, e.g. "
+            "metalad_core.url=native, got {!r}".format(spec)
+        )
+    return field, engine
+
+
+# jq-like access to json values, for native implementations
+
+def iterate(value):
+    """Values of an array or object, like ``.[]?``"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        return list(value.values())
+    return []
+
+
+def iterate_strict(value):
+    """Values of an array or object, like ``.[]``"""
+    if not isinstance(value, (list, dict)):
+        raise ValueError("Cannot iterate over {}".format(
+            json.dumps(value)))
+    return iterate(value)
+
+
+def get(value, key):
+    """Value of a key in an object, or None, like ``.[key]``"""
+    if isinstance(value, dict):
+        return value.get(key)
+    if value is None:
+        return None
+    raise ValueError("Cannot index {} with {!r}".format(
+        type(value).__name__, key))
+
+
+def has(value, key):
+    """Whether an object has a key, like ``has(key)``"""
+    if not isinstance(value, dict):
+        raise ValueError("Cannot check whether {} has a key".format(
+            type(value).__name__))
+    return key in value
+
+
+def select_first(values, key, value):
+    """First of the values with the given value of key
+
+    Like ``first(<values> | select(.[key] == value))``; raises
+    StopIteration if there is none.
+    """
+    for item in values:
+        if get(item, key) == value:
+            return item
+    raise StopIteration
+
+
+def strip_prefix(value, prefix):
+    """Remove a prefix from a string, like ``sub("^prefix"; "")``"""
+    if not isinstance(value, str):
+        raise ValueError("{} cannot be matched, as it is not a string".format(
+            type(value).__name__))
+    return value[len(prefix):] if value.startswith(prefix) else value
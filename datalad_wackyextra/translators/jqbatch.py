@@ -0,0 +1,225 @@
+"""Running the jq programs of jq-based translators over many records
+
+Calling ``jq.first(program, value)`` for every field of every record
+compiles the program and converts the value into jq and back each
+time. Translators deriving from :class:`JqTranslator` declare their jq
+programs up front, so that for a batch of records all programs are
+combined into a single compiled program, which is run once over a
+newline-delimited stream of all inputs. Each record's translator is
+then given its precomputed results.
+
+Results are the same as with ``jq.first``: the first output of each
+program, ``StopIteration`` if there is none, and ``ValueError`` if the
+program fails for that record.
+
+Each field also has a native implementation; which one is used is
+selected with an :class:`.engines.EngineSelection`, given with the
+records. :func:`benchmark` runs both on sample
+records, checks that they agree, and times them.
+"""
+
+from functools import lru_cache
+import json
+import time
+
+import jq
+
+from .context import RecordContext
+from .engines import DEFAULT_ENGINES
+
+_ERROR_KEY = "__jq_error__"
+
+
+@lru_cache(maxsize=None)
+def _compile_combined(programs):
+    """Compile (name, program) pairs into a single jq program
+
+    For each input, the combined program outputs one object with, for
+    each name, a list with the first output of the program (or an
+    empty list), or an object with an error message.
+    """
+    fields = ", ".join(
+        "{}: (try [limit(1; ({}))] catch {{{}: .}})".format(
+            json.dumps(name), program, json.dumps(_ERROR_KEY))
+        for name, program in programs
+    )
+    return jq.compile("{" + fields + "}")
+
+
+def run_programs(programs, inputs):
+    """Run named jq programs over many inputs at once
+
+    Parameters
+    ----------
+    programs: dict
+      Name -> jq program.
+    inputs: list
+      Json-serialisable values the programs are applied to.
+
+    Returns
+    -------
+    list of dict
+      Raw results for each input, to be passed to a JqTranslator.
+    """
+    if not inputs:
+        return []
+    text = "\n".join(json.dumps(value) for value in inputs)
+    return _compile_combined(tuple(programs.items())).input_text(text).all()
+
+
+class JqTranslator:
+    """Base class for translators which use jq programs
+
+    Derived classes list their programs in ``jq_programs``, and provide
+    a static method ``native_<name>`` for each, which computes the same
+    from the same input in Python. All programs are applied to the same
+    input, given by :meth:`get_jq_input`. Results are obtained with
+    :meth:`field`, using the engine selected for the field in the
+    record's context.
+
+    Instances are stateless, and translate any number of records;
+    derived classes implement :meth:`translate_context`, which builds
+    the translated record from a :class:`.context.RecordContext`.
+    """
+
+    # extractor name, used to select engines for fields
+    extractor_name = None
+    # name -> jq program
+    jq_programs = {}
+
+    @staticmethod
+    def get_jq_input(metadata_record):
+        """Return the value to which jq programs are applied"""
+        return metadata_record["extracted_metadata"]
+
+    @classmethod
+    def get_jq_fields(cls, engines=DEFAULT_ENGINES):
+        """Return names of fields for which the jq engine is selected"""
+        return [
+            name for name in cls.jq_programs
+            if engines.get(cls.extractor_name, name) == "jq"
+        ]
+
+    def field(self, ctx, name):
+        """Return the value of a field for a record, with the selected engine
+
+        Raises StopIteration if there is no value, like jq.first.
+        """
+        if ctx.engines.get(self.extractor_name, name) == "native":
+            native = getattr(self, "native_" + name)
+            return native(self.get_jq_input(ctx.record))
+        return self.jq_first(ctx, name)
+
+    def field_or_none(self, ctx, name):
+        """Same as field, but None if there is no value"""
+        try:
+            return self.field(ctx, name)
+        except StopIteration:
+            return None
+
+    def jq_first(self, ctx, name):
+        """Return the first output of a named jq program for a record
+
+        Raises StopIteration if the program has no output.
+        """
+        if ctx.jq_results is None:
+            return jq.first(self.jq_programs[name], self.get_jq_input(ctx.record))
+        result = ctx.jq_results[name]
+        if isinstance(result, dict):
+            raise ValueError(result[_ERROR_KEY])
+        if not result:
+            raise StopIteration
+        return result[0]
+
+    def translate_context(self, ctx):
+        """Return the translated record for a RecordContext"""
+        raise NotImplementedError
+
+    def translate(self, metadata_record, engines=None):
+        """Translate a single record
+
+        ``engines`` is an EngineSelection; jq for all fields by default.
+        """
+        return self.translate_context(
+            RecordContext(metadata_record, engines=engines))
+
+    def translate_many(self, metadata_records, engines=None):
+        """Translate a list of records, running jq programs in one batch"""
+        if engines is None:
+            engines = DEFAULT_ENGINES
+        programs = {
+            name: self.jq_programs[name]
+            for name in self.get_jq_fields(engines)
+        }
+        if programs:
+            results = run_programs(
+                programs, [self.get_jq_input(r) for r in metadata_records])
+        else:
+            results = [None] * len(metadata_records)
+        return [
+            self.translate_context(RecordContext(record, result, engines))
+            for record, result in zip(metadata_records, results)
+        ]
+
+
+def _outcome(func):
+    """Run func, return a comparable description of its outcome"""
+    try:
+        return "value", json.dumps(func())
+    except StopIteration:
+        return "no output", None
+    except ValueError:
+        return "error", None
+    except Exception as e:
+        # a native implementation failing other than jq would
+        return "unexpected error", repr(e)
+
+
+def benchmark(translator, metadata_records):
+    """Compare jq and native implementations of a translator's fields
+
+    Parameters
+    ----------
+    translator: JqTranslator
+    metadata_records: list
+      Sample records for this translator.
+
+    Returns
+    -------
+    list of dict
+      For each field: field name, time (in seconds, for all records)
+      of jq run per record, of jq run as a single batch, and of the
+      native implementation, and the number of records for which the
+      native result differs from the jq one.
+    """
+    inputs = [translator.get_jq_input(r) for r in metadata_records]
+    reports = []
+    for field, program in translator.jq_programs.items():
+        native = getattr(translator, "native_" + field)
+
+        start = time.perf_counter()
+        jq_outcomes = [
+            _outcome(lambda value=value: jq.first(program, value))
+            for value in inputs
+        ]
+        jq_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run_programs({field: program}, inputs)
+        jq_batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        native_outcomes = [
+            _outcome(lambda value=value: native(value)) for value in inputs
+        ]
+        native_time = time.perf_counter() - start
+
+        reports.append({
+            "field": field,
+            "jq_time": jq_time,
+            "jq_batch_time": jq_batch_time,
+            "native_time": native_time,
+            "mismatches": sum(
+                a != b for a, b in zip(jq_outcomes, native_outcomes)),
+        })
+    return reports
@@ -1,128 +1,186 @@
-import jq
-
-class MinimetaTranslator:
+from .builder import drop_none
+from .doi import get_doi_url
+from .engines import get, iterate, iterate_strict, select_first, strip_prefix
+from .jqbatch import JqTranslator
+from .provenance import get_extractors_used
+
+# author details (from #personList) together with author ids of the
+# dataset, or with publications (from #publicationList)
+_COMBINED_PERSONS_IDS = (
+    "{\"authordetails\": .[] | "
+    "select(.[\"@id\"] == \"#personList\") | "
+    ".[\"@list\"], \"authorids\": .[] | "
+    "select(.[\"@type\"] == \"Dataset\") | .author}"
+)
+_COMBINED_PERSONS_PUBS = (
+    "{\"authordetails\": .[] | "
+    "select(.[\"@id\"] == \"#personList\") | "
+    ".[\"@list\"], \"publications\": .[] | "
+    "select(.[\"@id\"] == \"#publicationList\") | .[\"@list\"]}"
+)
+
+class MinimetaTranslator(JqTranslator):
     """Translator for metalad_studyminimeta
 
     Uses jq programs written by jsheunis for datalad-catalog workflow
     to translate some fields, but introduces additional condition checks.
     Will not include empty values in its output.
     """
-    def __init__(self, metadata_record):
-        self.metadata_record = metadata_record
-        self.extracted_metadata = self.metadata_record["extracted_metadata"]
-
-        self.graph = self.extracted_metadata["@graph"]
-        self.type_dataset = jq.first(
-            ".[] | select(.[\"@type\"] == \"Dataset\")",
-            self.graph,
-        )
-        self.combinedpersonsids = self._jq_first_or_none(
-            program=(
-                "{\"authordetails\": .[] | "
-                "select(.[\"@id\"] == \"#personList\") | "
-                ".[\"@list\"], \"authorids\": .[] | "
-                "select(.[\"@type\"] == \"Dataset\") | .author}"
-            ),
-            entry=self.graph
-        )
-        self.combinedpersonspubs = self._jq_first_or_none(
-            program=(
-                "{\"authordetails\": .[] | "
-                "select(.[\"@id\"] == \"#personList\") | "
-                ".[\"@list\"], \"publications\": .[] | "
-                "select(.[\"@id\"] == \"#publicationList\") | .[\"@list\"]}"
-            ),
-            entry=self.graph,
-        )
-
-    def _jq_first_or_none(self, program, entry):
-        try:
-            result = jq.first(program, entry)
-        except StopIteration:
-            result = None
-        return result
+    extractor_name = "metalad_studyminimeta"
+    jq_programs = {
+        "type_dataset": ".[] | select(.[\"@type\"] == \"Dataset\")",
+        # applied to the first combination of persons and ids, if any
+        "authors": _COMBINED_PERSONS_IDS + " | " + (
+            ". as $parent | [.authorids[][\"@id\"] as $idin | "
+            "($parent.authordetails[] | select(.[\"@id\"] == $idin))]"
+        ),
+        "funding": (
+            ".[] | select(.[\"@type\"] == \"Dataset\") | [.funder[]? | "
+            "{\"name\": .name, \"identifier\": \"\", \"description\": \"\"}]"
+        ),
+        # applied to the first combination of persons and publications, if any
+        "publications": _COMBINED_PERSONS_PUBS + " | " + (
+            ". as $parent | [.publications[] as $pubin | "
+            "{\"type\":$pubin[\"@type\"], "
+            "\"title\":$pubin[\"headline\"], "
+            "\"doi\":$pubin[\"sameAs\"], "
+            "\"datePublished\":$pubin[\"datePublished\"], "
+            "\"publicationOutlet\":$pubin[\"publication\"][\"name\"], "
+            "\"authors\": ([$pubin.author[][\"@id\"] as $idin | "
+            "($parent.authordetails[] | select(.[\"@id\"] == $idin))])}]"
+        ),
+        "subdatasets": (
+            ".[]? | select(.[\"@type\"] == \"Dataset\") | [.hasPart[]? | "
+            "{\"dataset_id\": (.identifier | sub(\"^datalad:\"; \"\")), "
+            "\"dataset_version\": (.[\"@id\"] | sub(\"^datalad:\"; \"\")), "
+            "\"dataset_path\": .name, \"dirs_from_path\": []}]"
+        ),
+    }
+
+    @staticmethod
+    def get_jq_input(metadata_record):
+        return metadata_record["extracted_metadata"]["@graph"]
+
+    @staticmethod
+    def _select(graph, key, value):
+        return select_first(iterate_strict(graph), key, value)
+
+    @staticmethod
+    def _find_authors(authors, authordetails):
+        """Details of authors given by id, in order"""
+        return [
+            details
+            for author in iterate_strict(authors)
+            for details in iterate_strict(authordetails)
+            if get(details, "@id") == get(author, "@id")
+        ]
 
-    def get_name(self):
-        return self.type_dataset.get("name", "")
+    @classmethod
+    def native_type_dataset(cls, graph):
+        return cls._select(graph, "@type", "Dataset")
+
+    @classmethod
+    def native_authors(cls, graph):
+        authordetails = get(cls._select(graph, "@id", "#personList"), "@list")
+        authorids = get(cls._select(graph, "@type", "Dataset"), "author")
+        return cls._find_authors(authorids, authordetails)
+
+    @classmethod
+    def native_funding(cls, graph):
+        dataset = cls._select(graph, "@type", "Dataset")
+        return [
+            {"name": get(funder, "name"), "identifier": "", "description": ""}
+            for funder in iterate(get(dataset, "funder"))
+        ]
 
-    def get_description(self):
-        return self.type_dataset.get("description")
+    @classmethod
+    def native_publications(cls, graph):
+        authordetails = get(cls._select(graph, "@id", "#personList"), "@list")
+        publications = get(
+            cls._select(graph, "@id", "#publicationList"), "@list")
+        return [
+            {
+                "type": get(pub, "@type"),
+                "title": get(pub, "headline"),
+                "doi": get(pub, "sameAs"),
+                "datePublished": get(pub, "datePublished"),
+                "publicationOutlet": get(get(pub, "publication"), "name"),
+                "authors": cls._find_authors(
+                    get(pub, "author"), authordetails),
+            }
+            for pub in iterate_strict(publications)
+        ]
 
-    def get_url(self):
-        return self.type_dataset.get("url")
+    @staticmethod
+    def native_subdatasets(graph):
+        dataset = select_first(iterate(graph), "@type", "Dataset")
+        return [
+            {
+                "dataset_id": strip_prefix(get(part, "identifier"), "datalad:"),
+                "dataset_version": strip_prefix(get(part, "@id"), "datalad:"),
+                "dataset_path": get(part, "name"),
+                "dirs_from_path": [],
+            }
+            for part in iterate(get(dataset, "hasPart"))
+        ]
 
-    def get_keywords(self):
-        return self.type_dataset.get("keywords")
+    def get_type_dataset(self, ctx):
+        """Return the Dataset object of the graph, computed once per record"""
+        return ctx.get(
+            "type_dataset", lambda ctx: self.field(ctx, "type_dataset"))
 
-    def get_authors(self):
-        if self.combinedpersonsids is not None:
-            program=(
-                ". as $parent | [.authorids[][\"@id\"] as $idin | "
-                "($parent.authordetails[] | select(.[\"@id\"] == $idin))]"
-            )
-            return jq.first(program, self.combinedpersonsids)
-        return None
+    def get_name(self, ctx):
+        return self.get_type_dataset(ctx).get("name", "")
 
-    def get_funding(self):
-        program = (
-            ".[] | select(.[\"@type\"] == \"Dataset\") | [.funder[]? | "
-            "{\"name\": .name, \"identifier\": \"\", \"description\": \"\"}]"
-        )
-        result = jq.first(program, self.graph) #  [] if nothing found
+    def get_description(self, ctx):
+        return self.get_type_dataset(ctx).get("description")
+
+    def get_url(self, ctx):
+        return self.get_type_dataset(ctx).get("url")
+
+    def get_keywords(self, ctx):
+        return self.get_type_dataset(ctx).get("keywords")
+
+    def get_authors(self, ctx):
+        return self.field_or_none(ctx, "authors")
+
+    def get_funding(self, ctx):
+        result = self.field(ctx, "funding") #  [] if nothing found
         return result if len(result) > 0 else None
 
 
-    def get_publications(self):
-        if self.combinedpersonspubs is not None:
-            program = (
-                ". as $parent | [.publications[] as $pubin | "
-                "{\"type\":$pubin[\"@type\"], "
-                "\"title\":$pubin[\"headline\"], "
-                "\"doi\":$pubin[\"sameAs\"], "
-                "\"datePublished\":$pubin[\"datePublished\"], "
-                "\"publicationOutlet\":$pubin[\"publication\"][\"name\"], "
-                "\"authors\": ([$pubin.author[][\"@id\"] as $idin | "
-                "($parent.authordetails[] | select(.[\"@id\"] == $idin))])}]"
-            )
-            return jq.first(program, self.combinedpersonspubs)
-        else:
-            return None
-
-    def get_subdatasets(self):
-        program = (
-            ".[]? | select(.[\"@type\"] == \"Dataset\") | [.hasPart[]? | "
-            "{\"dataset_id\": (.identifier | sub(\"^datalad:\"; \"\")), "
-            "\"dataset_version\": (.[\"@id\"] | sub(\"^datalad:\"; \"\")), "
-            "\"dataset_path\": .name, \"dirs_from_path\": []}]"
-        )
-        result = jq.first(program, self.graph) #  [] if nothing found
+    def get_publications(self, ctx):
+        result = self.field_or_none(ctx, "publications")
+        if result is not None:
+            for publication in result:
+                publication["doi"] = get_doi_url(publication["doi"]) or ""
+        return result
+
+    def get_subdatasets(self, ctx):
+        result = self.field(ctx, "subdatasets") #  [] if nothing found
         return result if len(result) > 0 else None
 
-    def get_extractors_used(self):
-        keys = [
-            "extractor_name", "extractor_version",
-            "extraction_parameter", "extraction_time",
-            "agent_name", "agent_email",
-        ]
-        return [{k: self.metadata_record[k] for k in keys}]
+    def get_extractors_used(self, ctx):
+        return get_extractors_used(ctx.record)
 
-    def translate(self):
+    def translate_context(self, ctx):
+        record = ctx.record
         translated_record = {
-            "type": self.metadata_record["type"],
-            "dataset_id": self.metadata_record["dataset_id"],
-            "dataset_version": self.metadata_record["dataset_version"],
-            "name": self.get_name(),
-            "description": self.get_description(),
-            "url": self.get_url(),
-            "authors": self.get_authors(),
-            "keywords": self.get_keywords(),
-            "funding": self.get_funding(),
-            "publications": self.get_publications(),
-            "subdatasets": self.get_subdatasets(),
-            "extractors_used": self.get_extractors_used(),
+            "type": record["type"],
+            "dataset_id": record["dataset_id"],
+            "dataset_version": record["dataset_version"],
+            "name": self.get_name(ctx),
+            "description": self.get_description(ctx),
+            "url": self.get_url(ctx),
+            "authors": self.get_authors(ctx),
+            "keywords": self.get_keywords(ctx),
+            "funding": self.get_funding(ctx),
+            "publications": self.get_publications(ctx),
+            "subdatasets": self.get_subdatasets(ctx),
+            "extractors_used": self.get_extractors_used(ctx),
         }
 
-        return {k: v for k, v in translated_record.items() if v is not None}
+        return drop_none(translated_record)
 
 
 if __name__ == "__main__":
@@ -130,9 +188,10 @@ if __name__ == "__main__":
     import sys
     
     fname = sys.argv[1]
+    translator = MinimetaTranslator()
     with open(fname) as jf:
         for line in jf:
             j = json.loads(line)
             if j["extractor_name"] == "metalad_studyminimeta":
-                t = MinimetaTranslator(j).translate()
+                t = translator.translate(j)
                 print(json.dumps(t))
@@ -0,0 +1,63 @@
+"""Provenance (extractor run) information shared by translators
+
+Every translated record says which extractor run produced it, either as
+catalog-style ``metadata_sources`` or as older-style ``extractors_used``.
+A metalad run has a single combination of extractor, parameters,
+extraction time and agent for all the records it produced, so these
+objects are built once per run and then shared between records, keyed
+by the run (see :mod:`.sharing`).
+"""
+
+from functools import lru_cache
+import json
+
+
+def _get_run_key(record):
+    """Return a hashable tuple identifying the extractor run of a record"""
+    # parameters are (usually) a dict, which is not hashable
+    parameter = json.dumps(record["extraction_parameter"], sort_keys=True)
+    return (
+        record["extractor_name"], record["extractor_version"], parameter,
+        record["extraction_time"], record["agent_name"], record["agent_email"],
+    )
+
+
+@lru_cache(maxsize=1024)
+def _metadata_source(name, version, parameter, time, agent_name, agent_email):
+    return {
+        "key_source_map": {},
+        "sources": [
+            {
+                "source_name": name,
+                "source_version": version,
+                "source_parameter": json.loads(parameter),
+                "source_time": time,
+                "agent_email": agent_email,
+                "agent_name": agent_name,
+            }
+        ],
+    }
+
+
+@lru_cache(maxsize=1024)
+def _extractors_used(name, version, parameter, time, agent_name, agent_email):
+    return [
+        {
+            "extractor_name": name,
+            "extractor_version": version,
+            "extraction_parameter": json.loads(parameter),
+            "extraction_time": time,
+            "agent_name": agent_name,
+            "agent_email": agent_email,
+        }
+    ]
+
+
+def get_metadata_source(record):
+    """Return catalog ``metadata_sources`` for a metalad record"""
+    return _metadata_source(*_get_run_key(record))
+
+
+def get_extractors_used(record):
+    """Return ``extractors_used`` for a metalad record"""
+    return _extractors_used(*_get_run_key(record))
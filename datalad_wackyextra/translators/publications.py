@@ -0,0 +1,172 @@
+"""Deduplication of translated publications across records
+
+Many datasets cite the same papers, so the same publication is
+translated (and held in memory) many times. A publication index keeps
+one canonical translated publication per key, which is the normalised
+DOI or, when there is none, a hash of the title and publication year.
+Translators which deal with publications look up each reference before
+translating it, and reuse the publication they indexed before when
+there is one. Translated records are deduplicated against publications
+from all translators; as some translators only know a few fields of a
+publication (e.g. the citation of a datacite reference), entries with
+the same key are merged, preferring the more complete one.
+
+:class:`PublicationIndex` keeps publications in memory;
+:class:`SQLitePublicationIndex` stores them in an SQLite database, which
+can be shared between runs (e.g. shards) and grow beyond memory.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+
+from .doi import normalise_doi
+
+
+def get_publication_key(doi=None, title=None, year=None):
+    """Return a key identifying a publication, or None
+
+    The key is the normalised DOI if there is one, otherwise a hash of
+    the (case-insensitive) title and year. Without a DOI or a title,
+    there is no key, and the publication cannot be deduplicated.
+    """
+    normalised = normalise_doi(doi) if doi else None
+    if normalised is not None:
+        return normalised
+    if not title:
+        return None
+    text = "{}|{}".format(" ".join(title.lower().split()), year or "")
+    return "sha1:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _count_fields(publication):
+    return sum(1 for value in publication.values() if value)
+
+
+def merge_publications(indexed, publication):
+    """Merge two translations of the same publication, field by field
+
+    Fields of the more complete translation (with more non-empty fields)
+    are kept, missing or empty ones are taken from the other.
+    """
+    if _count_fields(publication) > _count_fields(indexed):
+        indexed, publication = publication, indexed
+    merged = dict(indexed)
+    for name, value in publication.items():
+        if value and not merged.get(name):
+            merged[name] = value
+    return merged
+
+
+class PublicationIndex:
+    """In-memory index of canonical translated publications"""
+
+    def __init__(self):
+        self._publications = {}
+
+    def get(self, key):
+        """Return the publication indexed under key, or None"""
+        return self._publications.get(key)
+
+    def put(self, key, publication):
+        self._publications[key] = publication
+
+    def get_or_translate(self, key, translate, scope):
+        """Return the indexed publication, translating it if not indexed
+
+        Parameters
+        ----------
+        key: str or None
+          Publication key; if None, the publication is translated and
+          not indexed.
+        translate: callable
+          Called without arguments to produce the translated publication.
+        scope: str
+          Name of the translator; publications are only reused by the
+          translator which indexed them, as others may know fewer fields.
+        """
+        if key is None:
+            return translate()
+        key = "{}:{}".format(scope, key)
+        publication = self.get(key)
+        if publication is None:
+            publication = translate()
+            self.put(key, publication)
+        return publication
+
+    def deduplicate(self, publications):
+        """Replace translated publications with their canonical versions
+
+        A publication already indexed under the same key is merged with
+        the translated one (see :func:`merge_publications`), and the
+        index is updated if that adds to it.
+        """
+        deduplicated = []
+        for publication in publications:
+            key = get_publication_key(
+                publication.get("doi"), publication.get("title"),
+                publication.get("datePublished"))
+            if key is not None:
+                indexed = self.get(key)
+                if indexed is None:
+                    self.put(key, publication)
+                else:
+                    publication = merge_publications(indexed, publication)
+                    if publication == indexed:
+                        publication = indexed
+                    else:
+                        self.put(key, publication)
+            deduplicated.append(publication)
+        return deduplicated
+
+    def close(self):
+        pass
+
+
+class SQLitePublicationIndex(PublicationIndex):
+    """Publication index stored in an SQLite database
+
+    Recently used publications are additionally kept in memory, so that
+    frequently cited ones are shared rather than decoded again.
+    """
+
+    def __init__(self, path, cache_size=10000):
+        super().__init__()
+        self._publications = OrderedDict()
+        self._cache_size = cache_size
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS publications "
+            "(key TEXT PRIMARY KEY, publication TEXT)"
+        )
+
+    def _remember(self, key, publication):
+        self._publications[key] = publication
+        if len(self._publications) > self._cache_size:
+            self._publications.popitem(last=False)
+
+    def get(self, key):
+        publication = self._publications.get(key)
+        if publication is not None:
+            self._publications.move_to_end(key)
+            return publication
+        row = self._db.execute(
+            "SELECT publication FROM publications WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        publication = json.loads(row[0])
+        self._remember(key, publication)
+        return publication
+
+    def put(self, key, publication):
+        self._db.execute(
+            "INSERT OR REPLACE INTO publications VALUES (?, ?)",
+            (key, json.dumps(publication)),
+        )
+        self._remember(key, publication)
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
@@ -0,0 +1,30 @@
+"""Objects shared between translated records
+
+Translated records repeat a lot: the same authors, licenses and
+publications appear in many records, and all records of an extractor
+run have the same provenance. Such objects are built once and shared by
+the records containing them: :func:`.authors.make_author`,
+:func:`.spdx.get_license` and :mod:`.provenance` cache them, and the
+publication index (:mod:`.publications`) and translation cache
+(:mod:`.cache`) reuse them. This saves memory, and lets
+:class:`~datalad_wackyextra.encoder.FragmentEncoder` encode each of
+them once.
+
+Shared objects must not be modified, as that would change every record
+containing them (and make encoded fragments stale). Records are only
+translated with shared objects when they are encoded right away, i.e.
+when translating into a file or for a translation server. Records
+returned to callers, by the functions of
+:mod:`datalad_wackyextra.translation` and by the datalad-catalog
+translators, are copies made with :func:`unshare`, which callers may
+modify.
+"""
+
+
+def unshare(value):
+    """Return a copy of a translated value, sharing no dicts or lists"""
+    if type(value) is dict:
+        return {k: unshare(v) for k, v in value.items()}
+    if type(value) is list:
+        return [unshare(v) for v in value]
+    return value
@@ -0,0 +1,182 @@
+"""SPDX license lookup and license expression handling
+
+License names and ids come from a copy of the SPDX license list, shipped
+as spdx.json next to this module (regenerate with
+tools/update_spdx_index.py). The index is loaded on first use.
+
+Lookup is case-insensitive, deprecated ids are replaced by their current
+equivalents (e.g. GPL-2.0 -> GPL-2.0-only), and full license names are
+recognised as well as ids. Expressions combining licenses with ``OR``,
+``AND`` and ``WITH`` (and parentheses) are parsed and normalised.
+"""
+
+from functools import lru_cache
+import json
+from pathlib import Path
+import re
+
+SPDX_URL = "https://spdx.org/licenses/{}.html"
+
+_TOKEN = re.compile(r"\(|\)|[^\s()]+")
+# operators, by increasing precedence
+_OPERATORS = ("OR", "AND", "WITH")
+
+
+class _Index:
+    """Case-insensitive views of the SPDX license list"""
+
+    def __init__(self, data):
+        self.version = data["version"]
+        self.names = data["licenses"]
+        self.exception_names = data["exceptions"]
+        self.deprecated = data["deprecated"]
+        self.licenses = {k.lower(): k for k in self.names}
+        # full names, for metadata which gives those instead of ids
+        self.licenses.update(
+            (v.lower(), k) for k, v in self.names.items()
+            if v.lower() not in self.licenses
+        )
+        self.exceptions = {k.lower(): k for k in self.exception_names}
+
+
+@lru_cache(maxsize=None)
+def get_index():
+    """Load the SPDX license index (once)"""
+    with open(Path(__file__).with_name("spdx.json"), encoding="utf-8") as f:
+        return _Index(json.load(f))
+
+
+def _parse(tokens, pos=0):
+    """Parse tokens into a tree, returns (tree, next position)
+
+    Trees are either license strings, or tuples of (operator, left, right).
+    WITH binds tighter than AND, which binds tighter than OR.
+    """
+    def parse_or(pos):
+        left, pos = parse_and(pos)
+        while pos < len(tokens) and tokens[pos].upper() == "OR":
+            right, pos = parse_and(pos + 1)
+            left = ("OR", left, right)
+        return left, pos
+
+    def parse_and(pos):
+        left, pos = parse_with(pos)
+        while pos < len(tokens) and tokens[pos].upper() == "AND":
+            right, pos = parse_with(pos + 1)
+            left = ("AND", left, right)
+        return left, pos
+
+    def parse_with(pos):
+        left, pos = parse_atom(pos)
+        if pos < len(tokens) and tokens[pos].upper() == "WITH":
+            if pos + 1 >= len(tokens) or tokens[pos + 1] in "()":
+                raise ValueError("expected an exception after WITH")
+            left = ("WITH", left, _normalise_exception(tokens[pos + 1]))
+            pos += 2
+        return left, pos
+
+    def parse_atom(pos):
+        if pos >= len(tokens):
+            raise ValueError("unexpected end of expression")
+        token = tokens[pos]
+        if token == "(":
+            tree, pos = parse_or(pos + 1)
+            if pos >= len(tokens) or tokens[pos] != ")":
+                raise ValueError("unbalanced parentheses")
+            return tree, pos + 1
+        if token == ")" or token.upper() in _OPERATORS:
+            raise ValueError("unexpected {!r}".format(token))
+        return _normalise_id(token), pos + 1
+
+    return parse_or(pos)
+
+
+def _normalise_id(license_id):
+    """Return canonical id (or replacement expression) for a license id"""
+    index = get_index()
+    canonical = index.licenses.get(license_id.lower())
+    if canonical is None and license_id.endswith("+"):
+        # "or later" operator applied to a license id
+        base = index.licenses.get(license_id[:-1].lower())
+        if base is not None:
+            canonical = base + "+"
+    if canonical is None:
+        # LicenseRef-..., or not in the list; keep as given
+        return license_id
+    replacement = index.deprecated.get(canonical)
+    if replacement is not None:
+        tree, _ = _parse(_TOKEN.findall(replacement))
+        return tree
+    return canonical
+
+
+def _normalise_exception(exception_id):
+    return get_index().exceptions.get(exception_id.lower(), exception_id)
+
+
+def _render(tree, parent=None):
+    if isinstance(tree, str):
+        return tree
+    operator, left, right = tree
+    rendered = "{} {} {}".format(
+        _render(left, operator), operator, _render(right, operator)
+    )
+    # parentheses needed only where a weaker operator is nested
+    if parent is not None and \
+            _OPERATORS.index(operator) < _OPERATORS.index(parent):
+        return "(" + rendered + ")"
+    return rendered
+
+
+def normalise_expression(expression):
+    """Return a license expression with canonical ids and operators
+
+    Raises ValueError if the expression cannot be parsed.
+    """
+    if expression.strip().lower() in get_index().licenses:
+        # a single id or full name, possibly containing "or" or "and"
+        return _render(_normalise_id(expression.strip()))
+    tokens = _TOKEN.findall(expression)
+    if len(tokens) > 1 and not any(
+            t.upper() in _OPERATORS or t in "()" for t in tokens):
+        # a full license name, such as "MIT License"
+        tokens = [expression.strip()]
+    tree, pos = _parse(tokens)
+    if pos != len(tokens):
+        raise ValueError("unexpected {!r}".format(tokens[pos]))
+    return _render(tree)
+
+
+@lru_cache(maxsize=4096)
+def _resolve(expression):
+    """Return (name, url) for a license expression
+
+    For a single known license, the name is its full name and the url
+    points to spdx.org. Otherwise, the name is the (normalised, if
+    possible) expression and the url is empty.
+    """
+    try:
+        normalised = normalise_expression(expression)
+    except ValueError:
+        return expression, ""
+    name = get_index().names.get(normalised)
+    if name is not None:
+        return name, SPDX_URL.format(normalised)
+    return normalised, ""
+
+
+@lru_cache(maxsize=4096)
+def get_license(expression, url=None):
+    """Return a license as expected by the catalog, i.e. name and url
+
+    Results are cached and shared, see :mod:`.sharing`.
+
+    Parameters
+    ----------
+    expression: str
+      SPDX license id, full license name, or license expression.
+    url: str, optional
+      License url; if given, it is used instead of a spdx.org url.
+    """
+    name, spdx_url = _resolve(expression)
+    return {"name": name, "url": url if url else spdx_url}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Benchmark: encoding translated records with and without fragment reuse
+
+Translates a synthetic dump of we_cff records (by default one million,
+from a handful of extractor runs, with authors and references drawn
+from a common pool) and measures the time spent encoding the translated
+records with the default jsonlines encoder and with
+datalad_wackyextra.encoder.FragmentEncoder. Only encoding is timed;
+records are generated and translated on the fly, and not kept.
+
+Usage::
+
+    python tools/bench_encoder.py [N_RECORDS]
+"""
+
+import json
+import random
+import sys
+import time
+
+from datalad_wackyextra.encoder import FragmentEncoder
+from datalad_wackyextra.translators.cff import CffTranslator
+
+
+def generate(n_records, n_runs=4, n_people=2000, n_references=500):
+    rng = random.Random(0)
+    people = [
+        {
+            "given-names": "Given{}".format(i),
+            "family-names": "Family{}".format(i),
+            "orcid": "https://orcid.org/0000-0000-0000-{:04d}".format(i),
+        }
+        for i in range(n_people)
+    ]
+    references = [
+        {
+            "type": "article",
+            "title": "Reference paper {}".format(i),
+            "doi": "10.1000/ref.{}".format(i),
+            "year": 2000 + i % 20,
+            "journal": "Journal of Things",
+            "authors": rng.sample(people, 3),
+        }
+        for i in range(n_references)
+    ]
+    for i in range(n_records):
+        yield {
+            "type": "dataset",
+            "dataset_id": "{:08x}-0000-0000-0000-000000000000".format(i),
+            "dataset_version": "{:040x}".format(i),
+            "extractor_name": "we_cff",
+            "extractor_version": "0.0.1",
+            "extraction_parameter": {},
+            "extraction_time": 1670000000.0 + i % n_runs,
+            "agent_name": "Agent",
+            "agent_email": "agent@example.com",
+            "extracted_metadata": {
+                "title": "Dataset {}".format(i),
+                "abstract": "Description of dataset {}".format(i),
+                "doi": "10.5281/zenodo.{}".format(i),
+                "license": "CC-BY-4.0",
+                "authors": rng.sample(people, 4),
+                "keywords": ["neuroscience", "imaging"],
+                "references": rng.sample(references, 2),
+            },
+        }
+
+
+def main(n_records=1000000):
+    encoders = {
+        "default": json.JSONEncoder(ensure_ascii=False).encode,
+        "fragment": FragmentEncoder().encode,
+    }
+    elapsed = dict.fromkeys(encoders, 0.0)
+    size = 0
+    translator = CffTranslator()
+    for record in generate(n_records):
+        translated = translator.translate(record)
+        for name, encode in encoders.items():
+            start = time.perf_counter()
+            line = encode(translated)
+            elapsed[name] += time.perf_counter() - start
+        size += len(line) + 1
+    print("{} records, {:.0f} MB".format(n_records, size / 1e6))
+    for name, total in elapsed.items():
+        print("{:10} {:7.2f} s {:7.2f} us/record".format(
+            name, total, total / n_records * 1e6))
+
+
+if __name__ == "__main__":
+    main(*(int(x) for x in sys.argv[1:]))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Microbenchmark: building translated records with and without NoNoneDict
+
+Compares the former way of building records (a UserDict subclass which
+ignores None values for each author, plus a filtering dict comprehension
+for the record) with plain dicts and in-place removal of None values, as
+done by datalad_wackyextra.translators.builder. Reports time and peak
+traced memory per record.
+
+Usage::
+
+    python tools/bench_record_builder.py [N_AUTHORS]
+"""
+
+from collections import UserDict
+import sys
+import timeit
+import tracemalloc
+
+from datalad_wackyextra.translators.builder import drop_none
+
+
+class NoNoneDict(UserDict):
+    def __setitem__(self, key, item):
+        if item is not None:
+            super().__setitem__(key, item)
+
+
+def build_before(authors):
+    cat_authors = []
+    for a in authors:
+        author = NoNoneDict()
+        author["name"] = a.get("name")
+        author["givenName"] = a.get("given-names")
+        author["familyName"] = a.get("family-names")
+        author["email"] = a.get("email")
+        cat_authors.append(author.data)
+    record = {
+        "type": "dataset", "name": "x", "description": None, "doi": None,
+        "license": None, "authors": cat_authors, "keywords": None,
+    }
+    return {k: v for k, v in record.items() if v is not None}
+
+
+def build_after(authors):
+    cat_authors = [
+        drop_none({
+            "name": a.get("name"),
+            "givenName": a.get("given-names"),
+            "familyName": a.get("family-names"),
+            "email": a.get("email"),
+        })
+        for a in authors
+    ]
+    return drop_none({
+        "type": "dataset", "name": "x", "description": None, "doi": None,
+        "license": None, "authors": cat_authors, "keywords": None,
+    })
+
+
+def peak_memory(func, authors):
+    tracemalloc.start()
+    func(authors)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(n_authors=20):
+    authors = [
+        {"given-names": "Given{}".format(i), "family-names": "Family"}
+        for i in range(n_authors)
+    ]
+    assert build_before(authors) == build_after(authors)
+    for func in (build_before, build_after):
+        n, total = timeit.Timer(lambda: func(authors)).autorange()
+        print("{:14} {:8.2f} us/record {:8d} B peak/record".format(
+            func.__name__, total / n * 1e6, peak_memory(func, authors)))
+
+
+if __name__ == "__main__":
+    main(*(int(x) for x in sys.argv[1:]))
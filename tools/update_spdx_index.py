@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Generate the SPDX license index shipped with the translators
+
+Reads licenses.json and exceptions.json from the SPDX license list data
+(https://github.com/spdx/license-list-data) and writes a compact index to
+datalad_wackyextra/translators/spdx.json, which is loaded by
+datalad_wackyextra.translators.spdx.
+
+Usage::
+
+    python tools/update_spdx_index.py [LICENSE_LIST_DATA_JSON_DIR_OR_URL]
+"""
+
+import json
+from pathlib import Path
+import sys
+from urllib.request import urlopen
+
+DEFAULT_SOURCE = (
+    "https://raw.githubusercontent.com/spdx/license-list-data/main/json"
+)
+OUTFILE = (
+    Path(__file__).resolve().parent.parent
+    / "datalad_wackyextra" / "translators" / "spdx.json"
+)
+
+# Deprecated ids whose replacement does not follow the -only / -or-later
+# pattern; based on the notes in the SPDX license list
+REPLACEMENTS = {
+    "BSD-2-Clause-FreeBSD": "BSD-2-Clause-Views",
+    "BSD-2-Clause-NetBSD": "BSD-2-Clause",
+    "bzip2-1.0.5": "bzip2-1.0.6",
+    "StandardML-NJ": "SMLNJ",
+    "GPL-2.0-with-autoconf-exception":
+        "GPL-2.0-only WITH Autoconf-exception-2.0",
+    "GPL-2.0-with-bison-exception":
+        "GPL-2.0-or-later WITH Bison-exception-2.2",
+    "GPL-2.0-with-classpath-exception":
+        "GPL-2.0-only WITH Classpath-exception-2.0",
+    "GPL-2.0-with-font-exception": "GPL-2.0-only WITH Font-exception-2.0",
+    "GPL-2.0-with-GCC-exception": "GPL-2.0-only WITH GCC-exception-2.0",
+    "GPL-3.0-with-autoconf-exception":
+        "GPL-3.0-only WITH Autoconf-exception-3.0",
+    "GPL-3.0-with-GCC-exception": "GPL-3.0-only WITH GCC-exception-3.1",
+}
+
+
+def load(source, name):
+    if source.startswith(("http://", "https://")):
+        with urlopen(source + "/" + name) as f:
+            return json.load(f)
+    with open(Path(source) / name) as f:
+        return json.load(f)
+
+
+def get_replacement(license_id, licenses, exceptions):
+    """Return the replacement expression for a deprecated license id"""
+    if license_id in REPLACEMENTS:
+        replacement = REPLACEMENTS[license_id]
+    elif license_id.endswith("+"):
+        replacement = license_id[:-1] + "-or-later"
+    else:
+        replacement = license_id + "-only"
+    # only keep replacements consisting of known ids
+    parts = replacement.split(" WITH ")
+    if parts[0] not in licenses or (
+            len(parts) > 1 and parts[1] not in exceptions):
+        return None
+    return replacement
+
+
+def main(source=DEFAULT_SOURCE):
+    license_data = load(source, "licenses.json")
+    exception_data = load(source, "exceptions.json")
+
+    licenses = {x["licenseId"]: x["name"] for x in license_data["licenses"]}
+    exceptions = {
+        x["licenseExceptionId"]: x["name"]
+        for x in exception_data["exceptions"]
+    }
+    deprecated = {}
+    for x in license_data["licenses"]:
+        if x["isDeprecatedLicenseId"]:
+            replacement = get_replacement(x["licenseId"], licenses, exceptions)
+            if replacement is not None:
+                deprecated[x["licenseId"]] = replacement
+
+    index = {
+        "version": license_data["licenseListVersion"],
+        "licenses": dict(sorted(licenses.items())),
+        "exceptions": dict(sorted(exceptions.items())),
+        "deprecated": dict(sorted(deprecated.items())),
+    }
+    with open(OUTFILE, "w") as f:
+        json.dump(index, f, indent=0, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])